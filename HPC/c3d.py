@@ -32,6 +32,10 @@ PROCESSOR_INTEL = 84
 PROCESSOR_DEC = 85
 PROCESSOR_MIPS = 86
 
+# number of bits set in each byte value, used to count the cameras that saw
+# a point from the high byte of its residual word
+CAMERA_COUNT = np.array([bin(i).count('1') for i in range(256)])
+
 
 class Header(object):
     '''Header information from a C3D file.
@@ -788,7 +792,27 @@ class Reader(Manager):
 
         self.check_metadata()
 
-    def read_frames(self, copy=True,onlyXYZ=False):
+    def frame_stride(self):
+        '''Return the number of values each frame takes up in the data section.
+
+        A frame holds four values for each point followed by the analog
+        samples, all stored as int16 or, for a negative scale factor, float32.
+        '''
+        return 4 * self.header.point_count + self.header.analog_count
+
+    def frame_offset(self, frame_no):
+        '''Return the byte offset in the file where the given frame starts.
+
+        Arguments
+        ---------
+        frame_no : int
+            A frame number between `first_frame()` and `last_frame()`.
+        '''
+        itemsize = [2, 4][self.scale_factor() < 0]
+        return ((self.header.data_block - 1) * 512 +
+                (frame_no - self.first_frame()) * self.frame_stride() * itemsize)
+
+    def read_frames(self, copy=True,onlyXYZ=False,first=None,last=None,analog=True):
         '''Iterate over the data frames from our C3D file handle.
 
         Arguments
@@ -804,6 +828,16 @@ class Reader(Manager):
             If onlyXYZ is set to True the point will be only three dimensions 
             without the error and camera values.
 
+        first, last : int
+            Read only the frames first..last, inclusive. The reader seeks
+            straight to `frame_offset(first)`, so several processes can each
+            read their own range of the same file. Default to `first_frame()`
+            and `last_frame()`.
+
+        analog : bool
+            Set this to False to skip over the analog samples of each frame,
+            the third element of each tuple is then an empty array.
+
         Returns
         -------
         This generates a sequence of (frame number, points, analog) tuples, one
@@ -842,25 +876,36 @@ class Reader(Manager):
             analog_dtype = np.float32
         elif analog_unsigned:
             analog_dtype = np.uint16
-        analog = np.array([], float)
-
-        offsets = np.zeros((apf, ), int)
-        param = self.get('ANALOG:OFFSET')
-        if param is not None:
-            offsets = param.int16_array[:apf]
-
-        scales = np.ones((apf, ), float)
-        param = self.get('ANALOG:SCALE')
-        if param is not None:
-            scales = param.float_array[:apf]
-
-        gen_scale = 1.
-        param = self.get('ANALOG:GEN_SCALE')
-        if param is not None:
-            gen_scale = param.float_value
+        analog_data = np.array([], float)
+
+        # the analog parameters are only read when they are decoded
+        if analog:
+            offsets = np.zeros((apf, ), int)
+            param = self.get('ANALOG:OFFSET')
+            if param is not None:
+                offsets = param.int16_array[:apf]
+
+            scales = np.ones((apf, ), float)
+            param = self.get('ANALOG:SCALE')
+            if param is not None:
+                scales = param.float_array[:apf]
+
+            gen_scale = 1.
+            param = self.get('ANALOG:GEN_SCALE')
+            if param is not None:
+                gen_scale = param.float_value
+
+        if first is None:
+            first = self.first_frame()
+        if last is None:
+            last = self.last_frame()
+        if first < self.first_frame() or last > self.last_frame():
+            raise ValueError(
+                'frames {}..{} are outside of the file ({}..{})'.
+                format(first, last, self.first_frame(), self.last_frame()))
 
-        self._handle.seek((self.header.data_block - 1) * 512)
-        for frame_no in xrange(self.first_frame(), self.last_frame() + 1):
+        self._handle.seek(self.frame_offset(first))
+        for frame_no in xrange(first, last + 1):
             raw = np.fromfile(self._handle, dtype=point_dtype,
                 count=4 * self.header.point_count).reshape((ppf, 4))
 
@@ -877,17 +922,20 @@ class Reader(Manager):
                 points[valid, 3] = (c & 0xff).astype(float) * scale
 
                 # fifth value is number of bits set in camera-observation byte
-                points[valid, 4] = sum((c & (1 << k)) >> k for k in range(8, 17))
+                points[valid, 4] = CAMERA_COUNT[c >> 8]
 
-            if self.header.analog_count > 0:
+            if self.header.analog_count > 0 and analog:
                 raw = np.fromfile(self._handle, dtype=analog_dtype,
                     count=self.header.analog_count).reshape((-1, apf))
-                analog = (raw.astype(float) - offsets) * scales * gen_scale
+                analog_data = (raw.astype(float) - offsets) * scales * gen_scale
+            elif self.header.analog_count > 0:
+                self._handle.seek(
+                    self.header.analog_count * np.dtype(analog_dtype).itemsize, 1)
 
             if copy:
-                yield frame_no, points.copy(), analog.copy()
+                yield frame_no, points.copy(), analog_data.copy()
             else:
-                yield frame_no, points, analog
+                yield frame_no, points, analog_data
 
 
 class Writer(Manager):
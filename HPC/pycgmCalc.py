@@ -4,8 +4,12 @@ Created on Tue Jul 28 17:16:44 2015
 
 @author: cadop
 """
+import numpy as np
 import pyCGM
 
+#Number of values JointAngleCalc returns for each frame
+RESULTSIZE = 273
+
 #Each rank should run this function and return the array of data
 # motiondata should be passed individually with scatter
 # static and vsk should use bcast
@@ -17,4 +21,68 @@ def calcFramesMPI(motiondata,vsk):
         angles.append(angle)
     #should be send to master rank
     return angles
+
+def calcFramesArray(values,labels,vsk,out=None):
+    """
+    Calculates the frames of a (frames,markers,3) float64 array, such as the
+    block each rank receives with Scatterv, into the rows of out
+    @param values Marker positions as an array of frames by markers by xyz
+    @param labels Marker names in the order of the second axis of values
+    @param vsk Dictionary of subject measurements
+    @param out Optional (frames,RESULTSIZE) float64 array to write into, the
+            buffer that is passed to Gatherv
+    """
+    if out is None:
+        out = np.empty((len(values),RESULTSIZE),dtype=np.float64)
+    for i in range(len(values)):
+        out[i] = pyCGM.JointAngleCalc(dict(zip(labels,values[i])),vsk)
+    return out
+
+def splitFrames(frames,size,rootshare=1.0):
+    """
+    Splits frames over all the ranks, rank 0 included. Returns the counts
+    and displacements, in frames, of every rank as arrays so they can be
+    scaled to the element counts Scatterv and Gatherv need
+    @param frames Number of frames to split
+    @param size Number of ranks
+    @param rootshare Share of rank 0 relative to the other ranks, e.g. 0.5
+            to give the root half as many frames since it also loads and
+            writes the data, or 0 to keep it out of the calculation
+    """
+    weights = np.ones(size,dtype=np.float64)
+    weights[0] = rootshare
+    if weights.sum() == 0:
+        weights[0] = 1
+    bounds = np.round(np.cumsum(weights)/weights.sum()*frames).astype(np.int64)
+    counts = np.diff(np.concatenate(([0],bounds)))
+    displs = np.zeros(size,dtype=np.int64)
+    displs[1:] = np.cumsum(counts)[:-1]
+    return counts,displs
+
+def splitChunks(frames,chunksize):
+    """
+    Splits frames into chunks of chunksize frames, the last one shorter,
+    that are handed out to the ranks as they ask for work
+    @param frames Number of frames to split
+    @param chunksize Frames in each chunk
+    @return List of (first frame, frames) of every chunk
+    """
+    chunksize = max(1,int(chunksize))
+    return [(first,min(chunksize,frames-first)) for first in range(0,frames,chunksize)]
+
+def workerReport(workers,wall):
+    """
+    Makes the utilisation report of the ranks of a calculation
+    @param workers (rank, chunks, frames, busy seconds) of each rank
+    @param wall Seconds the whole calculation took
+    @return List with a dictionary for each rank, with the keys worker,
+            chunks, frames, busy and utilisation, the part of the wall time
+            the rank spent calculating
+    """
+    report = []
+    for index,chunks,frames,busy in sorted(workers):
+        utilisation = busy/wall if wall > 0 else 0.0
+        report.append({'worker':index,'chunks':chunks,'frames':frames,
+                       'busy':busy,'utilisation':utilisation})
+    return report
  ###############################################################################
@@ -156,7 +156,7 @@ def loadC3D(filename):
     data_length = reader.last_frame() - reader.first_frame()
     markers=[str(label.rstrip()) for label in labels]
     
-    for frame_no, points, analog in reader.read_frames(True,True):
+    for frame_no, points, analog in reader.read_frames(True,True,analog=False):
         for label, point in zip(markers, points):
             #Create a dictionary with format LFHDX: 123 
             if label[0]=='*':
@@ -170,6 +170,39 @@ def loadC3D(filename):
         mydict = {}
     return [data,dataunlabeled,markers]
 
+def c3dFrameRange(filename):
+    """
+    Returns the first and last frame numbers of a c3d file, only the header
+    and parameters are read
+    """
+    with open(filename, 'rb') as handle:
+        reader = c3d.Reader(handle)
+        return reader.first_frame(),reader.last_frame()
+
+def loadC3DArray(filename,first=None,last=None):
+    """
+    Reads the frames first..last of a c3d file into one float64 array
+    @param filename Name of the c3d file
+    @param first First frame number to read, by default the first frame
+    @param last Last frame number to read, inclusive, by default the last frame
+    @return [values,labels] where values is an array of frames by labeled
+            markers by xyz, with nan for missing markers, in the order of
+            labels. Unlabeled markers (names starting with '*') are skipped
+    """
+    with open(filename, 'rb') as handle:
+        reader = c3d.Reader(handle)
+        labels = [str(label.rstrip()) for label in reader.get('POINT:LABELS').string_array]
+        keep = [i for i in range(len(labels)) if labels[i][:1]!='*']
+        if first is None:
+            first = reader.first_frame()
+        if last is None:
+            last = reader.last_frame()
+        values = np.empty((max(last-first+1,0),len(keep),3),dtype=np.float64)
+        if len(values) > 0:
+            for i,(frame_no,points,analog) in enumerate(reader.read_frames(False,True,first,last,analog=False)):
+                values[i] = points[keep]
+    return [values,[labels[i] for i in keep]]
+
 def loadCSV(filename):
     if filename == '':
         self.returnedData.emit(None)
@@ -263,6 +296,7 @@ def writeResult(data,filename,**kargs):
         @param filename Name to save the csv
         @param kargs
                 delimiter Delimiter for the csv. By default it's using ','
+                start First frame to write. By default it's 1800
                 angles True or false to save angles. Or a list of angles to save
                 axis True of false to save axis. Or a list of axis to save
         Examples
@@ -365,12 +399,58 @@ def writeResult(data,filename,**kargs):
         dataFilter=np.column_stack((frames,dataFilter))
         start = 1800
         end = 3600
+        if kargs.has_key('start'):
+                start=kargs['start']
         dataFilter = dataFilter[start:]
         np.savetxt(filename+'.csv', dataFilter, delimiter=delimiter,header=header,fmt="%.15f")
         #np.savetxt(filename, dataFilter, delimiter=delimiter,fmt="%.15f")
         #np.savez_compressed(filename,dataFilter)
         #np.save(filename,dataFilter)
 
+def createResultFile(filename,frames,columns=EA,**kargs):
+    """
+    Creates a .npy file of frames by columns float64 values for the ranks of
+    an MPI run to write their rows into with writeResultRows. Only the
+    header is written, the rows are preallocated, and the metadata goes
+    next to it in filename+'.json'
+    @param filename Name of the .npy file
+    @param frames Number of rows
+    @param columns Number of values in each row
+    @param kargs
+            metadata Dictionary of extra values to save in the json file
+    @return Offset in bytes of the first row in the file
+    """
+    header = {'descr':np.lib.format.dtype_to_descr(np.dtype(np.float64)),
+              'fortran_order':False,
+              'shape':(frames,columns)}
+    with open(filename,'wb') as f:
+        np.lib.format.write_array_header_1_0(f,header)
+        offset = f.tell()
+        f.truncate(offset+frames*columns*np.dtype(np.float64).itemsize)
+    
+    metadata = {'frames':frames,'columns':columns,
+                'angles':[SJA,EJA],'axis':[SA,EA]}
+    if kargs.has_key('metadata'):
+        metadata.update(kargs['metadata'])
+    with open(filename+'.json','w') as f:
+        json.dump(metadata,f)
+    return offset
+
+def writeResultRows(filename,offset,rows,first):
+    """
+    Writes rows of a result into a file made by createResultFile, in place
+    @param filename Name of the .npy file
+    @param offset Offset of the first row, as returned by createResultFile
+    @param rows Array of frames by columns to write
+    @param first Row number of the first of rows in the whole result
+    """
+    rows = np.ascontiguousarray(rows,dtype=np.float64)
+    if len(rows) == 0:
+        return
+    with open(filename,'r+b') as f:
+        f.seek(offset+first*rows.shape[1]*rows.itemsize)
+        rows.tofile(f)
+
 def loadVSK(filename):
         #Check if the filename is valid
         #if not, return None
@@ -405,6 +485,47 @@ def loadVSK(filename):
         return [vsk_keys,vsk_data]
 
 
+#Columns of the batch report, in order
+reportFields = ['dynamic','static','vsk','output','rank','status','frames',
+                'load','static_calc','angles_calc','save','total','error']
+
+def loadManifest(filename):
+    """
+    Reads a manifest of trials for a batch run
+    @param filename Name of a csv file with one trial per line as
+            dynamic,static,vsk,output. Empty lines and lines starting with #
+            are skipped
+    @return List of (dynamic,static,vsk,output) tuples
+    """
+    tasks = []
+    with open(filename, 'r') as f:
+        for line in f:
+            line = line.strip()
+            if line == '' or line.startswith('#'):
+                continue
+            fields = [field.strip() for field in line.split(',')]
+            if len(fields) != 4:
+                raise Exception("Manifest line should be dynamic,static,vsk,output: "+line)
+            tasks.append(tuple(fields))
+    return tasks
+
+def writeBatchReport(reports,filename):
+    """
+    Writes one csv line of timings and status for every trial of a batch run,
+    followed by the totals
+    @param reports List of dictionaries as returned for each trial, with the
+            keys of reportFields
+    @param filename Name to save the csv
+    """
+    with open(filename, 'w') as f:
+        f.write(",".join(reportFields)+'\n')
+        for report in reports:
+            f.write(",".join([str(report[key]) for key in reportFields])+'\n')
+        failed = len([report for report in reports if report['status'] != 'ok'])
+        f.write("# trials = %d, failed = %d, frames = %d, total trial time = %.10fs\n"%(
+            len(reports),failed,sum([report['frames'] for report in reports]),
+            sum([report['total'] for report in reports])))
+
 def splitDataDict(motionData):        
     labels = motionData[0].keys()
     values = []
@@ -413,6 +534,19 @@ def splitDataDict(motionData):
         
     return values,labels
 
+def splitDataArray(motionData):
+    """
+    Like splitDataDict, but returns the values as one contiguous float64
+    array of frames by markers by xyz that can be sent as an MPI buffer
+    """
+    labels = motionData[0].keys()
+    values = np.empty((len(motionData),len(labels),3),dtype=np.float64)
+    for i in range(len(motionData)):
+        for j in range(len(labels)):
+            values[i,j] = motionData[i][labels[j]]
+    
+    return values,labels
+
 def combineDataDict(values,labels):
     data = []
     tmp_dict = {}
@@ -3,11 +3,34 @@
 
 #Example With Input Args:
 # mpirun -c 12 python runpyCGM_MPI_Frames.py -o MPIFramesOutput -i Sample_ROM.c3d -v Sample_SM.vsk -x Sample_Static.c3d
+# The root rank calculates a share of the frames too, --rootshare sets its
+# share relative to the other ranks (0 keeps it out of the calculation) and
+# --overlap receives the other ranks' rows while the root calculates its own.
+# The csv is still written by the root once every row has arrived; to have
+# the rows written while the calculation runs use --npy, where every rank
+# writes its own rows as soon as they are calculated
+# mpirun -c 4 python runpyCGM_MPI_Frames.py -o MPIFramesOutput -i Sample_ROM.c3d -v Sample_SM.vsk -x Sample_Static.c3d --rootshare=0.5 --overlap
+# With --parallelread every rank reads its own frames of the c3d file from
+# shared storage instead of the root loading and scattering the whole trial
+# mpirun -c 12 python runpyCGM_MPI_Frames.py -o MPIFramesOutput -i Sample_ROM.c3d -v Sample_SM.vsk -x Sample_Static.c3d --parallelread
+# With --manifest whole trials are given out to the ranks instead of frames.
+# The manifest is a csv with one dynamic,static,vsk,output line per trial
+# mpirun -c 64 python runpyCGM_MPI_Frames.py --manifest=cohort.csv
+# With --npy every rank writes its rows straight into a preallocated
+# <outputfile>.npy, the root only writes the header and a .json of metadata
+# mpirun -c 12 python runpyCGM_MPI_Frames.py -o MPIFramesOutput -i Sample_ROM.c3d -v Sample_SM.vsk -x Sample_Static.c3d --npy
+# With --chunksize the root hands out chunks of that many frames to the ranks
+# as they finish their last one, so slow ranks or slow frames do not hold up
+# the others. The root calculates chunks too while no rank is waiting for one,
+# unless --rootshare=0. A table of the chunks, frames and time calculating of
+# every rank is added to the stats file
+# mpirun -c 12 python runpyCGM_MPI_Frames.py -o MPIFramesOutput -i Sample_ROM.c3d -v Sample_SM.vsk -x Sample_Static.c3d --chunksize=50
 
 import time
 import numpy as np
 import sys
 import getopt
+import os
 import pycgmIO 
 import pycgmCalc
 import pycgmStatic
@@ -18,9 +41,16 @@ def mainMPI(argv):
     testtime =  time.strftime("%d_%H_%M_%S",time.gmtime())
     runfolder = str(testtime)+'/'
     pycgmIO.make_sure_path_exists(runfolder)
+    rootshare = 1.0
+    overlap = False
+    parallelread = False
+    manifest = None
+    npy = False
+    chunksize = None
+    report = None
     
     try:
-	opts, args = getopt.getopt(argv,"h:i:o:s:e:c:f:p:v:x:r",["ifile=","ofile=","start=","end=","calctype=","singleframe=","nprocs=","vskfile=","staticinput=","rank="])
+	opts, args = getopt.getopt(argv,"h:i:o:s:e:c:f:p:v:x:r",["ifile=","ofile=","start=","end=","calctype=","singleframe=","nprocs=","vskfile=","staticinput=","rank=","rootshare=","overlap","parallelread","manifest=","npy","chunksize="])
     except getopt.GetoptError:
 	print 'pyCGM.py -i <motionFile> -o <outputfile> -s <start> -e <end> -c <calctype> -sf <singleframe>'
 	sys.exit(2)
@@ -28,6 +58,13 @@ def mainMPI(argv):
     for opt, arg in opts:
 	if opt == '-h':
 		print 'pyCGM.py -i <motionFile> -o <outputfile> -s <start> -e <end> -c <calctype> -sf <singleframe> -p <procs>'
+		print '  --rootshare=<share>  frames of the root relative to the other ranks'
+		print '  --overlap            receive the rows of the other ranks while the root calculates,'
+		print '                       the csv is written once all rows have arrived'
+		print '  --parallelread       every rank reads its own frames of the c3d file'
+		print '  --npy                every rank writes its rows into <outputfile>.npy as it finishes'
+		print '  --chunksize=<frames> hand out chunks of frames to the ranks as they finish'
+		print '  --manifest=<csv>     calculate every trial of a manifest'
 		sys.exit()
 	elif opt in ("-i", "--ifile"):
 		inputfile = arg
@@ -49,35 +86,58 @@ def mainMPI(argv):
 		staticfile = arg
 	elif opt in ("-r","--rank"):
 		rank = arg
+	elif opt == "--rootshare":
+		rootshare = float(arg)
+	elif opt == "--overlap":
+		overlap = True
+	elif opt == "--parallelread":
+		parallelread = True
+	elif opt == "--manifest":
+		manifest = arg
+	elif opt == "--npy":
+		npy = True
+	elif opt == "--chunksize":
+		chunksize = int(arg)
 
     #Get this processes rank and the size of the mpi rank call
     comm = MPI.COMM_WORLD
     rank = comm.Get_rank()
     rank_size = comm.Get_size()
+    #Every rank writes to the folder of the root
+    runfolder = comm.bcast(runfolder, root=0)
+    
+    if manifest != None:
+        mainBatch(comm,manifest,runfolder)
+        return
     
     #Set the variable motiondata to none at start for all ranks
     motiondata = None
     vsk = None
     static = None
     motiondata_lab = None
+    motiondata_val = None
+    shape = None
+    result = None
+    #File to use in calculation
+    filename = './'+inputfile
     if rank == 0:
-        #File to use in calculation
         start = 0
         flat_foot = False
-        filename = './'+inputfile
 
         #Time setup
         totalTime=time.time()
         loadDataTime=time.time()
 
-        #Load motion data from file
-        motionData  = pycgmIO.loadData(filename) 
+        #Load motion data from file, with parallelread each rank loads its
+        # own frames later
+        if not parallelread:
+            motionData  = pycgmIO.loadData(filename) 
 
-        loadDataTime=time.time()-loadDataTime
+            loadDataTime=time.time()-loadDataTime
         
-        if len(motionData) == 0:
-            print "No Data Loaded"
-            sys.exit()
+            if len(motionData) == 0:
+                print "No Data Loaded"
+                sys.exit()
             
         #Load VSK File and parse into dict
         if inputvsk != None:
@@ -98,54 +158,120 @@ def mainMPI(argv):
             vsk = pycgmStatic.getStatic(staticData,vsk,flat_foot)
             calculateStaticTime=time.time()-calculateStaticTime
 
-        #Split the motion data to labels and values to send faster with MPI
-        # then combine again in each process
-        motiondata_val,motiondata_lab = pycgmIO.splitDataDict(motionData)
+        if not parallelread:
+            #Split the motion data to labels and one float64 array of values so
+            # it can be sent as a buffer with MPI instead of being pickled
+            motiondata_val,motiondata_lab = pycgmIO.splitDataArray(motionData)
+            shape = motiondata_val.shape
 		
     #Start timing the calculation time
     calculateAnglesTime=time.time()
 
-    if rank == 0:
-        #Split the data evenly for the processes  
-        motionData_val_scatter = []
-        motionData_val_scatter.append([None])
-        l=len(motiondata_val)/(rank_size-1)
-        for i in range(rank_size-1):
-            start=i*l
-            end=(i+1)*l
-            if i == rank_size-2:
-                end = len(motiondata_val)
-            #Append each dataset as an array of the data, vsk info, and static
-            motionData_val_scatter.append(motiondata_val[start:end])
-            
-        #Set the master rank single_result value to None so there is a variable
-        # for it to read when gathering
-        single_result = None
-    else:
-        motionData_val_scatter = []
-        single_result = None
-        
-    motionData = comm.scatter(motionData_val_scatter, root=0)
+    #Only the small objects are pickled, the frames are sent as buffers
     vsk = comm.bcast(vsk, root=0)
     static = comm.bcast(static, root=0)
-    motiondata_lab = comm.bcast(motiondata_lab,root=0)
- 
-    if rank !=0:     
-        #combine the values and labels back into a dict
-        motionData = pycgmIO.combineDataDict(motionData,motiondata_lab)
-        single_result=pycgmCalc.calcFramesMPI(motionData,vsk)
-
-    result_total = comm.gather(single_result,root=0)
-        
-    if rank == 0:
-        results = np.asarray(result_total)[1:]
+    
+    if chunksize != None:
+        #The frames are handed out in chunks to the ranks as they finish
+        # their last one, instead of one fixed slice per rank
+        if parallelread:
+            #Every rank reads the frames of its chunks from the file
+            first,last = pycgmIO.c3dFrameRange(filename)
+            shape = (last-first+1,)
+            readChunk = lambda start,count: pycgmIO.loadC3DArray(filename,first+start,first+start+count-1)
+            if rank == 0:
+                loadDataTime = 0.0
+        else:
+            shape = comm.bcast(shape, root=0)
+            motiondata_lab = comm.bcast(motiondata_lab,root=0)
+            readChunk = None
+        writeRows = None
+        if npy:
+            #Every rank writes the rows of its chunks into the result file
+            resultfile = runfolder+outputfile+'.npy'
+            offset = None
+            if rank == 0:
+                offset = pycgmIO.createResultFile(resultfile,shape[0],pycgmCalc.RESULTSIZE,
+                                                  metadata={'source':filename,'ranks':rank_size,'chunksize':chunksize})
+            offset = comm.bcast(offset, root=0)
+            writeRows = lambda rows,start: pycgmIO.writeResultRows(resultfile,offset,rows,start)
+        elif rank == 0:
+            result = np.empty((shape[0],pycgmCalc.RESULTSIZE),dtype=np.float64)
+        chunkTime = time.time()
+        stats = calcChunksMPI(comm,vsk,shape,chunksize,motiondata_lab,motiondata_val,
+                              readChunk,result,writeRows,rootshare)
+        workers = comm.gather(stats,root=0)
+        if rank == 0:
+            report = pycgmCalc.workerReport(workers,time.time()-chunkTime)
+    else:
+        if parallelread:
+            #Every rank reads the header, works out its frames and reads only
+            # those from the file
+            first,last = pycgmIO.c3dFrameRange(filename)
+            counts,displs = pycgmCalc.splitFrames(last-first+1,rank_size,rootshare)
+            if rank == 0:
+                loadDataTime=time.time()
+            motionData,motiondata_lab = pycgmIO.loadC3DArray(filename,first+displs[rank],first+displs[rank]+counts[rank]-1)
+            shape = (last-first+1,)+motionData.shape[1:]
+            if rank == 0:
+                loadDataTime=time.time()-loadDataTime
+                result = np.empty((shape[0],pycgmCalc.RESULTSIZE),dtype=np.float64)
+                recvbuf = [result,(counts*pycgmCalc.RESULTSIZE).tolist(),(displs*pycgmCalc.RESULTSIZE).tolist(),MPI.DOUBLE]
+            else:
+                recvbuf = None
+        else:
+            shape = comm.bcast(shape, root=0)
+            motiondata_lab = comm.bcast(motiondata_lab,root=0)
+
+            #Frames of every rank, and the offset of its first frame
+            counts,displs = pycgmCalc.splitFrames(shape[0],rank_size,rootshare)
+            rowsize = shape[1]*shape[2]
         
-        #Put all angles in a list instead of separate arrays
-        angles = []
-        for i in results:
-            angles=angles+i
-        result = angles
+            if rank == 0:
+                sendbuf = [motiondata_val,(counts*rowsize).tolist(),(displs*rowsize).tolist(),MPI.DOUBLE]
+                #The gathered rows are written straight into the result array
+                result = np.empty((shape[0],pycgmCalc.RESULTSIZE),dtype=np.float64)
+                recvbuf = [result,(counts*pycgmCalc.RESULTSIZE).tolist(),(displs*pycgmCalc.RESULTSIZE).tolist(),MPI.DOUBLE]
+            else:
+                sendbuf = None
+                recvbuf = None
+            
+            motionData = np.empty((counts[rank],shape[1],shape[2]),dtype=np.float64)
+            comm.Scatterv(sendbuf,[motionData,MPI.DOUBLE],root=0)
+    
+        if npy:
+            #Every rank writes its own rows into the result file, the root only
+            # writes the header
+            resultfile = runfolder+outputfile+'.npy'
+            offset = None
+            if rank == 0:
+                offset = pycgmIO.createResultFile(resultfile,shape[0],pycgmCalc.RESULTSIZE,
+                                                  metadata={'source':filename,'ranks':rank_size})
+            offset = comm.bcast(offset, root=0)
+            single_result = pycgmCalc.calcFramesArray(motionData,motiondata_lab,vsk)
+            pycgmIO.writeResultRows(resultfile,offset,single_result,displs[rank])
+            comm.Barrier()
+        elif overlap:
+            #The root posts a receive for the rows of every other rank, then
+            # calculates its own rows in place while those arrive
+            if rank == 0:
+                requests = []
+                for i in range(1,rank_size):
+                    if counts[i] > 0:
+                        rows = result[displs[i]:displs[i]+counts[i]]
+                        requests.append(comm.Irecv([rows,MPI.DOUBLE],source=i,tag=i))
+                pycgmCalc.calcFramesArray(motionData,motiondata_lab,vsk,result[:counts[0]])
+                MPI.Request.Waitall(requests)
+            elif counts[rank] > 0:
+                single_result = pycgmCalc.calcFramesArray(motionData,motiondata_lab,vsk)
+                comm.Send([single_result,MPI.DOUBLE],dest=0,tag=rank)
+        else:
+            single_result = np.empty((counts[rank],pycgmCalc.RESULTSIZE),dtype=np.float64)
+            pycgmCalc.calcFramesArray(motionData,motiondata_lab,vsk,single_result)
+
+            comm.Gatherv([single_result,MPI.DOUBLE],recvbuf,root=0)
         
+    if rank == 0:
         #Check the time
         calculateAnglesTime=time.time()-calculateAnglesTime
         savaDataTime=time.time()
@@ -153,7 +279,8 @@ def mainMPI(argv):
         angles=['R Hip','L Hip','R Knee','L Knee','R Ankle','L Ankle']
         axis =["PELO","PELX","PELY","PELZ","HIPO","HIPX","HIPY","HIPZ","R KNEO","R KNEX","R KNEY","R KNEZ","L KNEO","L KNEX","L KNEY","L KNEZ","R ANKO","R ANKX","R ANKY","R ANKZ","L ANKO","L ANKX","L ANKY","L ANKZ","R FOOO","R FOOX","R FOOY","R FOOZ","L FOOO","L FOOX","L FOOY","L FOOZ"]
 
-        pycgmIO.writeResult(result,runfolder+outputfile,axis=axis,angles=angles)
+        if not npy:
+            pycgmIO.writeResult(result,runfolder+outputfile,axis=axis,angles=angles)
         savaDataTime=time.time()-savaDataTime
 
         totalTimes=time.time()-totalTime
@@ -169,8 +296,204 @@ def mainMPI(argv):
             f.write( "\tTime to calculate static    = %.10fs\t%0.4f%%"%(calculateStaticTime,(calculateStaticTime)/totalTime)+'\n')
             f.write( "\tTime to calculate angles    = %.10fs\t%0.4f%%"%(calculateAnglesTime,(calculateAnglesTime)/totalTime)+'\n')
             f.write( "Total time to save output      \t= %.10fs\t%0.4f%%"%(savaDataTime,(savaDataTime)/totalTime)+'\n')
+            if report != None:
+                f.write( "rank  chunks  frames  busy(s)  utilisation"+'\n')
+                for r in report:
+                    f.write( "%4d  %6d  %6d  %7.3f  %10.1f%%"%(r['worker'],r['chunks'],r['frames'],r['busy'],r['utilisation']*100)+'\n')
             
         sys.exit()
 
+#Tags of the messages of the chunked frame calculation
+READY_TAG = 1
+ROWS_TAG = 2
+TASK_TAG = 3
+DATA_TAG = 4
+
+def calcChunksMPI(comm,vsk,shape,chunksize,labels=None,values=None,readChunk=None,
+                  result=None,writeRows=None,rootshare=1.0):
+    """
+    Calculates the frames of a trial in chunks that rank 0 hands out to the
+    other ranks as they finish their last chunk. Each worker says it is
+    ready with the chunk it finished, sends its rows unless it writes them
+    itself, and gets the next chunk or None when there are none left. The
+    root calculates chunks itself while no worker is waiting
+    @param shape Shape of the whole trial, frames first
+    @param chunksize Frames in each chunk
+    @param labels Marker names of the values
+    @param values (frames,markers,3) float64 array of the trial on rank 0,
+            whose chunks are sent to the workers with their task
+    @param readChunk Function of (first,count) returning the values and
+            labels of a chunk, when every rank reads its own chunks instead
+    @param result (frames,RESULTSIZE) array on rank 0 the rows go into
+    @param writeRows Function of (rows,first) every rank writes the rows of
+            its chunks with instead of sending them to rank 0
+    @param rootshare 0 keeps rank 0 to handing out the chunks
+    @return (rank, chunks, frames, busy seconds) of this rank for
+            pycgmCalc.workerReport
+    """
+    rank = comm.Get_rank()
+    rank_size = comm.Get_size()
+    chunks = 0
+    frames = 0
+    busy = 0.0
+    
+    if rank == 0:
+        tasks = pycgmCalc.splitChunks(shape[0],chunksize)
+        status = MPI.Status()
+        active = rank_size-1
+        while active > 0 or (len(tasks) > 0 and (rootshare > 0 or rank_size == 1)):
+            if active > 0 and (len(tasks) == 0 or (rootshare <= 0 and rank_size > 1)
+                               or comm.Iprobe(source=MPI.ANY_SOURCE,tag=READY_TAG)):
+                done = comm.recv(source=MPI.ANY_SOURCE,tag=READY_TAG,status=status)
+                source = status.Get_source()
+                if done != None and writeRows == None:
+                    comm.Recv([result[done[0]:done[0]+done[1]],MPI.DOUBLE],source=source,tag=ROWS_TAG)
+                if len(tasks) > 0:
+                    task = tasks.pop(0)
+                    comm.send(task,dest=source,tag=TASK_TAG)
+                    if readChunk == None:
+                        comm.Send([values[task[0]:task[0]+task[1]],MPI.DOUBLE],dest=source,tag=DATA_TAG)
+                else:
+                    comm.send(None,dest=source,tag=TASK_TAG)
+                    active -= 1
+            else:
+                first,count = tasks.pop(0)
+                if readChunk == None:
+                    chunk,chunklabels = values[first:first+count],labels
+                else:
+                    chunk,chunklabels = readChunk(first,count)
+                chunkTime = time.time()
+                if writeRows == None:
+                    pycgmCalc.calcFramesArray(chunk,chunklabels,vsk,result[first:first+count])
+                else:
+                    writeRows(pycgmCalc.calcFramesArray(chunk,chunklabels,vsk),first)
+                busy += time.time()-chunkTime
+                chunks += 1
+                frames += count
+    else:
+        done = None
+        rows = None
+        while True:
+            comm.send(done,dest=0,tag=READY_TAG)
+            if done != None and writeRows == None:
+                comm.Send([rows,MPI.DOUBLE],dest=0,tag=ROWS_TAG)
+            task = comm.recv(source=0,tag=TASK_TAG)
+            if task == None:
+                break
+            first,count = task
+            if readChunk == None:
+                chunk = np.empty((count,shape[1],shape[2]),dtype=np.float64)
+                comm.Recv([chunk,MPI.DOUBLE],source=0,tag=DATA_TAG)
+                chunklabels = labels
+            else:
+                chunk,chunklabels = readChunk(first,count)
+            chunkTime = time.time()
+            rows = pycgmCalc.calcFramesArray(chunk,chunklabels,vsk)
+            if writeRows != None:
+                writeRows(rows,first)
+            busy += time.time()-chunkTime
+            chunks += 1
+            frames += count
+            done = task
+    return (rank,chunks,frames,busy)
+
+def trialLength(task):
+    """
+    Estimates how long a trial takes from the size of its dynamic file, so
+    the longest trials can be handed out first
+    """
+    try:
+        return os.path.getsize(task[0])
+    except OSError:
+        return 0
+
+def runTrial(task,runfolder,rank=0,flat_foot=False):
+    """
+    Calculates one trial of a batch run and writes its result
+    @param task (dynamic,static,vsk,output) tuple from the manifest
+    @param runfolder Folder the output is written to
+    @return Dictionary with the timings and status of the trial, with the
+            keys of pycgmIO.reportFields
+    """
+    dynamic,staticfile,inputvsk,outputfile = task
+    report = {'dynamic':dynamic,'static':staticfile,'vsk':inputvsk,
+              'output':outputfile,'rank':rank,'status':'ok','frames':0,
+              'load':0.0,'static_calc':0.0,'angles_calc':0.0,'save':0.0,
+              'total':0.0,'error':''}
+    totalTime=time.time()
+    try:
+        loadTime=time.time()
+        motionData = pycgmIO.loadData(dynamic)
+        if len(motionData) == 0:
+            raise Exception("No Data Loaded")
+        vskdata = pycgmIO.loadVSK(inputvsk)
+        if vskdata==None:
+            raise Exception("VSK Not Loaded")
+        vsk = pycgmIO.createVskDataDict(vskdata[0],vskdata[1])
+        staticData = pycgmIO.loadData(staticfile)
+        report['load']=time.time()-loadTime
+        
+        staticTime=time.time()
+        vsk = pycgmStatic.getStatic(staticData,vsk,flat_foot)
+        report['static_calc']=time.time()-staticTime
+        
+        anglesTime=time.time()
+        values,labels = pycgmIO.splitDataArray(motionData)
+        result = pycgmCalc.calcFramesArray(values,labels,vsk)
+        report['frames']=len(result)
+        report['angles_calc']=time.time()-anglesTime
+        
+        saveTime=time.time()
+        pycgmIO.writeResult(result,runfolder+outputfile,start=0)
+        report['save']=time.time()-saveTime
+    except Exception as e:
+        report['status']='failed'
+        #Keep the report a valid csv line
+        report['error']=str(e).replace(',',';').replace('\n',' ')
+    report['total']=time.time()-totalTime
+    return report
+
+def mainBatch(comm,manifest,runfolder):
+    """
+    Runs every trial of a manifest as a task farm. Rank 0 hands out the
+    trials, longest first, to the other ranks as they ask for work and
+    writes the batch report once all of them are done. With a single rank
+    the root calculates the trials itself
+    """
+    rank = comm.Get_rank()
+    rank_size = comm.Get_size()
+    
+    if rank == 0:
+        batchTime=time.time()
+        tasks = sorted(pycgmIO.loadManifest(manifest),key=trialLength,reverse=True)
+        reports = []
+        if rank_size == 1:
+            for task in tasks:
+                reports.append(runTrial(task,runfolder))
+        else:
+            #Each message from a worker is the report of its last trial, or
+            # None the first time, and asks for the next one
+            status = MPI.Status()
+            active = rank_size-1
+            while active > 0:
+                report = comm.recv(source=MPI.ANY_SOURCE,status=status)
+                if report != None:
+                    reports.append(report)
+                if len(tasks) > 0:
+                    comm.send(tasks.pop(0),dest=status.Get_source())
+                else:
+                    comm.send(None,dest=status.Get_source())
+                    active -= 1
+        pycgmIO.writeBatchReport(reports,runfolder+'Batch_Report.csv')
+        print "%d trials in %.10fs"%(len(reports),time.time()-batchTime)
+    else:
+        report = None
+        while True:
+            comm.send(report,dest=0)
+            task = comm.recv(source=0)
+            if task == None:
+                break
+            report = runTrial(task,runfolder,rank)
+
 if __name__ == '__main__':
 	mainMPI(sys.argv[1:])
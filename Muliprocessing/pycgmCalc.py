@@ -6,6 +6,9 @@ Created on Tue Jul 28 17:16:44 2015
 """
 
 from pyCGM import *
+from multiprocessing.sharedctypes import RawArray
+import time
+import Queue
 
 #Used to split the arrays with angles and axis
 #Start Joint Angles
@@ -17,6 +20,9 @@ SA=EJA
 #End Axis
 EA=SA+72*3
 
+#Number of frames the workers take from the queue at a time
+CHUNKSIZE=100
+
 def calcAngles(data,**kargs):
 	"""
 	Calculates the joint angles and axis
@@ -33,11 +39,20 @@ def calcAngles(data,**kargs):
 		axis    If true it will return the axis
 		splitAnglesAxis     If true the function will return angles and axis as separete arrays. For false it will be the same array
 		multiprocessing     If true it will use multiprocessing
+		pool    CGMPool to calculate with, its workers are reused between calls
+		chunksize   Number of frames a process takes at a time, CHUNKSIZE by default
+		report  List that the utilisation of each process is appended to, see workerReport
 
 	By default the function will calculate all the data using single processing and return angles and axis as separete arrays
 	"""
+	#Number of frames in the trial, data is either a vector of dictionaries or
+	#labels and raw data
+	if type(data[0])==type({}):
+		length=len(data)
+	else:
+		length=len(data[1])
 	start=0
-	end=len(data)
+	end=length
 	cores=None
 	vsk=None
 	returnangles=True
@@ -45,6 +60,9 @@ def calcAngles(data,**kargs):
 	multiprocessing=True
 	splitAnglesAxis=True
 	formatData=True
+	pool=None
+	chunksize=CHUNKSIZE
+	report=None
 
 	if kargs.has_key('start') and kargs['start']!=None:
 		start=kargs['start']
@@ -54,7 +72,7 @@ def calcAngles(data,**kargs):
 		end=kargs['end']
 		if start>end:
 			raise Exception("Start can not be larger than end")
-		if end>len(data):
+		if end>length:
 			raise Exception("Range cannot be larger than data length")
 	if kargs.has_key('frame'):
 		start=kargs['frame']
@@ -78,9 +96,19 @@ def calcAngles(data,**kargs):
 		splitAnglesAxis=kargs['splitAnglesAxis']
 	if kargs.has_key('formatData'):
 		formatData=kargs['formatData']
+	if kargs.has_key('pool'):
+		pool=kargs['pool']
+	if kargs.has_key('chunksize') and kargs['chunksize']!=None:
+		chunksize=kargs['chunksize']
+		if chunksize<1:
+			raise Exception("Chunk size must be positive")
+	if kargs.has_key('report'):
+		report=kargs['report']
 
 	r=None
-	if multiprocessing==False and cores==None:
+	if pool!=None:
+		r=pool.calc(start,end,data,vsk,chunksize=chunksize,report=report)
+	elif multiprocessing==False and cores==None:
 		r=singleCalc(start,end,data,vsk)
 	else:
 		#NEED TO FIX HERE BECAUSE FOR MULTIPROCESSING THE VSK MUST TO EXIST
@@ -89,7 +117,7 @@ def calcAngles(data,**kargs):
 		if type(vsk)==type({}):
 			vsk=splitVskDataDict(vsk)
 		print 'multi: ',cores   
-		r=multiCalc(start,end,data,cores,vsk)
+		r=multiCalc(start,end,data,cores,vsk,chunksize,report)
 
 	if formatData==True:
 		r=np.transpose(r)
@@ -117,61 +145,330 @@ def calcAngles(data,**kargs):
 		return r
 
 
-def multiCalc(start,end,data,nprocs,vsk):
-
+def multiCalc(start,end,data,nprocs,vsk,chunksize=CHUNKSIZE,report=None):
+	"""
+	Calculates the frames start to end with nprocs processes
+	The frames are split in chunks of chunksize frames. The processes take the
+	next chunk from a shared counter whenever they are free, so a slow process or
+	slow frames do not hold up the others.
+	@param  report  List that the utilisation of each process is appended to,
+	see workerReport
+	@return (frames, 273) array with the angles and axis of each frame
+	"""
 	if nprocs == None:
 		nprocs = multiprocessing.cpu_count()-1
 
-	results = multiprocessing.Queue()
-	labels=data[0]
-	motiondata=data[1]
-	l=len(motiondata)/nprocs
+	#The marker data goes in shared memory once, each process reads its
+	#frames from there without copying
+	header=writeToShared(data)
+	#Each process writes its rows of the result straight into shared memory
+	output=RawArray('d',(end-start)*EA)
+	angles=np.frombuffer(output,dtype=np.float64).reshape((end-start,EA))
+	angles[:]=np.nan
+	#Next frame to calculate, relative to start
+	counter=multiprocessing.Value('l',0)
+	stats=multiprocessing.Queue()
+	wall=time.time()
 	procs=[]
-	headers=[]
 	for i in range(nprocs):
-		start=i*l
-		end=(i+1)*l
-		if i==nprocs-1:
-			end=len(motiondata)
-		#Do this temporarily, then remove static totally
-		static=0
-		header=writeToMem((labels,motiondata[start:end]),static,vsk,i)
-		headers.append(header)
-		ptemp=multiprocessing.Process(target=calcFramesMulti, args=(header,results,i))
+		ptemp=multiprocessing.Process(target=calcFramesMulti, args=(header,start,end,vsk,output,counter,chunksize,stats,i))
 		ptemp.daemon=True
 		ptemp.start()
 		procs.append(ptemp)
 
-	results=[results.get() for i in range(nprocs)]
-	results=sorted(results, key=lambda r: r[0])
-	results=[r[1] for r in results]
-
+	#Every process puts (error, stats) when it ends, a process that is killed
+	#before it can is found from its exit code
+	results=[]
+	while len(results)<len(procs):
+		try:
+			results.append(stats.get(True,1))
+		except Queue.Empty:
+			for ptemp in procs:
+				if ptemp.exitcode not in (None,0):
+					raise Exception("Calculation process failed with exit code "+str(ptemp.exitcode))
+	errors=[error for error,worker in results if error!=None]
+	if len(errors)>0:
+		raise Exception("Calculation process failed: "+errors[0])
+	workers=[worker for error,worker in results]
 	for ptemp in procs:
 		ptemp.join() 
-	angles = []
-	for i in results:
-		angles=angles+i
+		if ptemp.exitcode!=0:
+			raise Exception("Calculation process failed with exit code "+str(ptemp.exitcode))
+	if report!=None:
+		report.extend(workerReport(workers,time.time()-wall))
 
-	for header in headers:
-		try:
-			os.remove(header[0]['filename'])
-		except Exception, e:
-			pass
 	return angles
 
-def calcFramesMulti(header,result,index):
-	data,vsk=readFromMem(header)
-	angles=[]
+def calcFramesMulti(header,start,end,vsk,output,counter,chunksize,stats,index):
+	#The parent waits for one (error, stats) from every process, so it is put
+	#even when the calculation fails
+	error="Calculation process "+str(index)+" stopped early"
+	worker=None
+	try:
+		labels,motiondata=readFromShared(header,start,end)
+		if type(vsk)!=type({}):
+			vsk=createVskDataDict(vsk[0],vsk[1])
+		angles=np.frombuffer(output,dtype=np.float64).reshape((-1,EA))
 
-	for frame in data:
-		angle = JointAngleCalc(frame,vsk)
-		angles.append(angle)
-	result.put([index,angles])
-	sys.exit()
+		chunks,frames,busy=calcChunks(labels,motiondata,angles,vsk,counter,chunksize)
+		worker=(index,chunks,frames,busy)
+		error=None
+	except Exception, e:
+		error=str(e)
+	finally:
+		stats.put((error,worker))
+	#Returning ends the process with exit code 0, sys.exit() without an
+	#argument gives exit code 1 in a python 2 process
+
+def calcChunks(labels,motiondata,angles,vsk,counter,chunksize):
+	"""
+	Calculates chunks of frames until there are none left
+	Each chunk is taken from the shared counter when the process is free, so
+	faster processes end up calculating more chunks.
+	@param  motiondata  Raw data of the frames to calculate
+	@param  angles   Array the angles and axis of each frame are written to
+	@param  counter  Shared multiprocessing.Value with the next frame to calculate
+	@return Number of chunks and frames calculated, and seconds spent on them
+	"""
+	chunks=0
+	frames=0
+	busy=0.0
+	total=len(motiondata)
+	while True:
+		with counter.get_lock():
+			first=counter.value
+			counter.value=first+chunksize
+		if first>=total:
+			break
+		last=min(first+chunksize,total)
+		t=time.time()
+		for i,frame in enumerate(createMotionDataDict(labels,motiondata[first:last])):
+			angles[first+i]=JointAngleCalc(frame,vsk)
+		busy+=time.time()-t
+		chunks+=1
+		frames+=last-first
+	return chunks,frames,busy
+
+def workerReport(workers,wall):
+	"""
+	Makes the utilisation report of the processes of a calculation
+	@param  workers  (index, chunks, frames, busy seconds) of each process
+	@param  wall     Seconds the whole calculation took
+	@return List with a dictionary for each process, with the keys worker,
+	chunks, frames, busy and utilisation, the part of the wall time the process
+	spent calculating
+	"""
+	report=[]
+	for index,chunks,frames,busy in sorted(workers):
+		utilisation=busy/wall if wall>0 else 0.0
+		report.append({'worker':index,'chunks':chunks,'frames':frames,
+			'busy':busy,'utilisation':utilisation})
+	return report
+
+def printReport(report):
+	"""
+	Prints a report from workerReport as a table
+	"""
+	print 'worker  chunks  frames  busy(s)  utilisation'
+	for r in report:
+		print '%6d  %6d  %6d  %7.3f  %10.1f%%' % (r['worker'],r['chunks'],r['frames'],r['busy'],r['utilisation']*100)
+
+class CGMPool(object):
+	"""
+	Pool of worker processes that stay alive between calculations
+	The workers are started once and calculate trial after trial, so the cost of
+	starting the processes and importing pyCGM is paid once. Subject measurements
+	are sent to the workers once and cached there by id. The marker data and the
+	results go through blocks of shared memory owned by the pool, which grow when
+	a trial does not fit.
+
+	Use it as a context manager, or call close when done:
+		with CGMPool(4) as pool:
+			for trial in trials:
+				r=calcAngles(trial,vsk=vsk,pool=pool,splitAnglesAxis=False,formatData=False)
+
+	@param  nprocs   Number of worker processes, the number of cores less one by default
+	@param  frames   Number of frames that fit in the shared blocks at first
+	@param  markers  Number of markers that fit in the shared blocks at first
+	"""
+	def __init__(self,nprocs=None,frames=10000,markers=200):
+		if nprocs==None:
+			nprocs=max(multiprocessing.cpu_count()-1,1)
+		if nprocs<1:
+			raise Exception("Number of cores must be positive")
+		self.nprocs=nprocs
+		#vsk labels and data by subject id, kept to resend them if the
+		#workers are restarted
+		self.subjects={}
+		#vsk cached by id(vsk), kept so that their ids are not reused
+		self.vsks={}
+		#utilisation of each worker in the last calculation
+		self.report=[]
+		self.procs=[]
+		self._start(frames*markers*3,frames*EA)
+
+	def _start(self,inputSize,outputSize):
+		self.inputSize=inputSize
+		self.outputSize=outputSize
+		self.input=RawArray('d',inputSize)
+		self.output=RawArray('d',outputSize)
+		#Next frame to calculate in the current trial
+		self.counter=multiprocessing.Value('l',0)
+		self.done=multiprocessing.Queue()
+		self.inboxes=[]
+		self.procs=[]
+		for i in range(self.nprocs):
+			inbox=multiprocessing.Queue()
+			ptemp=multiprocessing.Process(target=poolWorker, args=(inbox,self.done,self.input,self.output,self.counter,i))
+			ptemp.daemon=True
+			ptemp.start()
+			self.inboxes.append(inbox)
+			self.procs.append(ptemp)
+		for subject,vsk in self.subjects.items():
+			for inbox in self.inboxes:
+				inbox.put(('subject',subject,vsk))
+
+	def _stop(self,terminate=False):
+		#workers that are still on a trial do not read the stop message until
+		#they are done, they are terminated when the trial is given up
+		for inbox in self.inboxes:
+			inbox.put(('stop',))
+		for ptemp in self.procs:
+			if terminate==True:
+				ptemp.terminate()
+			ptemp.join()
+		self.procs=[]
+		self.inboxes=[]
+
+	def _restart(self):
+		#the queues may be left locked by a worker that died, so they are
+		#made again with the workers
+		self._stop(True)
+		self._start(self.inputSize,self.outputSize)
+
+	def _failed(self):
+		#exit code of the first worker that is not running, None if all are
+		for ptemp in self.procs:
+			if not ptemp.is_alive():
+				return ptemp.exitcode
+		return None
+
+	def addSubject(self,vsk,subject=None):
+		"""
+		Sends the subject measurements to the workers, once for each subject
+		@param  vsk      Vsk file as a dictionary or label and data
+		@param  subject  Id to cache the subject by, id(vsk) by default. A vsk
+		cached by id(vsk) is kept by the pool so that its id is not reused
+		@return The subject id
+		"""
+		if subject==None:
+			subject=id(vsk)
+		if subject not in self.subjects:
+			self.vsks[subject]=vsk
+			if type(vsk)==type({}):
+				vsk=splitVskDataDict(vsk)
+			self.subjects[subject]=(list(vsk[0]),list(vsk[1]))
+			for inbox in self.inboxes:
+				inbox.put(('subject',subject,self.subjects[subject]))
+		return subject
+
+	def calc(self,start,end,data,vsk,subject=None,chunksize=CHUNKSIZE,report=None):
+		"""
+		Calculates the frames start to end of a trial with the workers of the pool
+		The workers take chunks of chunksize frames whenever they are free. The
+		utilisation of each worker is kept in the report attribute.
+		@param  data     Labels and raw data like the data from loadData function,
+		or a vector of dictionaries
+		@param  vsk      Vsk file as a dictionary or label and data
+		@param  subject  Id the subject is cached by, see addSubject
+		@param  report   List that the utilisation of each worker is appended to
+		@return (frames, 273) array with the angles and axis of each frame
+		"""
+		if len(self.procs)==0:
+			raise Exception("The pool is closed")
+		#a worker that died since the last trial would never take its task
+		if self._failed()!=None:
+			self._restart()
+		subject=self.addSubject(vsk,subject)
+		if type(data[0])==type({}):
+			data=splitMotionDataDict(data)
+		labels=[str(label) for label in data[0]]
+		motiondata=np.asarray(data[1],dtype=np.float64)[start:end]
+		frames=len(motiondata)
+		#grow the shared blocks, the workers have to be restarted to get them
+		if motiondata.size>self.inputSize or frames*EA>self.outputSize:
+			self._stop()
+			self._start(max(motiondata.size,self.inputSize),max(frames*EA,self.outputSize))
+		np.frombuffer(self.input,dtype=np.float64)[:motiondata.size]=motiondata.ravel()
+
+		np.frombuffer(self.output,dtype=np.float64)[:frames*EA]=np.nan
+		self.counter.value=0
+		wall=time.time()
+		for inbox in self.inboxes:
+			inbox.put(('calc',subject,labels,motiondata.shape,chunksize))
+		#Every worker puts (error, stats) when it is done with the trial, a
+		#worker that is killed before it can is found from its exit code and the
+		#pool is started again for the next trial
+		results=[]
+		while len(results)<len(self.procs):
+			try:
+				results.append(self.done.get(True,1))
+			except Queue.Empty:
+				exitcode=self._failed()
+				if exitcode!=None:
+					self._restart()
+					raise Exception("Pool process failed with exit code "+str(exitcode))
+		errors=[error for error,stats in results if error!=None]
+		if len(errors)>0:
+			raise Exception("Calculation process failed: "+errors[0])
+		self.report=workerReport([stats for error,stats in results],time.time()-wall)
+		if report!=None:
+			report.extend(self.report)
+		angles=np.frombuffer(self.output,dtype=np.float64)[:frames*EA].reshape((frames,EA))
+		#the block is reused by the next trial
+		return angles.copy()
+
+	def close(self):
+		"""
+		Stops the worker processes
+		"""
+		if len(self.procs)>0:
+			self._stop()
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self,exc_type,exc_value,traceback):
+		self.close()
+
+def poolWorker(inbox,done,inputBlock,outputBlock,counter,index):
+	"""
+	Loop of a CGMPool worker, it runs until it gets a stop message
+	"""
+	subjects={}
+	while True:
+		task=inbox.get()
+		if task[0]=='stop':
+			break
+		if task[0]=='subject':
+			subjects[task[1]]=createVskDataDict(task[2][0],task[2][1])
+			continue
+		subject,labels,shape,chunksize=task[1:]
+		size=shape[0]*shape[1]*shape[2]
+		motiondata=np.frombuffer(inputBlock,dtype=np.float64)[:size].reshape(shape)
+		angles=np.frombuffer(outputBlock,dtype=np.float64)[:shape[0]*EA].reshape((shape[0],EA))
+		try:
+			chunks,frames,busy=calcChunks(labels,motiondata,angles,subjects[subject],counter,chunksize)
+			done.put((None,(index,chunks,frames,busy)))
+		except Exception, e:
+			done.put((str(e),None))
 
 def singleCalc(start,end,data,vsk):
 
-	d=data[start:end]
+	if type(data[0])==type({}):
+		d=data[start:end]
+	else:
+		d=[data[0],data[1][start:end]]
 	angles=calcFramesSing(d,vsk)
 	return angles
 
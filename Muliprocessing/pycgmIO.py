@@ -11,6 +11,7 @@ import mmap
 import json
 import platform
 import tempfile
+from multiprocessing.sharedctypes import RawArray
 
 #Used to split the arrays with angles and axis
 #Start Joint Angles
@@ -116,6 +117,31 @@ def writeToMem(motiondata,static,vsk,counter,namePrefix="pycgm"):
 		[motiondata_keys_size,motiondata_data_size,static_data_size,vsk_keys_size,vsk_data_size]}
 	return [header]
 
+def writeToShared(motiondata):
+	"""
+	Puts the motion data in one block of shared memory for all the processes
+	@param  motiondata Labels and raw data like the data from loadData function
+	@return Header with the block, the shape of the data and the labels. It is
+	passed to the processes as it is, the data is not copied again
+	"""
+	labels=[str(label) for label in motiondata[0]]
+	data=np.asarray(motiondata[1],dtype=np.float64)
+	block=RawArray('d',data.size)
+	np.frombuffer(block,dtype=np.float64).reshape(data.shape)[:]=data
+	header={'block':block,'shape':data.shape,'labels':labels}
+	return header
+
+def readFromShared(header,start=0,end=None):
+	"""
+	Gets frames of the motion data written with writeToShared
+	@param  header Header returned by writeToShared
+	@param  start  First frame to read
+	@param  end    Frame to stop at, the end of the data by default
+	@return Labels and a numpy view of the frames in shared memory, no data is copied
+	"""
+	data=np.frombuffer(header['block'],dtype=np.float64).reshape(header['shape'])
+	return header['labels'],data[start:end]
+
 def readFromMem(header):
 	header=header[0]
 	temp=''
@@ -0,0 +1,76 @@
+import os
+import signal
+import unittest
+import numpy as np
+
+#pycgmCalc is python 2 code
+try:
+	import pycgmCalc
+	import pycgmIO
+	import pycgmStatic
+except (SyntaxError,ImportError):
+	pycgmCalc=None
+
+@unittest.skipIf(pycgmCalc==None,"pycgmCalc needs python 2")
+class TestCalcAngles(unittest.TestCase):
+	"""calcAngles with labels and raw data against a vector of dictionaries."""
+
+	@classmethod
+	def setUpClass(cls):
+		cls.data=pycgmIO.loadData('SampleData/ROM/Sample_Static.c3d')
+		vsk=pycgmIO.loadVSK('SampleData/ROM/Sample_SM.vsk')
+		vsk=pycgmIO.createVskDataDict(vsk[0],vsk[1])
+		cls.vsk=pycgmStatic.getStatic(cls.data,vsk,False)
+		cls.split=pycgmIO.splitMotionDataDict(cls.data)
+		cls.expected=pycgmCalc.calcAngles(cls.data,vsk=cls.vsk,multiprocessing=False,splitAnglesAxis=False,formatData=False)
+
+	def test_single_whole_trial(self):
+		r=pycgmCalc.calcAngles(self.split,vsk=self.vsk,multiprocessing=False,splitAnglesAxis=False,formatData=False)
+		self.assertEqual(len(r),len(self.data))
+		np.testing.assert_allclose(r,self.expected,rtol=0,atol=1e-8)
+
+	def test_multi_whole_trial(self):
+		r=pycgmCalc.calcAngles(self.split,vsk=self.vsk,cores=2,multiprocessing=True,splitAnglesAxis=False,formatData=False)
+		self.assertEqual(len(r),len(self.data))
+		np.testing.assert_allclose(r,self.expected,rtol=0,atol=1e-8)
+
+	def test_pool_whole_trial(self):
+		pool=pycgmCalc.CGMPool(2)
+		try:
+			r=pycgmCalc.calcAngles(self.split,vsk=self.vsk,pool=pool,splitAnglesAxis=False,formatData=False)
+		finally:
+			pool.close()
+		self.assertEqual(len(r),len(self.data))
+		np.testing.assert_allclose(r,self.expected,rtol=0,atol=1e-8)
+
+	def test_pool_dead_worker(self):
+		#a worker killed between trials is started again
+		pool=pycgmCalc.CGMPool(2)
+		try:
+			os.kill(pool.procs[0].pid,signal.SIGKILL)
+			pool.procs[0].join()
+			r=pool.calc(0,len(self.data),self.split,self.vsk)
+		finally:
+			pool.close()
+		np.testing.assert_allclose(r,self.expected,rtol=0,atol=1e-8)
+
+	def test_pool_worker_dies(self):
+		#a worker that dies on a trial fails the trial instead of blocking it
+		calcChunks=pycgmCalc.calcChunks
+		pycgmCalc.calcChunks=lambda *args: os._exit(3)
+		try:
+			pool=pycgmCalc.CGMPool(2)
+		finally:
+			pycgmCalc.calcChunks=calcChunks
+		try:
+			self.assertRaises(Exception,pool.calc,0,len(self.data),self.split,self.vsk)
+			self.assertEqual(len(pool.procs),2)
+			self.assertTrue(all(ptemp.is_alive() for ptemp in pool.procs))
+		finally:
+			pool.close()
+
+	def test_range_past_trial(self):
+		self.assertRaises(Exception,pycgmCalc.calcAngles,self.split,vsk=self.vsk,end=len(self.data)+1)
+
+if __name__ == '__main__':
+	unittest.main()
@@ -186,7 +186,7 @@ def prep(trajs):
     Parameters
     ----------
     trajs : dict
-        A dictionary containing arrays.
+        A dictionary containing arrays, or a `MarkerArray`.
 
     Returns
     -------
@@ -263,12 +263,13 @@ def filtering(Data):
     Parameters
     ----------
     Data : dict 
-        Dictionaries of marker lists.
+        Dictionaries of marker lists, or a `MarkerArray`.
             { [], [], [], ...}
     
     Returns
     -------
     data : dict
+        The filtered copy of `Data`.
     
     Examples
     --------
@@ -484,9 +485,10 @@ def rigid_fill(Data,static):
     Parameters
     ----------
     Data : array
-        Array of dictionaries of marker data.
+        Array of dictionaries of marker data, or a `MarkerArray`.
     static : dict
-        Dictionary of marker data corresponding to a static trial.
+        Dictionary of marker data corresponding to a static trial,
+        or a `MarkerArray`.
 
     Returns
     -------
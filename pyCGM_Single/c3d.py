@@ -30,6 +30,11 @@ import operator
 import struct
 import warnings
 
+try:
+    from .c3darray import decode_residuals, ArrayReader
+except (ImportError, ValueError):
+    from c3darray import decode_residuals, ArrayReader
+
 
 PROCESSOR_INTEL = 84
 PROCESSOR_DEC = 85
@@ -711,7 +716,7 @@ class Manager(dict):
         return self.header.last_frame
 
 
-class Reader(Manager):
+class Reader(Manager, ArrayReader):
     '''This class provides methods for reading the data in a C3D file.
 
     A C3D file contains metadata and frame-based data describing 3D motion.
@@ -793,7 +798,7 @@ class Reader(Manager):
 
         self.check_metadata()
 
-    def read_frames(self, copy=True,onlyXYZ=False):
+    def read_frames(self, copy=True,onlyXYZ=False,analog=True):
         '''Iterate over the data frames from our C3D file handle.
 
         Arguments
@@ -809,6 +814,12 @@ class Reader(Manager):
             If onlyXYZ is set to True the point will be only three dimensions 
             without the error and camera values.
 
+        analog : bool
+            Set this to False to skip over the analog samples of each frame,
+            the third element of each tuple is then an empty array. Use
+            `read_analog_array()` to decode the analog data of all frames at
+            once.
+
         Returns
         -------
         This generates a sequence of (frame number, points, analog) tuples, one
@@ -839,30 +850,10 @@ class Reader(Manager):
             dim=3
         points = np.zeros((ppf, dim), float)
 
-        # TODO: handle ANALOG:BITS parameter here!
-        p = self.get('ANALOG:FORMAT')
-        analog_unsigned = p and p.string_value.strip().upper() == 'UNSIGNED'
-        analog_dtype = np.int16
-        if is_float:
-            analog_dtype = np.float32
-        elif analog_unsigned:
-            analog_dtype = np.uint16
-        analog = np.array([], float)
-
-        offsets = np.zeros((apf, ), int)
-        param = self.get('ANALOG:OFFSET')
-        if param is not None:
-            offsets = param.int16_array[:apf]
-
-        scales = np.ones((apf, ), float)
-        param = self.get('ANALOG:SCALE')
-        if param is not None:
-            scales = param.float_array[:apf]
-
-        gen_scale = 1.
-        param = self.get('ANALOG:GEN_SCALE')
-        if param is not None:
-            gen_scale = param.float_value
+        analog_data = np.array([], float)
+        analog_dtype = np.dtype([np.int16, np.float32][is_float])
+        if analog:
+            analog_dtype, offsets, scales, gen_scale = self._analog_format()
 
         self._handle.seek((self.header.data_block - 1) * 512)
         for frame_no in xrange(self.first_frame(), self.last_frame() + 1): # noqa: F821
@@ -875,24 +866,22 @@ class Reader(Manager):
             if onlyXYZ==True:
                 points[~valid,:] = np.nan
             else:
-                points[~valid, 3:5] = -1
-                c = raw[valid, 3].astype(np.uint16)
-
-                # fourth value is floating-point (scaled) error estimate
-                points[valid, 3] = (c & 0xff).astype(float) * scale
-
+                # fourth value is floating-point (scaled) error estimate and
                 # fifth value is number of bits set in camera-observation byte
-                points[valid, 4] = sum((c & (1 << k)) >> k for k in range(8, 17))
+                points[:, 3], points[:, 4] = decode_residuals(raw, scale)
 
-            if self.header.analog_count > 0:
+            if self.header.analog_count > 0 and analog:
                 raw = np.fromfile(self._handle, dtype=analog_dtype,
                     count=self.header.analog_count).reshape((-1, apf))
-                analog = (raw.astype(float) - offsets) * scales * gen_scale
+                analog_data = (raw.astype(float) - offsets) * scales * gen_scale
+            elif self.header.analog_count > 0:
+                self._handle.seek(
+                    self.header.analog_count * analog_dtype.itemsize, 1)
 
             if copy:
-                yield frame_no, points.copy(), analog.copy()
+                yield frame_no, points.copy(), analog_data.copy()
             else:
-                yield frame_no, points, analog
+                yield frame_no, points, analog_data
 
 
 class Writer(Manager):
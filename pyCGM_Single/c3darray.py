@@ -0,0 +1,305 @@
+'''Numpy decoding of the data section of C3D files.
+
+Shared by the python 2 and python 3 readers in c3d.py and c3dpy3.py, whose
+`Reader` classes get the bulk and memory-mapped reads from `ArrayReader`.
+'''
+
+import numpy as np
+
+
+# number of bits set in each byte value, used to count the cameras that saw
+# a point from the high byte of its residual word
+CAMERA_COUNT = np.array([bin(i).count('1') for i in range(256)])
+
+
+def decode_points(raw, scale):
+    '''Decode raw (..., 4) point values into (..., 3) float coordinates.
+
+    The coordinates are scaled by `scale` and set to nan where the fourth
+    value marks the point as invalid.
+    '''
+    points = raw[..., :3].astype(float) * scale
+    points[~(raw[..., 3] > -1)] = np.nan
+    return points
+
+
+def decode_residuals(raw, scale):
+    '''Decode the fourth of raw (..., 4) point values into residuals and cameras.
+
+    The low byte of the value is the residual, scaled by `scale`, and the
+    number of bits set in the high byte is the number of cameras that saw
+    the point. Both are -1 where the point is not valid.
+    '''
+    word = raw[..., 3]
+    valid = word > -1
+    if word.dtype == np.int16:
+        c = word.view(np.uint16)
+    else:
+        c = np.where(valid, word, 0).astype(np.uint16)
+    residuals = np.where(valid, (c & 0xff) * scale, -1.)
+    cameras = np.where(valid, CAMERA_COUNT[c >> 8], -1)
+    return residuals, cameras
+
+
+class PointArray(object):
+    '''Lazily decoded 3D point data of a C3D file.
+
+    Wraps a (frames, points, 4) view of the raw point values, as returned by
+    `Reader.memmap_points()`. Nothing is decoded until the array is indexed,
+    and then only the frames and points that are selected:
+
+    >>> points = c3d.Reader(open('capture.c3d', 'rb')).memmap_points() #doctest: +SKIP
+    >>> points[100:200, [0, 3]].shape #doctest: +SKIP
+    (100, 2, 3)
+
+    Attributes
+    ----------
+    raw : (frames, points, 4) array
+        The raw x, y, z and residual/camera values, undecoded.
+    scale : float
+        The factor the raw coordinates are multiplied by.
+    '''
+
+    def __init__(self, raw, scale):
+        self.raw = raw
+        self.scale = scale
+
+    @property
+    def shape(self):
+        return self.raw.shape[:2] + (3, )
+
+    def __len__(self):
+        return len(self.raw)
+
+    def __getitem__(self, key):
+        '''Decode the selected frames and points.
+
+        `key` indexes the frame and point axes of `raw` with anything numpy
+        accepts, the returned coordinates are float with nan for points that
+        are not valid.
+        '''
+        return decode_points(self.raw[key], self.scale)
+
+
+class ArrayReader(object):
+    '''Reads the point and analog data of many frames at once with numpy.
+
+    Mixed into `Reader`, it uses its `header`, `_handle`, `get()`,
+    `scale_factor()`, `first_frame()`, `last_frame()`, `points_per_frame()`
+    and `analog_per_frame()`.
+    '''
+
+    def frame_stride(self):
+        '''Return the number of values each frame takes up in the data section.
+
+        A frame holds four values for each point followed by the analog
+        samples, all stored as int16 or, for a negative scale factor, float32.
+        '''
+        return 4 * self.header.point_count + self.header.analog_count
+
+    def frame_offset(self, frame_no):
+        '''Return the byte offset in the file where the given frame starts.
+
+        Arguments
+        ---------
+        frame_no : int
+            A frame number between `first_frame()` and `last_frame()`.
+        '''
+        itemsize = [2, 4][self.scale_factor() < 0]
+        return ((self.header.data_block - 1) * 512 +
+                (frame_no - self.first_frame()) * self.frame_stride() * itemsize)
+
+    def _frame_range(self, first, last):
+        '''Fill in and check a first..last range of frame numbers.'''
+        if first is None:
+            first = self.first_frame()
+        if last is None:
+            last = self.last_frame()
+        if first < self.first_frame() or last > self.last_frame():
+            raise ValueError(
+                'frames {}..{} are outside of the file ({}..{})'.
+                format(first, last, self.first_frame(), self.last_frame()))
+        return first, last
+
+    def read_points_array(self, first=None, last=None, points=None):
+        '''Read the 3D point data of a range of frames with a single read.
+
+        The point values of every frame are read in one go, skipping over the
+        analog samples stored between them, and scaled all at once.
+
+        Arguments
+        ---------
+        first, last : int
+            Read only the frames first..last, inclusive. Default to
+            `first_frame()` and `last_frame()`.
+
+        points : list of int
+            Decode only the points at these indices, in this order. Defaults
+            to all of the points.
+
+        Returns
+        -------
+        A (frames, points, 3) numpy array of float with the (x, y, z)
+        coordinates of each point in each frame. Points that are not valid in
+        a frame are nan.
+        '''
+        scale = abs(self.scale_factor())
+        is_float = self.scale_factor() < 0
+        point_scale = [scale, 1][is_float]
+
+        raw = self._read_raw_points(first, last)
+        if points is not None:
+            raw = raw[:, points]
+        return decode_points(raw, point_scale)
+
+    def read_residuals(self, first=None, last=None, points=None):
+        '''Read the residuals and camera counts of a range of frames at once.
+
+        Arguments
+        ---------
+        first, last : int
+            Read only the frames first..last, inclusive. Default to
+            `first_frame()` and `last_frame()`.
+
+        points : list of int
+            Decode only the points at these indices, in this order. Defaults
+            to all of the points.
+
+        Returns
+        -------
+        residuals, cameras : (frames, points) numpy arrays
+            The scaled residual of each point in each frame, as floats, and
+            the number of cameras that observed it, as ints. Both are -1
+            where the point is not valid.
+        '''
+        raw = self._read_raw_points(first, last)
+        if points is not None:
+            raw = raw[:, points]
+        return decode_residuals(raw, abs(self.scale_factor()))
+
+    def _read_raw_points(self, first, last):
+        '''Read the raw (frames, points, 4) point values of a range of frames.'''
+        first, last = self._frame_range(first, last)
+        frames = last - first + 1
+        ppf = self.points_per_frame()
+        stride = self.frame_stride()
+        point_dtype = np.dtype([np.int16, np.float32][self.scale_factor() < 0])
+
+        if frames < 1:
+            return np.empty((0, ppf, 4), point_dtype)
+
+        # the analog samples after the last frame are not needed
+        self._handle.seek(self.frame_offset(first))
+        count = (frames - 1) * stride + 4 * self.header.point_count
+        raw = np.fromfile(self._handle, dtype=point_dtype, count=count)
+        if raw.size != count:
+            raise ValueError(
+                'expected {} values of point data but the file has {}'.
+                format(count, raw.size))
+        return np.lib.stride_tricks.as_strided(
+            raw, shape=(frames, ppf, 4),
+            strides=(stride * raw.itemsize, 4 * raw.itemsize, raw.itemsize))
+
+    def memmap_points(self):
+        '''Map the 3D point data of the file into memory without reading it.
+
+        The data section is opened with `np.memmap`, so this takes the same
+        time and memory for any size of file. Frames and points are read from
+        disk and decoded only when the returned array is indexed.
+
+        Returns
+        -------
+        A `PointArray` over a (frames, points, 4) strided view of the raw
+        point values, skipping the analog samples between frames.
+        '''
+        frames = self.last_frame() - self.first_frame() + 1
+        ppf = self.points_per_frame()
+        stride = self.frame_stride()
+
+        scale = abs(self.scale_factor())
+        is_float = self.scale_factor() < 0
+        point_dtype = np.dtype([np.int16, np.float32][is_float])
+        point_scale = [scale, 1][is_float]
+
+        if frames < 1:
+            return PointArray(np.empty((0, ppf, 4), point_dtype), point_scale)
+
+        data = np.memmap(self._handle, dtype=point_dtype, mode='r',
+                         offset=self.frame_offset(self.first_frame()),
+                         shape=(frames, stride))
+        raw = np.lib.stride_tricks.as_strided(
+            data, shape=(frames, ppf, 4),
+            strides=(stride * data.itemsize, 4 * data.itemsize, data.itemsize))
+        return PointArray(raw, point_scale)
+
+    def _analog_format(self):
+        '''Return the dtype, offsets, scales and general scale of the analog data.'''
+        apf = self.analog_per_frame()
+
+        # TODO: handle ANALOG:BITS parameter here!
+        p = self.get('ANALOG:FORMAT')
+        analog_unsigned = p and p.string_value.strip().upper() == 'UNSIGNED'
+        analog_dtype = np.int16
+        if self.scale_factor() < 0:
+            analog_dtype = np.float32
+        elif analog_unsigned:
+            analog_dtype = np.uint16
+
+        offsets = np.zeros((apf, ), int)
+        param = self.get('ANALOG:OFFSET')
+        if param is not None:
+            offsets = param.int16_array[:apf]
+
+        scales = np.ones((apf, ), float)
+        param = self.get('ANALOG:SCALE')
+        if param is not None:
+            scales = param.float_array[:apf]
+
+        gen_scale = 1.
+        param = self.get('ANALOG:GEN_SCALE')
+        if param is not None:
+            gen_scale = param.float_value
+
+        return np.dtype(analog_dtype), offsets, scales, gen_scale
+
+    def read_analog_array(self, first=None, last=None):
+        '''Read the analog data of a range of frames with a single read.
+
+        The analog samples of every frame are read in one go, skipping over
+        the point values stored between them, and converted all at once.
+
+        Arguments
+        ---------
+        first, last : int
+            Read only the frames first..last, inclusive. Default to
+            `first_frame()` and `last_frame()`.
+
+        Returns
+        -------
+        A (analog_samples, channels) numpy array of float, with the samples
+        of all the frames one after the other.
+        '''
+        first, last = self._frame_range(first, last)
+        frames = last - first + 1
+        apf = self.analog_per_frame()
+        count = self.header.analog_count
+        if frames < 1 or count == 0 or apf == 0:
+            return np.empty((0, apf), float)
+
+        analog_dtype, offsets, scales, gen_scale = self._analog_format()
+        stride = self.frame_stride()
+        skip = 4 * self.header.point_count
+
+        # the point values before the first frame's analog are not needed
+        self._handle.seek(self.frame_offset(first) + skip * analog_dtype.itemsize)
+        size = (frames - 1) * stride + count
+        raw = np.fromfile(self._handle, dtype=analog_dtype, count=size)
+        if raw.size != size:
+            raise ValueError(
+                'expected {} values of analog data but the file has {}'.
+                format(size, raw.size))
+        raw = np.lib.stride_tricks.as_strided(
+            raw, shape=(frames, count),
+            strides=(stride * raw.itemsize, raw.itemsize))
+
+        return (raw.reshape((-1, apf)).astype(float) - offsets) * scales * gen_scale
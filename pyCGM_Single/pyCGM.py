@@ -2520,7 +2520,7 @@ def rotmat(x=0,y=0,z=0):
     return Rxyz
 
     
-def JointAngleCalc(frame,vsk):
+def JointAngleCalc(frame,vsk,out=None):
     """ Joint Angle Calculation function
     Calculates the Joint angles of plugingait and stores the data in array
     Stores
@@ -2561,12 +2561,16 @@ def JointAngleCalc(frame,vsk):
         Dictionaries of marker lists.  
     vsk : dict, optional
         A dictionary containing subject measurements from a VSK file.
+    out : array, optional
+        Array of 273 elements to store the result in, such as one row of a
+        (frames, 273) array. By default a new array is created.
     
     Returns
     -------
     r, jc : tuple 
         Returns a tuple containing an array that holds the result of all the joint calculations, 
         followed by a dictionary for joint center marker positions.
+        If `out` is given, `r` is `out`.
     
     Examples
     --------
@@ -3433,7 +3437,11 @@ def JointAngleCalc(frame,vsk):
     lhand_ox,lhand_oy,lhand_oz,lhand_xx,lhand_xy,lhand_xz,lhand_yx,lhand_yy,lhand_yz,lhand_zx,lhand_zy,lhand_zz
     ]
 
-    r=np.array(r,dtype=np.float64)
+    if out is None:
+        r=np.array(r,dtype=np.float64)
+    else:
+        out[:]=r
+        r=out
     
     
     #Put temporary dictionary for joint centers to return for now, then modify later
@@ -24,8 +24,11 @@
 # -*- coding: utf-8 -*-
 
 from .pyCGM import *
+from .pycgmIO import MarkerArray
 from .pycgmKinetics import getKinetics
+from . import pycgmVectorized
 import sys
+import multiprocessing
 if sys.version_info[0]==2:
     pyver = 2
 else:
@@ -69,7 +72,7 @@ def calcAngles(data,**kargs):
         Joint centres in the global coordinate system. List indices correspond 
         to each frame of trial. Dict keys correspond to name of each joint centre,
         dict values are arrays ([],[],[]) of x,y,z coordinates for each joint 
-        centre.
+        centre. Can also be a `MarkerArray`.
     **kargs : keyword arguments
         start : int, optional
            Indicates which index in `data` to start the calculation.
@@ -81,10 +84,14 @@ def calcAngles(data,**kargs):
             Incompatible with `start` and `end`.
         vsk : dict, required
             Subject measurement values as a dictionary or labels and data. 
-        angles : bool, optional
+        angles : bool or array, optional
             If true, the function will return the angles. True by default.
-        axis : bool, optional
+            Can also be a list of angle names, as in pycgmIO.writeResult,
+            to calculate only those angles.
+        axis : bool or array, optional
             If true, the function will return the axis. True by default.
+            Can also be a list of axis names, as in pycgmIO.writeResult,
+            to calculate only those axis.
         splitAnglesAxis : bool, optional
             If true, the function will return the angles and axis as
             separate arrays. If false, it will be the same array. True
@@ -95,14 +102,36 @@ def calcAngles(data,**kargs):
         formatData : bool, optional
             If true, the function will return the angles and axis 
             in one array. True by default.
+        engine : str, optional
+            'frame' calculates the trial one frame at a time with
+            pyCGM.JointAngleCalc. 'vectorized' calculates every frame
+            at once with pycgmVectorized.JointAngleCalc, which gives
+            the same results and is much faster on long trials.
+            'frame' by default.
+        returnvalid : bool, optional
+            If true, the function will also return a (frames, 18) boolean
+            array of the frames in which each segment is valid, from
+            pycgmVectorized.validityMask. It is returned after the other
+            values. False by default.
+        executor : str or Executor, optional
+            Runs the calculation in parallel, see `calcParallel`. Either
+            'serial', 'threads', 'processes', 'mpi', or a
+            `concurrent.futures.Executor`. 'serial' by default.
+        chunksize : int, optional
+            Number of frames in each task given to `executor`.
     
     Returns
     -------
     r, jcs : array_like
-        `r` is a list of joint angle values for each frame.
+        `r` is a (frames, 273) array of joint angle and axis values for
+        each frame. With `formatData`, the angles are returned as a 
+        (frames, 19, 3) array and the axis as a (frames, 18, 4, 3) array,
+        both of which are views of `r`.
         `jcs` is a list of dictionaries, each of which holds joint 
         center locations for each frame. Returned only if returnjoints
-        is True.
+        is True. If `data` is a `MarkerArray`, `jcs` is a `MarkerArray`
+        of joint center trajectories.
+        `valid` is the validity mask, returned only if returnvalid is True.
 
     Raises
     ------
@@ -110,6 +139,17 @@ def calcAngles(data,**kargs):
         If `start` is given and is negative.
         If `start` is larger than `end`.
         If `end` is larger than the length of `data`.
+        If `engine` is not 'frame' or 'vectorized'.
+        If `angles` or `axis` has an unknown name.
+        If `executor` is not a known name or an Executor.
+
+    Notes
+    -----
+    When `angles` or `axis` is a list, the vectorized engine only
+    calculates the segments that the listed outputs depend on, so asking
+    for the lower body angles with ``axis=False`` skips the head, thorax
+    and arms. All other values in the result are nan. The frame engine
+    gives the same result, but still calculates every segment.
     
     Examples
     --------
@@ -139,6 +179,8 @@ def calcAngles(data,**kargs):
              [ 246.23714526,  354.25388362, 1031.61423686],
              [ 245.15617986,  353.34579827, 1031.69727175],
              [ 246.14463861,  353.36284583, 1032.70853763]],...]]]])
+    >>> result[0].base is result[1].base #Both are views of one array
+    True
 
     Example of returning as a tuple.
 
@@ -153,6 +195,49 @@ def calcAngles(data,**kargs):
     >>> kinematics = calcAngles(data, vsk=vsk, splitAnglesAxis=False, formatData=False,returnjoints=False)
     >>> around(kinematics[0][0], 8)
     -0.45646046
+
+    Example of calculating every frame at once.
+
+    >>> result = calcAngles(data, vsk=vsk, engine='vectorized')
+    >>> around(result[0][0][0], 8)
+    array([-0.45646046, -5.76277607,  4.80620732])
+
+    Example of using a MarkerArray. The joint centers are also returned
+    as a MarkerArray, which can be passed to getKinetics.
+
+    >>> from .pycgmKinetics import getKinetics
+    >>> markers = loadC3D(c3dFile, markerArray=True)[0]
+    >>> kinematics, joint_centers = calcAngles(markers, vsk=vsk, engine='vectorized',
+    ...     splitAnglesAxis=False, formatData=False, returnjoints=True)
+    >>> around(joint_centers['Pelvis'][0], 8) #doctest: +NORMALIZE_WHITESPACE
+    array([ 246.152565 , 353.26243591, 1031.71362305])
+    >>> CoM_coords = getKinetics(joint_centers, vsk['Bodymass'])
+    >>> CoM_coords.shape
+    (275, 3)
+
+    Example of calculating only the knee angles.
+
+    >>> angles, axis = calcAngles(data, vsk=vsk, engine='vectorized',
+    ...                           angles=['R Knee', 'L Knee'], axis=False)
+    >>> around(angles[0][3], 8)
+    array([  3.74245063,   1.83607381, -21.13452485])
+    >>> angles[0][0]
+    array([nan, nan, nan])
+
+    Example of returning the validity mask. Columns are in the order of
+    pycgmVectorized.segmentLabels.
+
+    >>> angles, axis, valid = calcAngles(data, vsk=vsk, engine='vectorized',
+    ...                                  returnvalid=True)
+    >>> valid.shape, valid.all()
+    ((275, 18), True)
+
+    Example of calculating chunks of 100 frames in parallel threads.
+
+    >>> angles, axis = calcAngles(data, vsk=vsk, engine='vectorized',
+    ...                           executor='threads', chunksize=100)
+    >>> around(angles[0][0], 8)
+    array([-0.45646046, -5.76277607,  4.80620732])
     """
 
     start=0
@@ -163,6 +248,12 @@ def calcAngles(data,**kargs):
     returnjoints=False
     splitAnglesAxis=True
     formatData=True
+    engine='frame'
+    outputAngles=None
+    outputAxis=None
+    returnvalid=False
+    executor=None
+    chunksize=None
 
     #modified to work between python 2 and 3
     # used to rely on .has_key()
@@ -183,60 +274,81 @@ def calcAngles(data,**kargs):
         vsk=kargs['vsk']
     if 'angles' in kargs:
         returnangles=kargs['angles']
+        if isinstance(returnangles,(list,tuple)):
+            outputAngles=list(returnangles)
+            returnangles=True
     if 'axis' in kargs:
         returnaxis=kargs['axis']
+        if isinstance(returnaxis,(list,tuple)):
+            outputAxis=list(returnaxis)
+            returnaxis=True
+    if outputAngles!=None or outputAxis!=None:
+        if outputAngles==None:
+            outputAngles=list(pycgmVectorized.angleLabels) if returnangles==True else []
+        if outputAxis==None:
+            outputAxis=list(pycgmVectorized.axisLabels) if returnaxis==True else []
     if 'splitAnglesAxis' in kargs:
         splitAnglesAxis=kargs['splitAnglesAxis']
     if 'formatData' in kargs:
         formatData=kargs['formatData']
     if 'returnjoints' in kargs:
         returnjoints=kargs['returnjoints']
+    if 'engine' in kargs:
+        engine=kargs['engine']
+        if engine not in ['frame','vectorized']:
+            raise Exception("Unknown engine: "+str(engine))
+    if 'returnvalid' in kargs:
+        returnvalid=kargs['returnvalid']
+    if 'executor' in kargs:
+        executor=kargs['executor']
+    if 'chunksize' in kargs and kargs['chunksize']!=None:
+        chunksize=kargs['chunksize']
+        if chunksize<1:
+            raise Exception("Chunk size must be positive")
 
     r=None
-    r,jcs=Calc(start,end,data,vsk)
+    if returnvalid==True:
+        r,jcs,valid=Calc(start,end,data,vsk,engine,outputAngles,outputAxis,True,executor,chunksize)
+    else:
+        r,jcs=Calc(start,end,data,vsk,engine,outputAngles,outputAxis,False,executor,chunksize)
 
     if formatData==True:
-        r=np.transpose(r)
-        angles=r[SJA:EJA]
-        axis=r[SA:EA]
-        angles=np.transpose(angles)
-        axis=np.transpose(axis)
-        
-        s=np.shape(angles)
-        if pyver == 2:
-            angles=np.reshape(angles,(s[0],s[1]/3,3))
-        else:
-            angles=np.reshape(angles,(s[0],s[1]//3,3))
-            
-        s=np.shape(axis)
-        if pyver == 2:
-            axis=np.reshape(axis,(s[0],s[1]/12,4,3))
-        else:
-            axis=np.reshape(axis,(s[0],s[1]//12,4,3))
-            
-        return [angles,axis]
-
-    if splitAnglesAxis==True:
+        #angles and axis are views of the (frames, 273) result, not copies
+        nframes=len(r)
+        angles=r[:,SJA:EJA].reshape((nframes,(EJA-SJA)//3,3))
+        axis=r[:,SA:EA].reshape((nframes,(EA-SA)//12,4,3))
+        result=[angles,axis]
+    elif splitAnglesAxis==True:
         r=np.transpose(r)
         angles=r[SJA:EJA]
         axis=r[SA:EA]
         if returnangles==True and returnaxis==True:
-            return [angles,axis]
+            result=[angles,axis]
         elif returnangles==True and returnaxis==False:
-            return angles
+            result=angles
         else:
-            return axis
-    if returnjoints==False:
-        return r
+            result=axis
+    elif returnjoints==False:
+        result=r
     else:
-        return r,jcs
-
-def Calc(start,end,data,vsk):
+        result=(r,jcs)
+
+    if returnvalid==False:
+        return result
+    if type(result)==list:
+        return result+[valid]
+    if type(result)==tuple:
+        return result+(valid,)
+    return result,valid
+
+def Calc(start,end,data,vsk,engine='frame',angles=None,axis=None,returnvalid=False,
+         executor=None,chunksize=None):
     """Calculates angles and joint values for marker data in a given range
     
     This function is a wrapper around `calcFrames`. It calls `calcFrames`
     with the given `data` and `vsk` inputs starting at index `start` and 
-    ending at index `end` in `data`.
+    ending at index `end` in `data`. If `engine` is 'vectorized', 
+    `calcFramesVectorized` is called instead.
 
     Parameters
     ----------
@@ -254,13 +366,28 @@ def Calc(start,end,data,vsk):
     vsk : dict or array
         Dictionary containing subject measurement values, or array of 
         labels and data `[labels, data]`. 
+    engine : str, optional
+        'frame' or 'vectorized'. 'frame' by default.
+    angles : list, optional
+        Names of the angles to calculate. All of them by default.
+    axis : list, optional
+        Names of the axis to calculate. All of them by default.
+    returnvalid : bool, optional
+        If true, the validity mask of the frames is returned as well.
+        False by default.
+    executor : str or Executor, optional
+        If given, the frames are calculated in parallel with
+        `calcParallel`. None or 'serial' by default.
+    chunksize : int, optional
+        Number of frames in each parallel task.
 
     Returns
     -------
     angles, jcs : tuple
         `angles` is an array of the joint angle values. `jcs` is an array
         of joint center locations. Indices correspond to frames in the 
-        trial.
+        trial. With `returnvalid`, a (frames, 18) boolean array of the
+        frames in which each segment is valid follows `jcs`.
 
     Examples
     --------
@@ -299,10 +426,151 @@ def Calc(start,end,data,vsk):
     array([ 246.16200256, 353.27105713, 1031.71856689])
     """
     d=data[start:end]
-    angles,jcs=calcFrames(d,vsk)
+    outputs=[angles,axis]
+    if angles!=None or axis!=None:
+        #check the names before calculating anything
+        pycgmVectorized.requiredSegments(angles or [],axis or [])
+    if executor!=None and executor!='serial':
+        angles,jcs=calcParallel(d,vsk,executor,engine,angles,axis,chunksize)
+    elif engine=='vectorized':
+        if returnvalid:
+            return calcFramesVectorized(d,vsk,angles,axis,True)
+        angles,jcs=calcFramesVectorized(d,vsk,*outputs)
+    else:
+        angles,jcs=calcFrames(d,vsk)
+    if engine!='vectorized' and outputs!=[None,None]:
+        angles[:,~pycgmVectorized.outputColumns(*outputs)]=np.nan
+    if returnvalid:
+        valid=pycgmVectorized.validityMask(_modelFrame(d))
+        return angles,jcs,valid
     
     return angles,jcs
 
+def _executor(executor):
+    """Returns the Executor for `executor`, and whether it has to be shut down after use."""
+    if executor=='threads':
+        from concurrent.futures import ThreadPoolExecutor
+        return ThreadPoolExecutor(multiprocessing.cpu_count()), True
+    if executor=='processes':
+        from concurrent.futures import ProcessPoolExecutor
+        return ProcessPoolExecutor(), True
+    if executor=='mpi':
+        try:
+            from mpi4py.futures import MPIPoolExecutor
+        except ImportError:
+            raise Exception("mpi4py is required to calculate with executor='mpi'")
+        return MPIPoolExecutor(), True
+    if hasattr(executor,'submit'):
+        return executor, False
+    raise Exception("Unknown executor: "+str(executor))
+
+def _calcChunk(data,vsk,engine,angles,axis):
+    """Calculates one chunk of frames, run by the executor of `calcParallel`."""
+    if engine=='vectorized':
+        return calcFramesVectorized(data,vsk,angles,axis)
+    return calcFrames(data,vsk)
+
+def calcParallel(data,vsk,executor,engine='frame',angles=None,axis=None,chunksize=None):
+    """Calculates angles and joint values with a parallel executor
+
+    The frames are split into chunks of `chunksize` frames, and each chunk
+    is calculated as a task of `executor` with `calcFrames`, or with
+    `calcFramesVectorized` if `engine` is 'vectorized'. The results are
+    put back together in the order of the frames.
+
+    Parameters
+    ----------
+    data : array of dict or array
+        List of xyz coordinates of marker positions in a frame. Each 
+        coordinate is a dict where the key is the marker name and the 
+        value is a 3 element array of its xyz coordinate. Can also pass
+        as a 2 element array of `[labels, data]`, where `labels` is a list of
+        marker names and `data` is list of corresponding xyz coordinates,
+        or as a `MarkerArray`.
+    vsk : dict or array
+        Dictionary containing subject measurement values, or array of labels 
+        and data `[labels, data]`. 
+    executor : str or Executor
+        'serial' calculates the chunks one after the other. 'threads' and
+        'processes' use a `concurrent.futures` thread or process pool
+        with one worker per core. 'mpi' uses `mpi4py.futures.MPIPoolExecutor`,
+        which needs mpi4py and is imported only when used. Any other
+        `concurrent.futures.Executor` is used as it is, and not shut down.
+    engine : str, optional
+        'frame' or 'vectorized'. 'frame' by default.
+    angles : list, optional
+        Names of the angles to calculate. All of them by default.
+    axis : list, optional
+        Names of the axis to calculate. All of them by default.
+    chunksize : int, optional
+        Number of frames in each task. By default the frames are split
+        into four chunks for each core.
+
+    Returns
+    -------
+    angles, joints : tuple
+        `angles` is a (frames, 273) array of the joint angle and axis 
+        values. `joints` is a list of joint center locations, or a
+        `MarkerArray` if `data` is a `MarkerArray`.
+
+    Raises
+    ------
+    Exception
+        If `executor` is not a known name or an Executor.
+        If `executor` is 'mpi' and mpi4py is not installed.
+
+    Examples
+    --------
+    >>> from numpy import around
+    >>> from .pycgmIO import loadC3D, loadVSK
+    >>> from .pycgmStatic import getStatic
+    >>> from .pyCGM_Helpers import getfilenames
+    >>> filenames = getfilenames(x=2)
+    >>> c3dFile = filenames[1]
+    >>> vskFile = filenames[2]
+    >>> markers = loadC3D(c3dFile, markerArray=True)[0]
+    >>> vskData = loadVSK(vskFile, False)
+    >>> vsk = getStatic(loadC3D(c3dFile)[0],vskData,flat_foot=False)
+    >>> angles, joints = calcParallel(markers, vsk, 'serial', 'vectorized', chunksize=100)
+    >>> around(angles[274][0], 8)
+    -0.42773111
+    >>> joints.shape
+    (275, 33, 3)
+    """
+    if not isinstance(data,MarkerArray) and type(data[0])!=type({}):
+        data=createMotionDataDict(data[0],data[1])
+    if type(vsk)!=type({}) and not isinstance(vsk,pycgmVectorized.SubjectModel):
+        vsk=createVskDataDict(vsk[0],vsk[1])
+    if chunksize==None:
+        chunksize=int(np.ceil(len(data)/(4.0*multiprocessing.cpu_count())))
+    chunksize=max(int(chunksize),1)
+    chunks=[data[i:i+chunksize] for i in range(0,len(data),chunksize)]
+
+    if executor=='serial':
+        results=[_calcChunk(chunk,vsk,engine,angles,axis) for chunk in chunks]
+    else:
+        pool,shutdown=_executor(executor)
+        try:
+            futures=[pool.submit(_calcChunk,chunk,vsk,engine,angles,axis) for chunk in chunks]
+            results=[future.result() for future in futures]
+        finally:
+            if shutdown:
+                pool.shutdown()
+
+    r=np.empty((len(data),EA))
+    joints=[]
+    row=0
+    for chunkAngles,chunkJoints in results:
+        r[row:row+len(chunkAngles)]=chunkAngles
+        row+=len(chunkAngles)
+        if isinstance(chunkJoints,MarkerArray):
+            joints.append(chunkJoints.data)
+        else:
+            joints.extend(chunkJoints)
+    if isinstance(data,MarkerArray) and len(results)>0:
+        joints=MarkerArray(results[0][1].labels,np.concatenate(joints))
+    return r,joints
+
 def calcFrames(data,vsk):
     """Calculates angles and joint values for given marker data
     
@@ -313,7 +581,8 @@ def calcFrames(data,vsk):
         coordinate is a dict where the key is the marker name and the 
         value is a 3 element array of its xyz coordinate. Can also pass
         as a 2 element array of `[labels, data]`, where `labels` is a list of
-        marker names and `data` is list of corresponding xyz coordinates. 
+        marker names and `data` is list of corresponding xyz coordinates,
+        or as a `MarkerArray`.
     vsk : dict or array
         Dictionary containing subject measurement values, or array of labels 
         and data `[labels, data]`. 
@@ -321,9 +590,10 @@ def calcFrames(data,vsk):
     Returns
     -------
     angles, joints : tuple
-        `angles` is an array of the joint angle values. `joints` is an array
-        of joint center locations. Indices correspond to frames in the 
-        trial.
+        `angles` is a (frames, 273) array of the joint angle and axis
+        values. `joints` is an array of joint center locations. Indices
+        correspond to frames in the trial. If `data` is a `MarkerArray`,
+        `joints` is a `MarkerArray`.
     
     Examples
     --------
@@ -348,19 +618,109 @@ def calcFrames(data,vsk):
     >>> around(joints[0]['Pelvis'], 8) #doctest: +NORMALIZE_WHITESPACE
     array([ 246.152565 , 353.26243591, 1031.71362305])
     """
-    angles=[]
     joints=[] #added this here for normal data
-    if type(data[0])!=type({}):
+    markerArray=isinstance(data,MarkerArray)
+    if not markerArray and type(data[0])!=type({}):
         data=createMotionDataDict(data[0],data[1])
-    if type(vsk)!=type({}):
+    if isinstance(vsk,pycgmVectorized.SubjectModel):
+        vsk=vsk.vsk
+    elif type(vsk)!=type({}):
         vsk=createVskDataDict(vsk[0],vsk[1])
 
+    #each frame is written straight into its row of the result
+    angles=np.empty((len(data),EA))
     #just accept that the data is missing    
-    for frame in data:
-        angle,jcs = JointAngleCalc(frame,vsk)
-        angles.append(angle)
+    for i,frame in enumerate(data):
+        angle,jcs = JointAngleCalc(frame,vsk,angles[i])
         joints.append(jcs)
+    if markerArray and len(joints)>0:
+        joints=pycgmVectorized.jointCenterArray(pycgmVectorized.stackJointCenters(joints))
     return angles, joints
 
 
             
+
+def _modelFrame(data):
+    """Stacks the model markers of a trial with pycgmVectorized.ModelPlan."""
+    if isinstance(data,MarkerArray):
+        return pycgmVectorized.ModelPlan(data.labels).frame(data)
+    if type(data[0])==type({}):
+        labels=list(data[0].keys())
+        values=np.array([[frame[label] for label in labels] for frame in data],dtype=np.float64)
+    else:
+        labels=data[0]
+        values=np.asarray(data[1],dtype=np.float64)
+    return pycgmVectorized.ModelPlan(labels).frame(values)
+
+def calcFramesVectorized(data,vsk,angles=None,axis=None,returnvalid=False):
+    """Calculates angles and joint values for every frame at once
+
+    Stacks the marker data of the whole trial into one
+    (frames, markers, 3) array and calculates all of the frames with
+    pycgmVectorized.JointAngleCalc, instead of calling
+    pyCGM.JointAngleCalc once per frame. A `MarkerArray` is already
+    stored this way and is used without copying. The marker set is
+    resolved once for the whole trial with pycgmVectorized.ModelPlan.
+
+    Parameters
+    ----------
+    data : array of dict or array
+        List of xyz coordinates of marker positions in a frame. Each 
+        coordinate is a dict where the key is the marker name and the 
+        value is a 3 element array of its xyz coordinate. Can also pass
+        as a 2 element array of `[labels, data]`, where `labels` is a list of
+        marker names and `data` is list of corresponding xyz coordinates,
+        or as a `MarkerArray`.
+    vsk : dict or array
+        Dictionary containing subject measurement values, array of labels 
+        and data `[labels, data]`, or a pycgmVectorized.SubjectModel. 
+    angles : list, optional
+        Names of the angles to calculate. All of them by default.
+    axis : list, optional
+        Names of the axis to calculate. All of them by default.
+    returnvalid : bool, optional
+        If true, the validity mask of the frames is returned as well.
+        False by default.
+ 
+    Returns
+    -------
+    angles, joints : tuple
+        `angles` is a (frames, 273) array of the joint angle and axis 
+        values. `joints` is a list of joint center locations. Indices
+        correspond to frames in the trial. If `data` is a `MarkerArray`,
+        `joints` is a `MarkerArray` of joint center trajectories.
+        With `returnvalid`, a (frames, 18) boolean array of the frames in
+        which each segment is valid follows `joints`.
+    
+    Examples
+    --------
+    >>> from numpy import around
+    >>> from .pycgmIO import loadC3D, loadVSK
+    >>> from .pycgmStatic import getStatic
+    >>> from .pyCGM_Helpers import getfilenames
+    >>> filenames = getfilenames(x=2)
+    >>> c3dFile = filenames[1]
+    >>> vskFile = filenames[2]
+    >>> result = loadC3D(c3dFile)
+    >>> data = result[0]
+    >>> vskData = loadVSK(vskFile, False)
+    >>> vsk = getStatic(data,vskData,flat_foot=False)
+    >>> angles, joints = calcFramesVectorized(data, vsk)
+    >>> around(angles[0][0], 8)
+    -0.45646046
+    >>> around(joints[0]['Pelvis'], 8) #doctest: +NORMALIZE_WHITESPACE
+    array([ 246.152565 , 353.26243591, 1031.71362305])
+    """
+    if type(vsk)!=type({}) and not isinstance(vsk,pycgmVectorized.SubjectModel):
+        vsk=createVskDataDict(vsk[0],vsk[1])
+    #derive the subject constants once for the whole trial
+    vsk=pycgmVectorized.SubjectModel(vsk)
+    frame=_modelFrame(data)
+    r,jcs,valid=pycgmVectorized.JointAngleCalc(frame,vsk,angles=angles,axis=axis,returnvalid=True)
+    if isinstance(data,MarkerArray):
+        joints=pycgmVectorized.jointCenterArray(jcs)
+    else:
+        joints=pycgmVectorized.splitJointCenters(jcs)
+    if returnvalid:
+        return r, joints, valid
+    return r, joints
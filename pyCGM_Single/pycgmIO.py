@@ -58,7 +58,287 @@ SA=EJA
 #End Axis
 EA=SA+72*3
 
-def createMotionDataDict(labels,data):
+class MarkerArray(object):
+    """Motion capture data for a whole trial stored in one array.
+
+    The xyz coordinates of every marker in every frame are kept in a
+    single contiguous (frames, markers, 3) float64 array, `data`, and
+    `index` maps each marker name to its column. A MarkerArray can be
+    used anywhere a list of frame dictionaries is accepted:
+
+    - ``markers['LASI']`` is a (frames, 3) view of one marker,
+    - ``markers[i]`` is a `MarkerFrame`, a dictionary-like view of frame i,
+    - ``markers[start:end]`` is a MarkerArray view of a range of frames,
+    - ``len(markers)`` is the number of frames, and iterating over
+      `markers` gives each frame in turn.
+
+    None of these copy the marker data, so writing to a view changes
+    the MarkerArray.
+
+    Parameters
+    ----------
+    labels : list
+        List of marker names.
+    data : array, optional
+        Array of xyz coordinates of shape (frames, markers, 3), where
+        the markers are in the same order as `labels`. If not given,
+        the trial has no frames.
+
+    Raises
+    ------
+    Exception
+        If the shape of `data` does not match `labels`.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from .pycgmIO import MarkerArray
+    >>> data = np.arange(18.0).reshape(3,2,3)
+    >>> markers = MarkerArray(['RFHD', 'LFHD'], data)
+    >>> len(markers)
+    3
+    >>> markers.keys()
+    ['RFHD', 'LFHD']
+    >>> markers['LFHD']
+    array([[ 3.,  4.,  5.],
+           [ 9., 10., 11.],
+           [15., 16., 17.]])
+    >>> markers[1]['RFHD']
+    array([6., 7., 8.])
+    >>> markers[1:]
+    MarkerArray(frames=2, markers=2)
+    >>> np.shares_memory(markers['LFHD'], markers.data)
+    True
+
+    Assigning to a new marker name adds a column.
+
+    >>> markers['RBHD'] = np.zeros((3,3))
+    >>> markers.shape
+    (3, 3, 3)
+    """
+    def __init__(self, labels, data=None):
+        self.labels = [str(label).rstrip() for label in labels]
+        self.index = dict((label, i) for i, label in enumerate(self.labels))
+        if data is None:
+            data = np.empty((0, len(self.labels), 3))
+        data = np.asarray(data, dtype=np.float64)
+        if data.ndim != 3 or data.shape[1:] != (len(self.labels), 3):
+            raise Exception("Marker data of shape "+str(data.shape)+
+                            " does not match "+str(len(self.labels))+" labels")
+        self.data = data
+
+    @classmethod
+    def fromDicts(cls, motionData, labels=None):
+        """Creates a MarkerArray from a list of frame dictionaries.
+
+        Parameters
+        ----------
+        motionData : array
+            List of dict. Indices of `motionData` correspond to frames
+            in the trial. Keys in the dictionary are marker names and
+            values are xyz coordinates of the corresponding marker.
+        labels : list, optional
+            Marker names to keep, in order. By default the keys of the
+            first frame are used. Markers missing from a frame are nan.
+
+        Returns
+        -------
+        markers : MarkerArray
+
+        Examples
+        --------
+        >>> from numpy import array
+        >>> from .pycgmIO import MarkerArray
+        >>> motionData = [{'RFHD': array([1., 2., 3.])},
+        ...               {'RFHD': array([4., 5., 6.]), 'LFHD': array([7., 8., 9.])}]
+        >>> markers = MarkerArray.fromDicts(motionData, ['RFHD', 'LFHD'])
+        >>> markers['LFHD']
+        array([[nan, nan, nan],
+               [ 7.,  8.,  9.]])
+        """
+        if labels is None:
+            labels = list(motionData[0].keys()) if len(motionData) > 0 else []
+        data = np.empty((len(motionData), len(labels), 3))
+        data.fill(np.nan)
+        for i, frame in enumerate(motionData):
+            for j, label in enumerate(labels):
+                if label in frame:
+                    data[i, j] = frame[label]
+        return cls(labels, data)
+
+    def toDicts(self):
+        """Converts the MarkerArray to a list of frame dictionaries.
+
+        Returns
+        -------
+        motionData : array
+            List of dict, one per frame, of marker names to xyz arrays.
+            The arrays are views of the MarkerArray.
+
+        Examples
+        --------
+        >>> import numpy as np
+        >>> from .pycgmIO import MarkerArray
+        >>> markers = MarkerArray(['RFHD'], np.arange(6.0).reshape(2,1,3))
+        >>> markers.toDicts()
+        [{'RFHD': array([0., 1., 2.])}, {'RFHD': array([3., 4., 5.])}]
+        """
+        return [dict(frame.items()) for frame in self]
+
+    @property
+    def shape(self):
+        return self.data.shape
+
+    def __len__(self):
+        return self.data.shape[0]
+
+    def __repr__(self):
+        return "MarkerArray(frames=%d, markers=%d)" % (len(self), len(self.labels))
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield MarkerFrame(self.labels, self.index, self.data[i])
+
+    def __contains__(self, label):
+        return label in self.index
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            return self.data[:, self.index[key]]
+        if isinstance(key, slice):
+            return MarkerArray(self.labels, self.data[key])
+        return MarkerFrame(self.labels, self.index, self.data[key])
+
+    def __setitem__(self, label, value):
+        if label not in self.index:
+            self.addMarkers([label])
+        self.data[:, self.index[label]] = value
+
+    def addMarkers(self, labels):
+        """Adds the markers that are not in the MarkerArray yet.
+
+        The marker data is grown once for all of them, and the new markers
+        are nan in every frame. Adding markers one at a time with
+        ``markers[label] = value`` copies the whole trial for each one.
+
+        Parameters
+        ----------
+        labels : list
+            Marker names. Names that are already in the MarkerArray are
+            skipped.
+
+        Examples
+        --------
+        >>> import numpy as np
+        >>> from .pycgmIO import MarkerArray
+        >>> markers = MarkerArray(['RFHD'], np.ones((2,1,3)))
+        >>> markers.addMarkers(['RFHD', 'LFHD', 'RBHD'])
+        >>> markers.keys()
+        ['RFHD', 'LFHD', 'RBHD']
+        >>> markers['RBHD']
+        array([[nan, nan, nan],
+               [nan, nan, nan]])
+        """
+        new = []
+        for label in labels:
+            if label not in self.index and label not in new:
+                new.append(label)
+        if len(new) == 0:
+            return
+        columns = np.empty((len(self), len(new), 3))
+        columns.fill(np.nan)
+        self.data = np.concatenate((self.data, columns), axis=1)
+        for label in new:
+            self.labels.append(label)
+            self.index[label] = len(self.labels)-1
+
+    def frame(self, i):
+        """Returns a `MarkerFrame` view of frame `i`."""
+        return MarkerFrame(self.labels, self.index, self.data[i])
+
+    def keys(self):
+        return list(self.labels)
+
+    def values(self):
+        return [self.data[:, i] for i in range(len(self.labels))]
+
+    def items(self):
+        return [(label, self.data[:, i]) for i, label in enumerate(self.labels)]
+
+    def iteritems(self):
+        return iter(self.items())
+
+    def copy(self):
+        """Returns a MarkerArray with a copy of the marker data."""
+        return MarkerArray(self.labels, self.data.copy())
+
+class MarkerFrame(object):
+    """A dictionary-like view of one frame of a `MarkerArray`.
+
+    Keys are marker names and values are xyz views into the
+    MarkerArray, so ``frame['RASI']`` does not copy and assigning
+    to ``frame['RASI']`` changes the MarkerArray.
+
+    Parameters
+    ----------
+    labels : list
+        List of marker names.
+    index : dict
+        Dictionary of marker names to their row in `data`.
+    data : array
+        Array of shape (markers, 3) holding the frame.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from .pycgmIO import MarkerArray
+    >>> markers = MarkerArray(['RFHD', 'LFHD'], np.zeros((2,2,3)))
+    >>> frame = markers[0]
+    >>> frame['LFHD'] = [1., 2., 3.]
+    >>> markers['LFHD']
+    array([[1., 2., 3.],
+           [0., 0., 0.]])
+    >>> 'LFHD' in frame, 'RBHD' in frame
+    (True, False)
+    """
+    def __init__(self, labels, index, data):
+        self.labels = labels
+        self.index = index
+        self.data = data
+
+    def __len__(self):
+        return len(self.labels)
+
+    def __iter__(self):
+        return iter(self.labels)
+
+    def __contains__(self, label):
+        return label in self.index
+
+    def __getitem__(self, label):
+        return self.data[self.index[label]]
+
+    def __setitem__(self, label, value):
+        self.data[self.index[label]] = value
+
+    def __repr__(self):
+        return repr(dict(self.items()))
+
+    def get(self, label, default=None):
+        if label in self.index:
+            return self.data[self.index[label]]
+        return default
+
+    def keys(self):
+        return list(self.labels)
+
+    def values(self):
+        return [self.data[i] for i in range(len(self.labels))]
+
+    def items(self):
+        return [(label, self.data[i]) for i, label in enumerate(self.labels)]
+
+def createMotionDataDict(labels,data,markerArray=False):
 	"""Creates an array of motion capture data given labels and data.
 
 	Parameters
@@ -68,6 +348,9 @@ def createMotionDataDict(labels,data):
 	data : array
 	    List of xyz coordinates corresponding to the marker names in `labels`. 
 	    Indices of `data` correspond to frames in the trial.
+	markerArray : bool, optional
+	    If true, the motion capture data is returned as a `MarkerArray`.
+	    False by default.
 
 	Returns
 	-------
@@ -75,6 +358,7 @@ def createMotionDataDict(labels,data):
 	    List of dict. Indices of `motiondata` correspond to frames
 	    in the trial. Keys in the dictionary are marker names and 
 	    values are xyz coordinates of the corresponding marker.
+	    A `MarkerArray` if `markerArray` is true.
     
 	Examples
 	--------
@@ -107,7 +391,17 @@ def createMotionDataDict(labels,data):
 	...             flag = False
 	>>> flag
 	True
+
+	The same data as a MarkerArray.
+
+	>>> result = createMotionDataDict(labels, data, markerArray=True)
+	>>> result.shape
+	(2, 3, 3)
+	>>> array_equal(result[1]['LBHD'], expected[1]['LBHD'])
+	True
 	"""
+	if markerArray == True:
+		return MarkerArray(labels,data)
 	motiondata = []
 	for frame in data:
 		mydict={}
@@ -263,13 +557,37 @@ def markerKeys():
                'RWRA','RWRB','LWRA','LWRB','RFIN','LFIN']
     return marker_keys
 
-def loadEZC3D(filename):
+def modelMarkerKeys():
+    """A list of the marker names the model reads.
+
+    These are the markers of `markerKeys` together with the sacrum and
+    the medial knee and ankle markers, which the model uses when they
+    are in the trial. `loadData` loads only these markers by default.
+
+    Returns
+    -------
+    marker_keys : array
+        List of marker names.
+
+    Examples
+    --------
+    >>> from .pycgmIO import modelMarkerKeys
+    >>> modelMarkerKeys()[-5:]
+    ['SACR', 'RMKN', 'LMKN', 'RMMA', 'LMMA']
+    """
+    return markerKeys() + ['SACR','RMKN','LMKN','RMMA','LMMA']
+
+def loadEZC3D(filename,markerArray=False,markers=None):
     """Use c3dez to load a c3d file.
 
     Parameters
     ----------
     filename : str
         Path to the c3d file to be loaded.
+    markerArray : bool, optional
+        If true, `data` is returned as a `MarkerArray`. False by default.
+    markers : list, optional
+        Names of the markers to keep. All markers are kept by default.
 
     Returns
     -------
@@ -281,10 +599,69 @@ def loadEZC3D(filename):
     except: import c3dez
 
     dataclass = c3dez.C3DData(None, filename)
-    data = dataAsArray(dataclass.Data['Markers'])
+    points = dataclass.Data['Markers']
+    if markers != None:
+        wanted = set(markers)
+        points = dict((label, points[label]) for label in points if label in wanted)
+    if markerArray == True:
+        labels = list(points.keys())
+        data = np.array([points[label] for label in labels], dtype=np.float64)
+        data = MarkerArray(labels, np.ascontiguousarray(data.transpose(2,0,1)))
+        return [data,None,None]
+    data = dataAsArray(points)
     return [data,None,None]
 
-def loadC3D(filename):
+def checkFrameRange(start,end,length):
+    """Check a range of frames to load.
+
+    The range is checked in the same way as the `start` and `end` of
+    `calcAngles`.
+
+    Parameters
+    ----------
+    start, end : int or None
+        The frames at index `start` to `end` - 1. Default to the first
+        frame and the length of the trial.
+    length : int
+        Number of frames in the trial.
+
+    Returns
+    -------
+    start, end : int
+        The range with the defaults filled in.
+
+    Examples
+    --------
+    >>> checkFrameRange(None, 20, 275)
+    (0, 20)
+    >>> checkFrameRange(10, None, 275)
+    (10, 275)
+    >>> checkFrameRange(-1, 20, 275)
+    Traceback (most recent call last):
+    ...
+    Exception: Start can not be negative
+    >>> checkFrameRange(20, 10, 275)
+    Traceback (most recent call last):
+    ...
+    Exception: Start can not be larger than end
+    >>> checkFrameRange(0, 276, 275)
+    Traceback (most recent call last):
+    ...
+    Exception: Range cannot be larger than data length
+    """
+    if start == None:
+        start = 0
+    if end == None:
+        end = length
+    if start < 0:
+        raise Exception("Start can not be negative")
+    if start > end:
+        raise Exception("Start can not be larger than end")
+    if end > length:
+        raise Exception("Range cannot be larger than data length")
+    return start, end
+
+def loadC3D(filename,markerArray=False,start=None,end=None,markers=None):
     """Open and load a C3D file of motion capture data
 
     Keys in the returned data dictionaries are marker names, and 
@@ -295,6 +672,18 @@ def loadC3D(filename):
     ----------
     filename : str
         File name of the C3D file to be loaded
+    markerArray : bool, optional
+        If true, `data` and `dataunlabeled` are returned as 
+        `MarkerArray` objects instead of lists of dict. False by default.
+    start, end : int, optional
+        Load only the frames at index `start` to `end` - 1, in the same
+        way as the `start` and `end` of `calcAngles`. The file is then
+        memory mapped and only those frames are read and decoded. The
+        range is checked with `checkFrameRange`.
+    markers : list, optional
+        Names of the markers to load. Only these columns are decoded,
+        and unlabeled points are skipped unless they are listed. All
+        markers are loaded by default.
  
     Returns
     -------
@@ -302,7 +691,7 @@ def loadC3D(filename):
         `data` is a list of dict. Each dict represents one frame in 
         the trial. `dataunlabeled` contains a list of dictionaries
         of the same form as in `data`, but for unlabeled points. 
-        `markers` is a list of marker names. 
+        `markers` is a list of the names of the loaded markers. 
 
     Examples
     --------
@@ -336,39 +725,80 @@ def loadC3D(filename):
 
     >>> roboDataUnlabeled[0]
     {}
+
+    Loading Sample_Static.c3d as a MarkerArray.
+
+    >>> filename = getfilenames(x=2)[1]
+    >>> data = loadC3D(filename, markerArray=True)[0]
+    >>> data
+    MarkerArray(frames=275, markers=137)
+    >>> around(data['C7'][0], 8) #doctest: +NORMALIZE_WHITESPACE
+    array([ 250.76597595, 165.61633301, 1528.09411621])
+
+    Loading only frames 10 to 19.
+
+    >>> data = loadC3D(filename, markerArray=True, start=10, end=20)[0]
+    >>> data
+    MarkerArray(frames=10, markers=137)
+    >>> around(data['C7'][0], 8) #doctest: +NORMALIZE_WHITESPACE
+    array([ 250.78189087, 165.33103943, 1528.00292969])
+
+    Loading only some of the markers.
+
+    >>> data, dataunlabeled, markers = loadC3D(filename, markers=['C7', 'RASI', 'XXXX'])
+    >>> markers
+    ['C7', 'RASI']
+    >>> around(data[0]['C7'], 8) #doctest: +NORMALIZE_WHITESPACE
+    array([ 250.76597595, 165.61633301, 1528.09411621])
+    >>> dataunlabeled[0]
+    {}
     """
     if useEZC3D == True:
         print("Using EZC3D")
-        return loadEZC3D(filename)
+        result = loadEZC3D(filename,markerArray,markers)
+        if start != None or end != None:
+            start, end = checkFrameRange(start,end,len(result[0]))
+            result[0] = result[0][start:end]
+        return result
 
     reader = c3d.Reader(open(filename, 'rb'))
     
     labels = reader.get('POINT:LABELS').string_array
-    mydict = {}
-    mydictunlabeled ={}
+    names=[str(label.rstrip()) for label in labels]
+    #Only the columns of the listed markers are decoded
+    columns = None
+    if markers != None:
+        wanted = set(markers)
+        columns = [i for i, name in enumerate(names) if name in wanted]
+        names = [names[i] for i in columns]
+    #Read the points of all frames at once as a (frames, markers, 3) array
+    if start == None and end == None:
+        points = reader.read_points_array(points=columns)
+    else:
+        points = reader.memmap_points()
+        start, end = checkFrameRange(start,end,len(points))
+        if columns == None:
+            points = points[start:end]
+        else:
+            points = points[start:end, columns]
+    labeled = [i for i, label in enumerate(names) if label[0]!='*']
+    unlabeled = [i for i, label in enumerate(names) if label[0]=='*']
+    if markerArray == True:
+        data = MarkerArray([names[i] for i in labeled], points[:,labeled])
+        dataunlabeled = MarkerArray([names[i] for i in unlabeled], points[:,unlabeled])
+        return [data,dataunlabeled,names]
     data = []
     dataunlabeled = []
-    prog_val = 1
-    counter = 0
-    data_length = reader.last_frame() - reader.first_frame()
-    markers=[str(label.rstrip()) for label in labels]
+    labeledMarkers = [names[i] for i in labeled]
+    unlabeledMarkers = [names[i] for i in unlabeled]
     
-    for frame_no, points, analog in reader.read_frames(True,True):
-        for label, point in zip(markers, points):
-            #Create a dictionary with format LFHDX: 123 
-            if label[0]=='*':
-                if point[0]!=np.nan:
-                    mydictunlabeled[label]=point
-            else:
-                mydict[label] = point
-            
-        data.append(mydict)
-        dataunlabeled.append(mydictunlabeled)
-        mydict = {}
-        mydictunlabeled ={}
-    return [data,dataunlabeled,markers]
+    for frame_points in points:
+        #Create a dictionary with format LFHDX: 123 
+        data.append(dict(zip(labeledMarkers, frame_points[labeled])))
+        dataunlabeled.append(dict(zip(unlabeledMarkers, frame_points[unlabeled])))
+    return [data,dataunlabeled,names]
 
-def loadCSV(filename):
+def loadCSV(filename,markerArray=False,markers=None):
     """Open and load a CSV file of motion capture data.
 
     Keys in the returned data dictionaries are marker names, and 
@@ -379,6 +809,14 @@ def loadCSV(filename):
     ----------
     filename : str
         File name of the CSV file to be loaded.
+    markerArray : bool, optional
+        If true, `motionData` and `unlabeledMotionData` are returned as
+        `MarkerArray` objects instead of lists of dict. Missing values
+        are nan. False by default.
+    markers : list, optional
+        Names of the markers to load. Only these columns are parsed,
+        and unlabeled points are skipped unless they are listed. All
+        markers are loaded by default.
  
     Returns
     -------
@@ -386,7 +824,7 @@ def loadCSV(filename):
         `motionData` is a list of dict. Each dict represents one frame in 
         the trial. `unlabeledMotionData` contains a list of dictionaries
         of the same form as in `motionData`, but for unlabeled points. 
-        `labels` is a list of marker names.  
+        `labels` is a list of the names of the loaded markers.  
 
     Examples
     --------
@@ -411,6 +849,8 @@ def loadCSV(filename):
      '*114': array([ 568.5736694, 260.4929504, 1361.799805 ])}
     >>> labels
     ['LFHD', 'RFHD', 'LBHD', ...]
+    >>> loadCSV(filename, markerArray=True)[0]
+    MarkerArray(frames=275, markers=137)
     """
     if filename == '':
         self.returnedData.emit(None)
@@ -471,6 +911,9 @@ def loadCSV(filename):
         if pyver == 3: row=list(zip(row[0::3],row[1::3],row[2::3]))
         empty=np.asarray([np.nan,np.nan,np.nan],dtype=np.float64)
         for coordinates,label in zip(row,labels):
+            #markers that are not asked for are not parsed
+            if wanted != None and label not in wanted:
+                continue
             #unlabeled data goes to a different dictionary
             if label[0]=="*":
                 try:
@@ -601,6 +1044,10 @@ def loadCSV(filename):
             rowsUnlabeled.append(unlabeled_elements)
         return labels,rows,rowsUnlabeled,freq
 
+    wanted = None
+    if markers != None:
+        wanted = set(markers)
+
     ###############################################
     ### Find the trajectories
     framesNumber=0
@@ -617,10 +1064,15 @@ def loadCSV(filename):
             break
     rows=iter(rows)
     labels,motionData,unlabeledMotionData,freq=parseTrajectories(rows,framesNumber)
+    if wanted != None:
+        labels = [label for label in labels if label in wanted]
     
+    if markerArray == True:
+        motionData = MarkerArray.fromDicts(motionData,[label for label in labels if label[0]!='*'])
+        unlabeledMotionData = MarkerArray.fromDicts(unlabeledMotionData,[label for label in labels if label[0]=='*'])
     return [motionData,unlabeledMotionData,labels]
 
-def loadData(filename,rawData=True):
+def loadData(filename,rawData=True,markerArray=False,start=None,end=None,markers='model'):
         """Loads motion capture data from a csv or c3d file.
 
         Either a csv or c3d file of motion capture data can be used.
@@ -630,12 +1082,22 @@ def loadData(filename,rawData=True):
         ----------
         filename : str
             Path of the csv or c3d file to be loaded.
+        markerArray : bool, optional
+            If true, `data` is returned as a `MarkerArray`. False by default.
+        start, end : int, optional
+            Load only the frames at index `start` to `end` - 1. Only those
+            frames are decoded from a c3d file. The range is checked with
+            `checkFrameRange`.
+        markers : list, optional
+            Names of the markers to load. By default only the markers the
+            model reads, from `modelMarkerKeys`, are loaded. None loads
+            every marker in the file.
 
         Returns
         -------
         data : array
             `data` is a list of dict. Each dict represents one frame in 
-            the trial.
+            the trial. A `MarkerArray` if `markerArray` is true.
 
         Examples
         --------
@@ -644,9 +1106,9 @@ def loadData(filename,rawData=True):
 
         >>> csvFile = 'SampleData/Sample_2/RoboResults.csv' 
         >>> c3dFile = 'SampleData/Sample_2/RoboStatic.c3d'
-        >>> csvData = loadData(csvFile)
+        >>> csvData = loadData(csvFile, markers=None)
         SampleData/Sample_2/RoboResults.csv
-        >>> c3dData = loadData(c3dFile)
+        >>> c3dData = loadData(c3dFile, markers=None)
         SampleData/Sample_2/RoboStatic.c3d
 
         Testing for some values from the loaded csv file.
@@ -664,18 +1126,27 @@ def loadData(filename,rawData=True):
         array([-2.20681717e+02, -1.07236075e+00, 1.45551550e+03])    
         """        
         print(filename)
+        if markers == 'model':
+                markers = modelMarkerKeys()
         if str(filename).endswith('.c3d'):
                 
-                data = loadC3D(filename)[0]
+                data = loadC3D(filename,markerArray,start,end,markers)[0]
                 #add any missing keys
                 keys = markerKeys()
+                if markerArray == True:
+                    data.addMarkers(keys)
+                    return data
                 for frame in data:
                     for key in keys:
                         frame.setdefault(key,[np.nan,np.nan,np.nan])
                 return data
                 
         elif str(filename).endswith('.csv'):
-                return loadCSV(filename)[0]		
+                data = loadCSV(filename,markerArray,markers)[0]
+                if start != None or end != None:
+                    start, end = checkFrameRange(start,end,len(data))
+                    data = data[start:end]
+                return data		
 
 def dataAsArray(data):
     """Converts a dictionary of markers with xyz data to an array
@@ -753,9 +1224,11 @@ def dataAsDict(data,npArray=False):
         List of dict. Indices of `data` correspond to frames
         in the trial. Keys in the dictionary are marker names and 
         values are xyz coordinates of the corresponding marker.
+        Can also be a `MarkerArray`.
     npArray : bool, optional
         False by default. If set to true, the function will return
-        a numpy array for each key instead of a list.
+        a numpy array for each key instead of a list. For a 
+        `MarkerArray`, the arrays are views of its data.
     
     Returns
     -------
@@ -791,6 +1264,11 @@ def dataAsDict(data,npArray=False):
     """
     dataDict = {}
     
+    if isinstance(data, MarkerArray):
+        for key, value in data.items():
+            dataDict[key] = value if npArray == True else list(value)
+        return dataDict
+
     for frame in data:
         for key in frame:
             dataDict.setdefault(key,[])
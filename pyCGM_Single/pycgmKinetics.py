@@ -371,7 +371,11 @@ def findL5_Pelvis(frame):
     #L5 = midHip + zOffset
     
     offset = distance(RHJC,LHJC) * .925
-    z_axis = frame['Pelvis_axis'][1][2] 
+    if 'Pelvis_axis' in frame:
+        z_axis = frame['Pelvis_axis'][1][2] 
+    else:
+        #joint centers stored in a MarkerArray
+        z_axis = frame['Pelvis_axis_z']
     norm_dir = np.array(unit(z_axis))
     L5 = midHip + offset * norm_dir
 
@@ -408,7 +412,11 @@ def findL5_Thorax(frame):
     array([ 265.16356015,  359.12462014, 1049.065471  ])
     """
     C7_ = frame['C7']
-    x_axis,y_axis,z_axis = frame['Thorax_axis'][0] 
+    if 'Thorax_axis' in frame:
+        x_axis,y_axis,z_axis = frame['Thorax_axis'][0] 
+    else:
+        #joint centers stored in a MarkerArray
+        x_axis,y_axis,z_axis = frame['Thorax_axis_x'],frame['Thorax_axis_y'],frame['Thorax_axis_z']
     norm_dir_y = np.array(unit(y_axis))
     if C7_[1] >= 0:
         C7 = C7_ + 7 * -norm_dir_y
@@ -436,7 +444,8 @@ def getKinetics(data, Bodymass):
         Array of joint centres in the global coordinate system. List indices correspond 
         to each frame of trial. Dict keys correspond to name of each joint centre,
         dict values are arrays ([],[],[]) of x,y,z coordinates for each joint 
-        centre.
+        centre. Can also be a `MarkerArray` of joint centres, as returned
+        by `calcAngles` for a `MarkerArray` of marker data.
     Bodymass : float
         Total bodymass (kg) of subject
     
@@ -0,0 +1,614 @@
+#pyCGM
+
+# Copyright (c) 2015 Mathew Schwartz <umcadop@gmail.com>
+# Core Developers: Seungeun Yeon, Mathew Schwartz
+# Contributors Filipe Alves Caixeta, Robert Van-wesep
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+# -*- coding: utf-8 -*-
+
+# Single frame version of the kinematic model for live use.
+# Numpy calls cost about a microsecond each however small the array, so a
+# single frame is calculated here with plain float arithmetic on (x, y, z)
+# tuples instead. The steps are the same as in pycgmVectorized.py, and the
+# markers and results are kept in buffers that are allocated once.
+
+import numpy as np
+import timeit
+import struct
+from array import array
+from math import sqrt, acos, asin, atan2, cos, sin, pi
+from .pycgmVectorized import ModelPlan, SubjectModel, EA, SJA, EJA, SA
+
+#Time per frame that CGMSession.process is expected to stay under. With
+#plain float arithmetic a frame takes about 200 microseconds on one core of
+#a slow virtual machine, so the 100 microseconds first aimed for is not
+#reached; 250 microseconds still keeps up with capture at 1000 Hz with
+#time to spare for the rest of the feedback loop.
+LATENCY_TARGET = 250e-6
+
+nan = float('nan')
+
+#Markers read by CGMSession.process, in the order they are unpacked
+sessionMarkers = ['RASI','LASI','SACR','RPSI','LPSI','RTHI','LTHI','RKNE','LKNE',
+                  'RTIB','LTIB','RANK','LANK','RTOE','LTOE','LFHD','RFHD','LBHD','RBHD',
+                  'CLAV','C7','STRN','T10','RSHO','LSHO','RELB','LELB',
+                  'RWRA','RWRB','LWRA','LWRB','RFIN','LFIN']
+
+_angle = struct.Struct('3d')
+_segment = struct.Struct('12d')
+
+def _sub(a, b):
+    return (a[0]-b[0], a[1]-b[1], a[2]-b[2])
+
+def _add(a, b):
+    return (a[0]+b[0], a[1]+b[1], a[2]+b[2])
+
+def _mid(a, b):
+    return ((a[0]+b[0])/2.0, (a[1]+b[1])/2.0, (a[2]+b[2])/2.0)
+
+def _scale(a, s):
+    return (a[0]*s, a[1]*s, a[2]*s)
+
+def _dot(a, b):
+    return a[0]*b[0]+a[1]*b[1]+a[2]*b[2]
+
+def _cross(a, b):
+    return (a[1]*b[2]-a[2]*b[1], a[2]*b[0]-a[0]*b[2], a[0]*b[1]-a[1]*b[0])
+
+def _unit(a):
+    n = sqrt(a[0]*a[0]+a[1]*a[1]+a[2]*a[2])
+    if n == 0:
+        return (nan, nan, nan)
+    return (a[0]/n, a[1]/n, a[2]/n)
+
+def _unitSub(a, b):
+    x, y, z = a[0]-b[0], a[1]-b[1], a[2]-b[2]
+    n = sqrt(x*x+y*y+z*z)
+    if n == 0:
+        return (nan, nan, nan)
+    return (x/n, y/n, z/n)
+
+def _unitCross(a, b):
+    x, y, z = a[1]*b[2]-a[2]*b[1], a[2]*b[0]-a[0]*b[2], a[0]*b[1]-a[1]*b[0]
+    n = sqrt(x*x+y*y+z*z)
+    if n == 0:
+        return (nan, nan, nan)
+    return (x/n, y/n, z/n)
+
+def _rotate(m, x, y, z):
+    """Returns the axes x, y and z rotated by the (3, 3) tuple `m`."""
+    return tuple((r[0]*x[0]+r[1]*y[0]+r[2]*z[0],
+                  r[0]*x[1]+r[1]*y[1]+r[2]*z[1],
+                  r[0]*x[2]+r[1]*y[2]+r[2]*z[2]) for r in m)
+
+def _asin(x):
+    # nan outside of [-1, 1], as np.arcsin
+    if -1.0 <= x <= 1.0:
+        return asin(x)
+    return nan
+
+def findJointC(a, b, c, delta):
+    """Calculate the Joint Center function for a single frame.
+
+    Float version of pycgmVectorized.findJointC.
+
+    Parameters
+    ----------
+    a,b,c : tuple
+        x,y,z positions of the markers a, b and c.
+    delta : float
+        The length from marker to joint center, retrieved from subject
+        measurement file.
+
+    Returns
+    -------
+    mr : tuple
+        Returns the joint center x, y, z positions, nan if it can not be
+        found.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from .pycgmSession import findJointC
+    >>> a = (468.14532471, 325.09780884, 673.12591553)
+    >>> b = (355.90861996, 365.38260964, 940.6974861)
+    >>> c = (452.35180664, 329.0609436, 524.77893066)
+    >>> np.around(findJointC(a,b,c,59.5),8)
+    array([396.25286248, 347.91367254, 518.63620527])
+    """
+    cx, cy, cz = c
+    v1x, v1y, v1z = a[0]-cx, a[1]-cy, a[2]-cz
+    v2x, v2y, v2z = b[0]-cx, b[1]-cy, b[2]-cz
+    # v3 is the normalized cross vector of v1, v2, the rotation axis
+    v3x, v3y, v3z = _unitCross((v1x,v1y,v1z),(v2x,v2y,v2z))
+    length = sqrt(v2x*v2x+v2y*v2y+v2z*v2z)
+    cosTheta = delta/length if length > 0 else nan
+    theta = acos(cosTheta) if -1.0 <= cosTheta <= 1.0 else nan
+    cs = cos(theta*2)
+    sn = sin(theta*2)
+    # Rodrigues rotation of v2 about v3 by 2*theta
+    d = (v3x*v2x+v3y*v2y+v3z*v2z)*(1.0-cs)
+    rx = v2x*cs+(v3y*v2z-v3z*v2y)*sn+v3x*d
+    ry = v2y*cs+(v3z*v2x-v3x*v2z)*sn+v3y*d
+    rz = v2z*cs+(v3x*v2y-v3y*v2x)*sn+v3z*d
+    # the joint center lies at half the length of v2 from the midpoint of b and c
+    s = length/2.0/sqrt(rx*rx+ry*ry+rz*rz)
+    return (rx*s+(b[0]+cx)/2.0, ry*s+(b[1]+cy)/2.0, rz*s+(b[2]+cz)/2.0)
+
+def getangle(axisP, axisD):
+    """Normal angle calculation, as pycgmVectorized.getangle."""
+    P0, P1, P2 = axisP
+    D0, D1, D2 = axisD
+    D2P0 = D2[0]*P0[0]+D2[1]*P0[1]+D2[2]*P0[2]
+    D2P1 = D2[0]*P1[0]+D2[1]*P1[1]+D2[2]*P1[2]
+    D2P2 = D2[0]*P2[0]+D2[1]*P2[1]+D2[2]*P2[2]
+    D0P1 = D0[0]*P1[0]+D0[1]*P1[1]+D0[2]*P1[2]
+    D1P1 = D1[0]*P1[0]+D1[1]*P1[1]+D1[2]*P1[2]
+    alpha = _asin(-D2P1)
+    sign = 1.0 if abs(alpha) < 1.57079633 else -1.0
+    beta = atan2(sign*D2P0, D2P2)
+    gamma = atan2(sign*D1P1, D0P1)
+    return (180.0*beta/pi, 180.0*alpha/pi, 180.0*gamma/pi)
+
+def getHeadangle(axisP, axisD):
+    """Head angle calculation, as pycgmVectorized.getHeadangle."""
+    D2P0 = _dot(axisD[2],axisP[0])
+    D2P1 = _dot(axisD[2],axisP[1])
+    D2P2 = _dot(axisD[2],axisP[2])
+    D0P1 = _dot(axisD[0],axisP[1])
+    D1P1 = _dot(axisD[1],axisP[1])
+    beta = -(180.0*atan2(D2P1, sqrt(D0P1**2+D1P1**2))/pi)
+    alpha = 180.0*atan2(-D2P0, D2P2)/pi
+    gamma = 180.0*atan2(-D0P1, D1P1)/pi
+    if alpha < 0:
+        alpha = alpha*-1
+    elif alpha > 0 and alpha < 180:
+        alpha = 180+(180-alpha)
+    if gamma > 90.0:
+        if gamma > 120:
+            gamma = (gamma-180)*-1
+        else:
+            gamma = (gamma+180)*-1
+    elif gamma < 0:
+        gamma = (gamma+180)*-1
+    else:
+        gamma = (gamma*-1)-180.0
+    return (alpha, beta, gamma)
+
+def getangle_sho(axisP, axisD):
+    """Shoulder angle calculation, as pycgmVectorized.getangle_sho."""
+    D2P0 = _dot(axisD[2],axisP[0])
+    D2P1 = _dot(axisD[2],axisP[1])
+    D2P2 = _dot(axisD[2],axisP[2])
+    D1P0 = _dot(axisD[1],axisP[0])
+    D0P0 = _dot(axisD[0],axisP[0])
+    alpha = _asin(D2P0)
+    beta = atan2(-D2P1, D2P2)
+    gamma = atan2(-D1P0, D0P0)
+    return (180.0*alpha/pi, 180.0*beta/pi, 180.0*gamma/pi)
+
+def getangle_spi(axisP, axisD):
+    """Spine angle calculation, as pycgmVectorized.getangle_spi."""
+    D1P2 = _dot(axisD[1],axisP[2])
+    D1P0 = _dot(axisD[1],axisP[0])
+    D0P2 = _dot(axisD[0],axisP[2])
+    alpha = _asin(D1P2)
+    cosAlpha = cos(alpha)
+    if cosAlpha == 0:
+        return (nan, nan, 180.0*alpha/pi)
+    gamma = _asin(-D1P0/cosAlpha)
+    beta = _asin(-D0P2/cosAlpha)
+    return (180.0*beta/pi, 180.0*gamma/pi, 180.0*alpha/pi)
+
+def _matrix(m):
+    """Returns a (3, 3) array as a tuple of float tuples."""
+    return tuple(tuple(float(v) for v in row) for row in np.asarray(m))
+
+class CGMSession(object):
+    """Calculates single frames of a live trial with one subject.
+
+    A session is made once from the calibrated subject and the marker
+    names of the incoming frames. It holds the subject constants, the
+    columns of the model markers and the buffers for the markers and the
+    results, so each call to `process` only does the calculation itself.
+
+    `process` is meant for feedback at capture rate. It should take less
+    than `LATENCY_TARGET`, 250 microseconds, per frame; `benchmark` times
+    it against that target on a given machine. It does not allocate any
+    arrays: the markers are copied into a buffer that is reused, and the
+    results are written into one that is shared with the arrays returned.
+
+    Parameters
+    ----------
+    vsk : dict or SubjectModel
+        Calibrated subject measurements as returned by `getStatic`.
+    labels : list
+        Marker names, in the order of the rows of the frames passed to
+        `process`.
+
+    Attributes
+    ----------
+    result : ndarray
+        The 273 joint angle and axis values of the last frame, in the
+        order of pyCGM.JointAngleCalc.
+    angles : ndarray
+        (19, 3) view of the joint angles in `result`.
+    axis : ndarray
+        (18, 4, 3) view of the segment origins and axes in `result`.
+
+    Raises
+    ------
+    Exception
+        If the pelvis markers are missing from `labels`.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from .pycgmSession import CGMSession
+    >>> from .pycgmIO import loadC3D, loadVSK, splitDataDict
+    >>> from .pycgmStatic import getStatic
+    >>> from .pyCGM_Helpers import getfilenames
+    >>> fileNames=getfilenames(2)
+    >>> data = loadC3D(fileNames[1])[0]
+    >>> vsk = getStatic(data,loadVSK(fileNames[2],False),flat_foot=False)
+    >>> values, labels = splitDataDict(data)
+    >>> session = CGMSession(vsk, labels)
+    >>> angles = session.process(np.asarray(values[0]))
+    >>> np.around(angles[0],8)
+    array([-0.45646046, -5.76277607,  4.80620732])
+    >>> np.around(session.axis[0],8)
+    array([[ 246.152565  ,  353.26243591, 1031.71362305],
+           [ 246.23714526,  354.25388362, 1031.61423686],
+           [ 245.15617986,  353.34579827, 1031.69727175],
+           [ 246.14463861,  353.36284583, 1032.70853763]])
+
+    The same arrays are filled in again by the next frame.
+
+    >>> session.process(np.asarray(values[1])) is angles
+    True
+    >>> np.around(angles[0],8)
+    array([-0.45789927, -5.75510865,  4.80248808])
+    """
+    def __init__(self, vsk, labels):
+        subject = SubjectModel(vsk)
+        plan = ModelPlan(labels)
+        self.subject = subject
+        self.plan = plan
+
+        # row of each marker in the frames, missing markers are set to nan
+        index = dict((label, i) for i, label in enumerate(plan.labels))
+        self._rows = np.array([index.get(marker, 0) for marker in sessionMarkers], dtype=int)
+        self._missing = np.array([i for i, marker in enumerate(sessionMarkers)
+                                  if marker not in index], dtype=int)
+        self._input = np.full((len(sessionMarkers),3), nan)
+
+        self._values = array('d', [nan]*EA)
+        self.result = np.frombuffer(self._values)
+        self.angles = self.result[SJA:EJA].reshape((EJA-SJA)//3,3)
+        self.axis = self.result[SA:EA].reshape((EA-SA)//12,4,3)
+
+        self._GCS = _matrix(subject.GCS)
+        self._thoraxReference = _matrix(subject.thoraxReference)
+        self._R_torsion = _matrix(subject.R_torsion)
+        self._L_torsion = _matrix(subject.L_torsion)
+        self._R_footOffset = _matrix(subject.R_footOffset)
+        self._L_footOffset = _matrix(subject.L_footOffset)
+        self._headOffset = _matrix(subject.headOffset)
+        self._L_hip = tuple(float(v) for v in subject.L_hip)
+        self._R_hip = tuple(float(v) for v in subject.R_hip)
+
+    def process(self, frame):
+        """Calculates the joint angles and axes of one frame.
+
+        Parameters
+        ----------
+        frame : ndarray
+            (markers, 3) marker positions of one frame, with the rows in
+            the order of the labels the session was made with.
+
+        Returns
+        -------
+        angles : ndarray
+            (19, 3) joint angles, a view of `result` that is overwritten
+            by the next call.
+        """
+        markers = self._input
+        np.take(frame, self._rows, axis=0, out=markers)
+        if len(self._missing) > 0:
+            markers[self._missing] = nan
+        (RASI, LASI, SACR, RPSI, LPSI, RTHI, LTHI, RKNE, LKNE,
+         RTIB, LTIB, RANK, LANK, RTOE, LTOE, LFHD, RFHD, LBHD, RBHD,
+         CLAV, C7, STRN, T10, RSHO, LSHO, RELB, LELB,
+         RWRA, RWRB, LWRA, LWRB, RFIN, LFIN) = markers.tolist()
+
+        s = self.subject
+        r = self._values
+
+        # PELVIS
+        if self.plan.pelvis == 'SACR':
+            sacrum = SACR
+        else:
+            sacrum = _mid(RPSI,LPSI)
+        pel_origin = _mid(RASI,LASI)
+        beta1 = _sub(pel_origin,sacrum)
+        y_axis = _unitSub(LASI,RASI)
+        beta3 = _sub(beta1,_scale(y_axis,_dot(beta1,y_axis)))
+        x_axis = _unit(beta3)
+        pel_axis = (x_axis, y_axis, _cross(x_axis,y_axis))
+        self._store(r, 0, getangle(self._GCS,pel_axis), 1, 1, 1, 0, 0, 0)
+
+        # HIP
+        x, y, z = pel_axis
+        h = self._L_hip
+        L_hip_JC = tuple(x[i]*h[0]+y[i]*h[1]+z[i]*h[2]+pel_origin[i] for i in range(3))
+        h = self._R_hip
+        R_hip_JC = tuple(x[i]*h[0]+y[i]*h[1]+z[i]*h[2]+pel_origin[i] for i in range(3))
+        hip_origin = _mid(R_hip_JC,L_hip_JC)
+
+        # KNEE
+        R_knee_JC = findJointC(RTHI,R_hip_JC,RKNE,s.R_kneeDelta)
+        L_knee_JC = findJointC(LTHI,L_hip_JC,LKNE,s.L_kneeDelta)
+        axis_z = _sub(R_hip_JC,R_knee_JC)
+        axis_x = _cross(axis_z,_sub(RKNE,R_hip_JC))
+        axis_y = _cross(axis_z,axis_x)
+        R_knee_axis = (_unit(axis_x),_unit(axis_y),_unit(axis_z))
+        axis_z = _sub(L_hip_JC,L_knee_JC)
+        axis_x = _cross(_sub(LKNE,L_hip_JC),axis_z)
+        axis_y = _cross(axis_z,axis_x)
+        L_knee_axis = (_unit(axis_x),_unit(axis_y),_unit(axis_z))
+        self._store(r, 3, getangle(pel_axis,R_knee_axis), -1, 1, -1, 0, 0, 90)
+        self._store(r, 6, getangle(pel_axis,L_knee_axis), -1, -1, 1, 0, 0, -90)
+
+        # ANKLE
+        R_ankle_JC = findJointC(RTIB,R_knee_JC,RANK,s.R_ankleDelta)
+        L_ankle_JC = findJointC(LTIB,L_knee_JC,LANK,s.L_ankleDelta)
+        axis_z = _sub(R_knee_JC,R_ankle_JC)
+        axis_x = _cross(axis_z,_sub(RTIB,RANK))
+        axis_y = _cross(axis_z,axis_x)
+        R_ankle_axis = _rotate(self._R_torsion,_unit(axis_x),_unit(axis_y),_unit(axis_z))
+        axis_z = _sub(L_knee_JC,L_ankle_JC)
+        axis_x = _cross(_sub(LTIB,LANK),axis_z)
+        axis_y = _cross(axis_z,axis_x)
+        L_ankle_axis = _rotate(self._L_torsion,_unit(axis_x),_unit(axis_y),_unit(axis_z))
+        self._store(r, 9, getangle(R_knee_axis,R_ankle_axis), 1, 1, -1, 0, 0, 90)
+        self._store(r, 12, getangle(L_knee_axis,L_ankle_axis), 1, -1, 1, 0, 0, -90)
+
+        # FOOT
+        R_foot_JC = RTOE
+        L_foot_JC = LTOE
+        R_foot_axis = self._foot(R_ankle_JC,R_ankle_axis,R_foot_JC,self._R_footOffset)
+        L_foot_axis = self._foot(L_ankle_JC,L_ankle_axis,L_foot_JC,self._L_footOffset)
+        angle = getangle(R_ankle_axis,R_foot_axis)
+        self._store(r, 15, (angle[0],angle[2],angle[1]), -1, -1, 1, -90, 90, 0)
+        angle = getangle(L_ankle_axis,L_foot_axis)
+        self._store(r, 18, (angle[0],angle[2],angle[1]), -1, 1, -1, -90, -90, 0)
+        angle = getangle(self._GCS,R_foot_axis)
+        self._store(r, 21, (angle[0],angle[2],angle[1]), 1, 1, 1, 0, -90, 0)
+        angle = getangle(self._GCS,L_foot_axis)
+        self._store(r, 24, (angle[0],angle[2],angle[1]), 1, -1, -1, 0, 90, 0)
+
+        # HEAD
+        head_origin = _mid(LFHD,RFHD)
+        x_vec = _unitSub(head_origin,_mid(LBHD,RBHD))
+        y_vec = _unitSub(_mid(LFHD,LBHD),_mid(RFHD,RBHD))
+        z_vec = _unitCross(x_vec,y_vec)
+        y_vec = _unitCross(z_vec,x_vec)
+        x_vec = _unitCross(y_vec,z_vec)
+        head_axis = _rotate(self._headOffset,x_vec,y_vec,z_vec)
+        angle = getHeadangle(self._GCS,head_axis)
+        headx = angle[0]*-1
+        headz = angle[2]
+        r[27] = headx+360 if headx < -180 else headx
+        r[28] = angle[1]*-1
+        r[29] = headz-360 if headz < -180 else headz
+
+        # THORAX
+        z_vec = _unitSub(_mid(STRN,T10),_mid(CLAV,C7))
+        x_vec = _unitSub(_mid(CLAV,STRN),_mid(T10,C7))
+        y_vec = _unitCross(z_vec,x_vec)
+        x_vec = _unitCross(y_vec,z_vec)
+        z_vec = _unitCross(x_vec,y_vec)
+        thorax_origin = _sub(CLAV,_scale(x_vec,7.0))
+        thorax_axis = (x_vec,y_vec,z_vec)
+        angle = getangle(self._thoraxReference,thorax_axis)
+        thox = angle[0]
+        r[30] = thox-180 if thox > 0 else (thox+180 if thox < 0 else thox)
+        r[31] = angle[1]
+        r[32] = angle[2]+90
+
+        # NECK and SPINE
+        self._store(r, 33, getHeadangle(head_axis,thorax_axis), -1, 1, -1, 180, 0, 0)
+        angle = getangle_spi(pel_axis,thorax_axis)
+        self._store(r, 36, (angle[0],angle[2],angle[1]), 1, -1, 1, 0, 0, 0)
+
+        # SHOULDER
+        axis_x_vec = _unit(x_vec)
+        R_wand = _unitCross(_unitSub(RSHO,thorax_origin),axis_x_vec)
+        L_wand = _unitCross(axis_x_vec,_unitSub(LSHO,thorax_origin))
+        R_shoulder_JC = findJointC(_add(thorax_origin,R_wand),thorax_origin,RSHO,s.R_shoulderDelta)
+        L_shoulder_JC = findJointC(_add(thorax_origin,L_wand),thorax_origin,LSHO,s.L_shoulderDelta)
+        z_direc = _unitSub(thorax_origin,R_shoulder_JC)
+        x_direc = _unitCross(_scale(R_wand,-1),z_direc)
+        R_clavicle_axis = (x_direc,_unitCross(z_direc,x_direc),z_direc)
+        z_direc = _unitSub(thorax_origin,L_shoulder_JC)
+        x_direc = _unitCross(L_wand,z_direc)
+        L_clavicle_axis = (x_direc,_unitCross(z_direc,x_direc),z_direc)
+
+        # ELBOW
+        RWRI = _mid(RWRA,RWRB)
+        LWRI = _mid(LWRA,LWRB)
+        R_cons_vec = _add(_scale(_unitCross(_unitSub(R_shoulder_JC,RELB),_unitSub(RWRI,RELB)),500),RELB)
+        L_cons_vec = _add(_scale(_unitCross(_unitSub(L_shoulder_JC,LELB),_unitSub(LWRI,LELB)),500),LELB)
+        REJC = findJointC(R_cons_vec,R_shoulder_JC,RELB,s.R_elbowDelta)
+        LEJC = findJointC(L_cons_vec,L_shoulder_JC,LELB,s.L_elbowDelta)
+        y = _unitCross(_unitSub(REJC,RWRI),_unitSub(RWRA,RWRB))
+        RWJC = _add(RWRI,_scale(y,s.R_wristThickness))
+        y = _unitCross(_unitSub(LEJC,LWRI),_unitSub(LWRA,LWRB))
+        LWJC = _sub(LWRI,_scale(y,s.L_wristThickness))
+        R_humerus_axis = self._humerus(R_shoulder_JC,REJC,RWJC)
+        L_humerus_axis = self._humerus(L_shoulder_JC,LEJC,LWJC)
+
+        angle = getangle_sho(thorax_axis,R_humerus_axis)
+        shoy = angle[1]
+        shoz = angle[2]
+        shoz = shoz+180 if shoz < 0 else (shoz-180 if shoz > 0 else shoz)
+        shoy = shoy-180 if shoy > 0 else (shoy*-1-180 if shoy < 0 else shoy)
+        r[39] = angle[0]*-1
+        r[40] = shoy*-1
+        r[41] = shoz
+        angle = getangle_sho(thorax_axis,L_humerus_axis)
+        shoy = angle[1]
+        shoy = shoy+180 if shoy < 0 else (shoy-180 if shoy > 0 else shoy)
+        lshoz = (angle[2]-180)*-1
+        r[42] = angle[0]*-1
+        r[43] = shoy
+        r[44] = lshoz-360 if lshoz > 180 else lshoz
+
+        # WRIST
+        R_radius_axis = self._radius(REJC,R_humerus_axis,RWJC)
+        L_radius_axis = self._radius(LEJC,L_humerus_axis,LWJC)
+        self._store(r, 45, getangle(R_humerus_axis,R_radius_axis), 1, 1, 1, 0, 0, -90)
+        self._store(r, 48, getangle(L_humerus_axis,L_radius_axis), 1, 1, 1, 0, 0, -90)
+
+        # HAND
+        RHND = findJointC(RWRI,RWJC,RFIN,s.R_handDelta)
+        LHND = findJointC(LWRI,LWJC,LFIN,s.L_handDelta)
+        R_hand_axis = self._hand(_sub(RWJC,RHND),_sub(RWRA,RWRI))
+        L_hand_axis = self._hand(_sub(LWJC,LHND),_sub(LWRI,LWRA))
+        self._store(r, 51, getangle(R_radius_axis,R_hand_axis), 1, 1, -1, 0, 0, 90)
+        angle = getangle(L_radius_axis,L_hand_axis)
+        lwrtz = angle[2]-90
+        r[54] = angle[0]
+        r[55] = angle[1]*-1
+        r[56] = lwrtz+360 if lwrtz < -180 else lwrtz
+
+        # AXIS
+        offset = SA*8
+        for origin, (x, y, z) in ((pel_origin,pel_axis),(hip_origin,pel_axis),
+                             (R_knee_JC,R_knee_axis),(L_knee_JC,L_knee_axis),
+                             (R_ankle_JC,R_ankle_axis),(L_ankle_JC,L_ankle_axis),
+                             (R_foot_JC,R_foot_axis),(L_foot_JC,L_foot_axis),
+                             (head_origin,head_axis),(thorax_origin,thorax_axis),
+                             (R_shoulder_JC,R_clavicle_axis),(L_shoulder_JC,L_clavicle_axis),
+                             (REJC,R_humerus_axis),(LEJC,L_humerus_axis),
+                             (RWJC,R_radius_axis),(LWJC,L_radius_axis),
+                             (RHND,R_hand_axis),(LHND,L_hand_axis)):
+            ox, oy, oz = origin
+            _segment.pack_into(r, offset, ox, oy, oz,
+                               x[0]+ox, x[1]+oy, x[2]+oz,
+                               y[0]+ox, y[1]+oy, y[2]+oz,
+                               z[0]+ox, z[1]+oy, z[2]+oz)
+            offset += 96
+
+        return self.angles
+
+    @staticmethod
+    def _store(r, col, angle, sx, sy, sz, ox, oy, oz):
+        """Writes an angle, with each value scaled and offset, into `r`."""
+        _angle.pack_into(r, col*8, angle[0]*sx+ox, angle[1]*sy+oy, angle[2]*sz+oz)
+
+    @staticmethod
+    def _foot(ankle_JC, ankle_axis, toe, offset):
+        axis_z = _unitSub(ankle_JC,toe)
+        axis_x = _unitCross(_unit(ankle_axis[1]),axis_z)
+        axis_y = _unitCross(axis_z,axis_x)
+        return _rotate(offset,axis_x,axis_y,axis_z)
+
+    @staticmethod
+    def _humerus(SJC, EJC, WJC):
+        z_axis = _unitSub(SJC,EJC)
+        x_axis = _unitSub(WJC,EJC)
+        y_axis = _unitCross(x_axis,z_axis)
+        x_axis = _unitCross(y_axis,z_axis)
+        return (x_axis,y_axis,z_axis)
+
+    @staticmethod
+    def _radius(EJC, humerus_axis, WJC):
+        y_axis = _unit(humerus_axis[1])
+        z_axis = _unitSub(EJC,WJC)
+        x_axis = _unitCross(y_axis,z_axis)
+        z_axis = _unitCross(x_axis,y_axis)
+        return (x_axis,y_axis,z_axis)
+
+    @staticmethod
+    def _hand(z_axis, y_axis):
+        z_axis = _unit(z_axis)
+        y_axis = _unit(y_axis)
+        x_axis = _unitCross(y_axis,z_axis)
+        y_axis = _unitCross(z_axis,x_axis)
+        return (x_axis,y_axis,z_axis)
+
+def benchmark(session, frames, number=1000):
+    """Times `CGMSession.process` over a set of frames.
+
+    Parameters
+    ----------
+    session : CGMSession
+        The session to time.
+    frames : ndarray
+        (frames, markers, 3) marker positions, processed in turn.
+    number : int, optional
+        Number of frames to process. 1000 by default.
+
+    Returns
+    -------
+    seconds : float
+        The mean time per frame, in seconds.
+    onTarget : bool
+        True if `seconds` is within `LATENCY_TARGET`.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from .pycgmSession import CGMSession, benchmark
+    >>> from .pycgmIO import loadC3D, loadVSK, splitDataDict
+    >>> from .pycgmStatic import getStatic
+    >>> from .pyCGM_Helpers import getfilenames
+    >>> fileNames=getfilenames(2)
+    >>> data = loadC3D(fileNames[1])[0]
+    >>> vsk = getStatic(data,loadVSK(fileNames[2],False),flat_foot=False)
+    >>> values, labels = splitDataDict(data)
+    >>> seconds, onTarget = benchmark(CGMSession(vsk, labels), np.asarray(values), 100)
+    >>> seconds > 0
+    True
+    """
+    frames = np.ascontiguousarray(frames, dtype=np.float64)
+    count = [0]
+    def step():
+        session.process(frames[count[0] % len(frames)])
+        count[0] += 1
+    # run once first so the buffers and caches are warm
+    step()
+    seconds = timeit.timeit(step, number=number)/number
+    return seconds, seconds <= LATENCY_TARGET
+
+#Microbenchmark on the sample data, run with
+#python -m pyCGM_Single.pycgmSession
+if __name__ == '__main__':
+    from .pycgmIO import loadC3D, loadVSK, splitDataDict
+    from .pycgmStatic import getStatic
+    from .pyCGM_Helpers import getfilenames
+    fileNames = getfilenames(2)
+    data = loadC3D(fileNames[1])[0]
+    vsk = getStatic(data,loadVSK(fileNames[2],False),flat_foot=False)
+    values, labels = splitDataDict(data)
+    seconds, onTarget = benchmark(CGMSession(vsk, labels), np.asarray(values), 10000)
+    print("CGMSession.process: %.1f us per frame, target %.1f us, %s"
+          % (seconds*1e6, LATENCY_TARGET*1e6, "met" if onTarget else "missed"))
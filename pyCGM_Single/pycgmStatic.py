@@ -105,7 +105,7 @@ def getStatic(motionData,vsk,flat_foot=False,GCS=None):
     Parameters
     ----------
     motionData : dict
-        Dictionary of marker lists.
+        Dictionary of marker lists. Can also be a `MarkerArray`.
     vsk : dict, optional
         Dictionary of various attributes of the skeleton.
     flat_foot : boolean, optional
@@ -207,8 +207,8 @@ def getStatic(motionData,vsk,flat_foot=False,GCS=None):
         calSM['LeftAnkleWidth'] = 0
         
     if calSM['RightAnkleWidth'] == 0:
-        if 'RMKN' in list(motionData[0].keys()):
-            #medial knee markers are available
+        if 'RMMA' in list(motionData[0].keys()):
+            #medial ankle markers are available
             Rwidth = []
             Lwidth = []
             #average each frame 
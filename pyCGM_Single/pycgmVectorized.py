@@ -0,0 +1,1904 @@
+#pyCGM
+
+# Copyright (c) 2015 Mathew Schwartz <umcadop@gmail.com>
+# Core Developers: Seungeun Yeon, Mathew Schwartz
+# Contributors Filipe Alves Caixeta, Robert Van-wesep
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+# -*- coding: utf-8 -*-
+
+# Whole-trial version of the kinematic model in pyCGM.py.
+# Every function here follows the same steps as its namesake in pyCGM.py,
+# but each marker is a (frames, 3) array instead of a single (x, y, z)
+# coordinate, so one call computes a segment for every frame of the trial.
+# Segment axes are kept as unit vectors relative to the segment origin,
+# shape (frames, 3, 3), and only shifted back to global positions when the
+# results are stored.
+
+import numpy as np
+from math import pi, radians, degrees, cos, sin
+from .pyCGM import rotmat
+from .pycgmIO import MarkerArray
+
+#Used to split the arrays with angles and axis
+#Start Joint Angles
+SJA=0
+#End Joint Angles
+EJA=SJA+19*3
+#Start Axis
+SA=EJA
+#End Axis
+EA=SA+72*3
+
+#Names of the angles and axis rows in the order they are stored, as used
+#by pycgmIO.writeResult
+angleLabels = ['Pelvis','R Hip','L Hip','R Knee','L Knee','R Ankle',
+               'L Ankle','R Foot','L Foot',
+               'Head','Thorax','Neck','Spine','R Shoulder','L Shoulder',
+               'R Elbow','L Elbow','R Wrist','L Wrist']
+
+axisLabels = ["PELO","PELX","PELY","PELZ","HIPO","HIPX","HIPY","HIPZ",
+              "R KNEO","R KNEX","R KNEY","R KNEZ","L KNEO","L KNEX","L KNEY","L KNEZ",
+              "R ANKO","R ANKX","R ANKY","R ANKZ","L ANKO","L ANKX","L ANKY","L ANKZ",
+              "R FOOO","R FOOX","R FOOY","R FOOZ","L FOOO","L FOOX","L FOOY","L FOOZ",
+              "HEAO","HEAX","HEAY","HEAZ","THOO","THOX","THOY","THOZ",
+              "R CLAO","R CLAX","R CLAY","R CLAZ","L CLAO","L CLAX","L CLAY","L CLAZ",
+              "R HUMO","R HUMX","R HUMY","R HUMZ","L HUMO","L HUMX","L HUMY","L HUMZ",
+              "R RADO","R RADX","R RADY","R RADZ","L RADO","L RADX","L RADY","L RADZ",
+              "R HANO","R HANX","R HANY","R HANZ","L HANO","L HANX","L HANY","L HANZ"]
+
+#Segment calculations that each segment calculation needs first
+segmentDepends = {'pelvis':[], 'hip':['pelvis'], 'knee':['hip'],
+                  'ankle':['knee'], 'foot':['ankle'], 'head':[],
+                  'thorax':[], 'shoulder':['thorax'], 'elbow':['shoulder'],
+                  'wrist':['elbow'], 'hand':['elbow']}
+
+#Segments needed for each angle, the angle is taken between their axes
+angleSegments = {'Pelvis':['pelvis'],
+                 'R Hip':['pelvis','knee'], 'L Hip':['pelvis','knee'],
+                 'R Knee':['knee','ankle'], 'L Knee':['knee','ankle'],
+                 'R Ankle':['ankle','foot'], 'L Ankle':['ankle','foot'],
+                 'R Foot':['foot'], 'L Foot':['foot'],
+                 'Head':['head'], 'Thorax':['thorax'],
+                 'Neck':['head','thorax'], 'Spine':['pelvis','thorax'],
+                 'R Shoulder':['thorax','elbow'], 'L Shoulder':['thorax','elbow'],
+                 'R Elbow':['elbow','wrist'], 'L Elbow':['elbow','wrist'],
+                 'R Wrist':['wrist','hand'], 'L Wrist':['wrist','hand']}
+
+#Segment calculation behind each axis, keyed by axis name without the
+#trailing O, X, Y or Z
+axisSegments = {'PEL':'pelvis', 'HIP':'hip',
+                'R KNE':'knee', 'L KNE':'knee', 'R ANK':'ankle', 'L ANK':'ankle',
+                'R FOO':'foot', 'L FOO':'foot', 'HEA':'head', 'THO':'thorax',
+                'R CLA':'shoulder', 'L CLA':'shoulder', 'R HUM':'elbow', 'L HUM':'elbow',
+                'R RAD':'wrist', 'L RAD':'wrist', 'R HAN':'hand', 'L HAN':'hand'}
+
+#Segments in the order they are stored, the columns of the validity mask
+segmentLabels = [label[:-1] for label in axisLabels[::4]]
+
+#Markers read by each stored segment, not counting the markers of the
+#segment it is built from in segmentParents
+segmentMarkers = {'PEL':['RASI','LASI','SACR'], 'HIP':[],
+                  'R KNE':['RTHI','RKNE'], 'L KNE':['LTHI','LKNE'],
+                  'R ANK':['RTIB','RANK'], 'L ANK':['LTIB','LANK'],
+                  'R FOO':['RTOE'], 'L FOO':['LTOE'],
+                  'HEA':['LFHD','RFHD','LBHD','RBHD'],
+                  'THO':['CLAV','C7','STRN','T10'],
+                  'R CLA':['RSHO'], 'L CLA':['LSHO'],
+                  'R HUM':['RELB','RWRA','RWRB'], 'L HUM':['LELB','LWRA','LWRB'],
+                  'R RAD':[], 'L RAD':[], 'R HAN':['RFIN'], 'L HAN':['LFIN']}
+
+segmentParents = {'PEL':None, 'HIP':'PEL',
+                  'R KNE':'HIP', 'L KNE':'HIP', 'R ANK':'R KNE', 'L ANK':'L KNE',
+                  'R FOO':'R ANK', 'L FOO':'L ANK', 'HEA':None, 'THO':None,
+                  'R CLA':'THO', 'L CLA':'THO', 'R HUM':'R CLA', 'L HUM':'L CLA',
+                  'R RAD':'R HUM', 'L RAD':'L HUM', 'R HAN':'R HUM', 'L HAN':'L HUM'}
+
+#Markers passed through to the joint centers unchanged
+jointMarkers = ['RHEE','LHEE','C7','CLAV','STRN','T10']
+
+def _norm(v):
+    """Returns the euclidean length of each row of a (frames, 3) array."""
+    return np.sqrt(v[...,0]*v[...,0]+v[...,1]*v[...,1]+v[...,2]*v[...,2])
+
+def _unit(v):
+    """Returns each row of a (frames, 3) array divided by its length."""
+    return v/_norm(v)[...,np.newaxis]
+
+def _dot(a,b):
+    """Returns the row-wise dot product of two (frames, 3) arrays."""
+    return a[...,0]*b[...,0]+a[...,1]*b[...,1]+a[...,2]*b[...,2]
+
+def findJointC(a, b, c, delta):
+    """Calculate the Joint Center function for every frame.
+
+    Batched version of pyCGM.findJointC. The joint center lies in the
+    plane of the markers a, b and c, at a distance `delta` from c. The
+    rotation is applied with Rodrigues' formula on whole arrays, so the
+    joint center of every frame is found with a handful of array
+    operations instead of one rotation matrix per frame.
+
+    Parameters
+    ----------
+    a,b,c : array
+        (N, 3) x,y,z positions of the markers a, b and c for N frames.
+    delta : float or array
+        The length from marker to joint center, retrieved from subject
+        measurement file. Either a single value for all frames or an
+        (N,) array with one value per frame.
+
+    Returns
+    -------
+    mr : array
+        Returns the (N, 3) joint center x, y, z positions. Frames where
+        the joint center can not be found, for example because a marker
+        is missing, are NaN.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from .pycgmVectorized import findJointC
+    >>> a = [[468.14532471, 325.09780884, 673.12591553],
+    ...      [426.50338745, 262.65310669, 673.66247559]]
+    >>> b = [[355.90861996, 365.38260964, 940.6974861],
+    ...      [308.38050472, 322.80342417, 937.98979061]]
+    >>> c = [[452.35180664, 329.0609436, 524.77893066],
+    ...      [416.98687744, 266.22558594, 524.04089355]]
+    >>> np.around(findJointC(a,b,c,59.5),8)
+    array([[396.25286248, 347.91367254, 518.63620527],
+           [364.17774614, 292.17051722, 515.19181496]])
+    >>> np.around(findJointC(a,b,c,[59.5,60.0]),8)
+    array([[396.25286248, 347.91367254, 518.63620527],
+           [363.724851  , 292.39355138, 515.18684795]])
+    """
+    a = np.asarray(a,dtype=np.float64)
+    b = np.asarray(b,dtype=np.float64)
+    c = np.asarray(c,dtype=np.float64)
+    delta = np.asarray(delta,dtype=np.float64)
+
+    # make the two vector using 3 markers, which is on the same plane.
+    v1 = a-c
+    v2 = b-c
+    # v3 is the normalized cross vector of v1, v2, the rotation axis
+    v3 = _unit(np.cross(v1,v2))
+
+    m = (b+c)/2.0
+    length = _norm(b-m)
+
+    theta = np.arccos(delta/_norm(v2))
+    cs = np.cos(theta*2)[...,np.newaxis]
+    sn = np.sin(theta*2)[...,np.newaxis]
+
+    # Rodrigues rotation of v2 about v3 by 2*theta, the same rotation as
+    # the matrix built in pyCGM.findJointC
+    r = v2*cs + np.cross(v3,v2)*sn + v3*_dot(v3,v2)[...,np.newaxis]*(1.0-cs)
+    r = r*(length/_norm(r))[...,np.newaxis]
+
+    return r+m
+
+def _dots(axisP, axisD, pairs):
+    """Returns the row-wise dot products axisD[:,i] . axisP[:,j] for each (i, j) in `pairs`."""
+    axisP = np.asarray(axisP,dtype=np.float64)
+    axisD = np.asarray(axisD,dtype=np.float64)
+    return [_dot(axisD[...,i,:],axisP[...,j,:]) for i,j in pairs]
+
+def getangle(axisP, axisD):
+    """Normal angle calculation for every frame.
+
+    Batched version of pyCGM.getangle. Takes the proximal and distal axes of
+    N frames and returns the N angles with array operations only.
+
+    Parameters
+    ----------
+    axisP : array
+        (N, 3, 3) proximal unit axes, or a single (3, 3) axis used for
+        every frame.
+    axisD : array
+        (N, 3, 3) distal unit axes, or a single (3, 3) axis used for
+        every frame.
+
+    Returns
+    -------
+    angle : array
+        (N, 3) beta, alpha and gamma angles, in degrees. Frames where
+        alpha can not be found take the gimbal branch of pyCGM.getangle.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from .pycgmVectorized import getangle
+    >>> axisP = [[ 0.0464229,   0.99648672,  0.06970743],
+    ...          [ 0.99734011, -0.04231089, -0.05935067],
+    ...          [-0.05619277,  0.07227725, -0.99580037]]
+    >>> axisD = [[-0.18067218, -0.98329158, -0.02225371],
+    ...          [ 0.71383942, -0.1155303,  -0.69071415],
+    ...          [ 0.67660243, -0.1406784,   0.7227854 ]]
+    >>> np.around(getangle([axisP,axisD],[axisD,axisP]),8)
+    array([[-175.65183483,  -39.6322192 ,  100.2668477 ],
+           [-177.11080361,  -39.74341087,   99.7438294 ]])
+    """
+    D2P0, D2P1, D2P2, D0P1, D1P1 = _dots(axisP, axisD, [(2,0),(2,1),(2,2),(0,1),(1,1)])
+
+    with np.errstate(invalid='ignore'):
+        # alpha is NaN where the sine is outside of [-1, 1]
+        alpha = np.arcsin(-D2P1)
+    # frames outside of +/- 90 degrees, and NaN frames, flip the sign of
+    # the numerators, the same as the else branch of pyCGM.getangle
+    sign = np.where(np.abs(alpha)<1.57079633, 1.0, -1.0)
+    beta = np.arctan2(sign*D2P0, D2P2)
+    gamma = np.arctan2(sign*D1P1, D0P1)
+
+    return np.stack([180.0*beta/pi, 180.0*alpha/pi, 180.0*gamma/pi], axis=-1)
+
+
+def getPelangle(axisP, axisD):
+    """Pelvis angle calculation for every frame.
+
+    Batched version of pyCGM.getPelangle. Takes the proximal and distal axes of
+    N frames and returns the N angles with array operations only.
+
+    Parameters
+    ----------
+    axisP : array
+        (N, 3, 3) proximal unit axes, or a single (3, 3) axis used for
+        every frame.
+    axisD : array
+        (N, 3, 3) distal unit axes, or a single (3, 3) axis used for
+        every frame.
+
+    Returns
+    -------
+    angle : array
+        (N, 3) alpha, beta and gamma angles, in degrees.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from .pycgmVectorized import getPelangle
+    >>> axisP = [[ 0.0464229,   0.99648672,  0.06970743],
+    ...          [ 0.99734011, -0.04231089, -0.05935067],
+    ...          [-0.05619277,  0.07227725, -0.99580037]]
+    >>> axisD = [[-0.18067218, -0.98329158, -0.02225371],
+    ...          [ 0.71383942, -0.1155303,  -0.69071415],
+    ...          [ 0.67660243, -0.1406784,   0.7227854 ]]
+    >>> np.around(getPelangle([axisP,axisD],[axisD,axisP]),8)
+    array([[-175.65183483,   39.63221918,  -10.2668477 ],
+           [-177.11080361,   39.7434108 ,   -9.7438294 ]])
+    """
+    D2P0, D2P1, D2P2, D0P1, D1P1 = _dots(axisP, axisD, [(2,0),(2,1),(2,2),(0,1),(1,1)])
+
+    beta = np.arctan2(D2P1, np.sqrt(D2P0**2+D2P2**2))
+    alpha = np.arctan2(D2P0, D2P2)
+    gamma = np.arctan2(D0P1, D1P1)
+
+    return np.stack([180.0*alpha/pi, 180.0*beta/pi, 180.0*gamma/pi], axis=-1)
+
+
+def getHeadangle(axisP, axisD):
+    """Head angle calculation for every frame.
+
+    Batched version of pyCGM.getHeadangle. Takes the proximal and distal axes of
+    N frames and returns the N angles with array operations only.
+
+    Parameters
+    ----------
+    axisP : array
+        (N, 3, 3) proximal unit axes, or a single (3, 3) axis used for
+        every frame.
+    axisD : array
+        (N, 3, 3) distal unit axes, or a single (3, 3) axis used for
+        every frame.
+
+    Returns
+    -------
+    angle : array
+        (N, 3) alpha, beta and gamma angles, in degrees, wrapped in the
+        same way as pyCGM.getHeadangle.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from .pycgmVectorized import getHeadangle
+    >>> axisP = [[ 0.0464229,   0.99648672,  0.06970743],
+    ...          [ 0.99734011, -0.04231089, -0.05935067],
+    ...          [-0.05619277,  0.07227725, -0.99580037]]
+    >>> axisD = [[-0.18067218, -0.98329158, -0.02225371],
+    ...          [ 0.71383942, -0.1155303,  -0.69071415],
+    ...          [ 0.67660243, -0.1406784,   0.7227854 ]]
+    >>> np.around(getHeadangle([axisP,axisD],[axisD,axisP]),8)
+    array([[ 184.34816517,  -39.63221894, -190.2668477 ],
+           [ 182.88919639,  -39.74341058, -189.7438294 ]])
+    """
+    D2P0, D2P1, D2P2, D0P1, D1P1 = _dots(axisP, axisD, [(2,0),(2,1),(2,2),(0,1),(1,1)])
+
+    beta = np.arctan2(D2P1, np.sqrt(D0P1**2+D1P1**2))
+    alpha = np.arctan2(-D2P0, D2P2)
+    gamma = np.arctan2(-D0P1, D1P1)
+
+    alpha = 180.0*alpha/pi
+    beta = -(180.0*beta/pi)
+    gamma = 180.0*gamma/pi
+
+    alpha = np.where(alpha<0, alpha*-1,
+                     np.where((alpha>0) & (alpha<180), 180+(180-alpha), alpha))
+    gamma = np.where(gamma>90.0,
+                     np.where(gamma>120, (gamma-180)*-1, (gamma+180)*-1),
+                     np.where(gamma<0, (gamma+180)*-1, (gamma*-1)-180.0))
+
+    return np.stack([alpha, beta, gamma], axis=-1)
+
+
+def getangle_sho(axisP, axisD):
+    """Shoulder angle calculation for every frame.
+
+    Batched version of pyCGM.getangle_sho. Takes the proximal and distal axes of
+    N frames and returns the N angles with array operations only.
+
+    Parameters
+    ----------
+    axisP : array
+        (N, 3, 3) proximal unit axes, or a single (3, 3) axis used for
+        every frame.
+    axisD : array
+        (N, 3, 3) distal unit axes, or a single (3, 3) axis used for
+        every frame.
+
+    Returns
+    -------
+    angle : array
+        (N, 3) alpha, beta and gamma angles, in degrees.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from .pycgmVectorized import getangle_sho
+    >>> axisP = [[ 0.0464229,   0.99648672,  0.06970743],
+    ...          [ 0.99734011, -0.04231089, -0.05935067],
+    ...          [-0.05619277,  0.07227725, -0.99580037]]
+    >>> axisD = [[-0.18067218, -0.98329158, -0.02225371],
+    ...          [ 0.71383942, -0.1155303,  -0.69071415],
+    ...          [ 0.67660243, -0.1406784,   0.7227854 ]]
+    >>> np.around(getangle_sho([axisP,axisD],[axisD,axisP]),8)
+    array([[  -3.3474503 , -140.28662977,  172.50982168],
+           [  -2.22116244, -140.22075865,  172.1043058 ]])
+    """
+    D2P0, D2P1, D2P2, D1P0, D0P0 = _dots(axisP, axisD, [(2,0),(2,1),(2,2),(1,0),(0,0)])
+
+    with np.errstate(invalid='ignore'):
+        alpha = np.arcsin(D2P0)
+    beta = np.arctan2(-D2P1, D2P2)
+    gamma = np.arctan2(-D1P0, D0P0)
+
+    return np.stack([180.0*alpha/pi, 180.0*beta/pi, 180.0*gamma/pi], axis=-1)
+
+
+def getangle_spi(axisP, axisD):
+    """Spine angle calculation for every frame.
+
+    Batched version of pyCGM.getangle_spi. Takes the proximal and distal axes of
+    N frames and returns the N angles with array operations only.
+
+    Parameters
+    ----------
+    axisP : array
+        (N, 3, 3) proximal unit axes, or a single (3, 3) axis used for
+        every frame.
+    axisD : array
+        (N, 3, 3) distal unit axes, or a single (3, 3) axis used for
+        every frame.
+
+    Returns
+    -------
+    angle : array
+        (N, 3) beta, gamma and alpha angles, in degrees.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from .pycgmVectorized import getangle_spi
+    >>> axisP = [[ 0.0464229,   0.99648672,  0.06970743],
+    ...          [ 0.99734011, -0.04231089, -0.05935067],
+    ...          [-0.05619277,  0.07227725, -0.99580037]]
+    >>> axisD = [[-0.18067218, -0.98329158, -0.02225371],
+    ...          [ 0.71383942, -0.1155303,  -0.69071415],
+    ...          [ 0.67660243, -0.1406784,   0.7227854 ]]
+    >>> np.around(getangle_spi([axisP,axisD],[axisD,axisP]),8)
+    array([[ 2.8891964 ,  9.7438295 , 39.74341087],
+           [ 4.34816517, 10.2668478 , 39.6322192 ]])
+    """
+    D1P2, D1P0, D0P2 = _dots(axisP, axisD, [(1,2),(1,0),(0,2)])
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        alpha = np.arcsin(D1P2)
+        gamma = np.arcsin(-D1P0/np.cos(alpha))
+        beta = np.arcsin(-D0P2/np.cos(alpha))
+
+    return np.stack([180.0*beta/pi, 180.0*gamma/pi, 180.0*alpha/pi], axis=-1)
+
+
+def markerViews(data, labels):
+    """Creates a dictionary of per-marker views into a trial array.
+
+    Parameters
+    ----------
+    data : ndarray
+        Marker positions for the whole trial, shape (frames, markers, 3).
+    labels : list
+        Marker names, in the same order as the second axis of `data`.
+
+    Returns
+    -------
+    markers : dict
+        Dictionary of marker names to (frames, 3) arrays. The arrays are
+        views into `data`, no marker data is copied.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from .pycgmVectorized import markerViews
+    >>> data = np.arange(12.0).reshape(2,2,3)
+    >>> markers = markerViews(data, ['RASI', 'LASI'])
+    >>> markers['LASI']
+    array([[ 3.,  4.,  5.],
+           [ 9., 10., 11.]])
+    >>> np.shares_memory(markers['LASI'], data)
+    True
+    """
+    markers = {}
+    for i, label in enumerate(labels):
+        markers[str(label).rstrip()] = data[:,i,:]
+    return markers
+
+#Markers read by the model, other than the pelvis markers
+modelMarkers = ['RTHI','LTHI','RKNE','LKNE','RTIB','LTIB','RANK','LANK',
+                'RTOE','LTOE','RHEE','LHEE','LFHD','RFHD','LBHD','RBHD',
+                'C7','CLAV','STRN','T10','RSHO','LSHO','RELB','LELB',
+                'RWRA','RWRB','LWRA','LWRB','RFIN','LFIN',
+                'RMKN','LMKN','RMMA','LMMA']
+
+class ModelPlan(object):
+    """The marker set of a trial, resolved once before calculating it.
+
+    The plan looks at the marker names of a trial a single time and
+    decides which pelvis markers make the sacrum, whether the medial knee
+    and ankle markers are there, and which other model markers are
+    missing. Each marker found is given its integer column in the trial,
+    so the kernels are handed views picked out by a fixed index array
+    instead of checking the marker set themselves.
+
+    Parameters
+    ----------
+    labels : list
+        Marker names, in the order of the columns of the trial.
+
+    Attributes
+    ----------
+    pelvis : str
+        'SACR' if the sacrum marker is used, 'PSI' if the sacrum is the
+        midpoint of RPSI and LPSI.
+    medialKnee, medialAnkle : bool
+        True if both medial knee (RMKN, LMKN) or both medial ankle
+        (RMMA, LMMA) markers are present.
+    markers : list
+        Model markers present in the trial.
+    columns : ndarray
+        Column of each marker in `markers`.
+    missing : list
+        Model markers that are not in the trial. They are nan in `frame`.
+
+    Raises
+    ------
+    Exception
+        If RASI, LASI, or both SACR and one of RPSI or LPSI are missing.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from .pycgmVectorized import ModelPlan
+    >>> plan = ModelPlan(['RASI', 'LASI', 'RPSI', 'LPSI', 'RKNE'])
+    >>> plan.pelvis, plan.medialKnee
+    ('PSI', False)
+    >>> plan.markers, plan.columns
+    (['RASI', 'LASI', 'RPSI', 'LPSI', 'RKNE'], array([0, 1, 2, 3, 4]))
+    >>> frame = plan.frame(np.arange(15.0).reshape(1,5,3))
+    >>> frame['SACR']
+    array([[7.5, 8.5, 9.5]])
+    >>> frame['C7']
+    array([[nan, nan, nan]])
+    """
+    def __init__(self, labels):
+        labels = [str(label).rstrip() for label in labels]
+        index = dict((label, i) for i, label in enumerate(labels))
+        if 'RASI' not in index or 'LASI' not in index:
+            raise Exception("RASI and LASI markers are required")
+        if 'SACR' in index:
+            self.pelvis = 'SACR'
+            pelvisMarkers = ['RASI','LASI','SACR']
+        elif 'RPSI' in index and 'LPSI' in index:
+            self.pelvis = 'PSI'
+            pelvisMarkers = ['RASI','LASI','RPSI','LPSI']
+        else:
+            raise Exception("SACR or RPSI and LPSI markers are required")
+        self.medialKnee = 'RMKN' in index and 'LMKN' in index
+        self.medialAnkle = 'RMMA' in index and 'LMMA' in index
+        self.labels = labels
+        self.markers = pelvisMarkers+[marker for marker in modelMarkers if marker in index]
+        self.columns = np.array([index[marker] for marker in self.markers], dtype=int)
+        self.missing = [marker for marker in modelMarkers if marker not in index]
+
+    def frame(self, data):
+        """Picks the model markers out of the marker data of a trial.
+
+        Parameters
+        ----------
+        data : ndarray or MarkerArray
+            Marker positions of shape (frames, markers, 3), with the
+            markers in the order of the labels the plan was made from.
+
+        Returns
+        -------
+        frame : dict
+            Dictionary of every model marker name to a (frames, 3) array,
+            as used by `JointAngleCalc`. Markers of the trial are views of
+            `data`, 'SACR' is always given, and missing markers are nan.
+        """
+        if isinstance(data, MarkerArray):
+            data = data.data
+        data = np.asarray(data, dtype=np.float64)
+        frame = {}
+        for marker, column in zip(self.markers, self.columns):
+            frame[marker] = data[:,column]
+        if len(self.missing) > 0:
+            missing = np.full((len(data),3), np.nan)
+            for marker in self.missing:
+                frame[marker] = missing
+        if self.pelvis == 'PSI':
+            frame['SACR'] = (frame['RPSI']+frame['LPSI'])/2
+        return frame
+
+class SubjectModel(object):
+    """Subject constants derived once from the calibrated measurements.
+
+    The kernels need the subject measurements as marker offsets, hip
+    joint center positions in the pelvis frame and rotation matrices for
+    the tibial torsion, static foot offsets and head offset. SubjectModel
+    works these out once from the output of `getStatic`, so a trial, or a
+    stream of frames, does not redo them for every calculation.
+
+    A SubjectModel can be used wherever the kernels take `vsk`. Indexing
+    it by name gives the original measurement, ``subject['Bodymass']``.
+
+    Parameters
+    ----------
+    vsk : dict
+        Calibrated subject measurements as returned by `getStatic`.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from .pycgmVectorized import SubjectModel
+    >>> from .pycgmIO import loadC3D, loadVSK
+    >>> from .pycgmStatic import getStatic
+    >>> from .pyCGM_Helpers import getfilenames
+    >>> fileNames=getfilenames(2)
+    >>> data = loadC3D(fileNames[1])[0]
+    >>> vsk = getStatic(data,loadVSK(fileNames[2],False),flat_foot=False)
+    >>> subject = SubjectModel(vsk)
+    >>> subject['Bodymass']
+    75.0
+    >>> np.around(subject.R_hip,8)
+    array([ -50.47037334,  -63.46379375, -102.01625737])
+    >>> subject.R_kneeDelta
+    59.5
+    """
+    def __init__(self, vsk):
+        if isinstance(vsk, SubjectModel):
+            vsk = vsk.vsk
+        self.vsk = vsk
+        mm = 7.0
+        self.GCS = np.asarray(vsk['GCS'],dtype=np.float64)
+        self.thoraxReference = np.asarray(rotmat(x=0,y=0,z=180),dtype=np.float64)
+
+        # hip joint centers in the pelvis frame
+        C = ( vsk['MeanLegLength'] * 0.115 ) - 15.3
+        theta = 0.500000178813934
+        beta = 0.314000427722931
+        aa = vsk['InterAsisDistance']/2.0
+        L_Asis = vsk['L_AsisToTrocanterMeasure']
+        R_Asis = vsk['R_AsisToTrocanterMeasure']
+        self.L_hip = np.array([(-L_Asis - mm) * cos(beta) + C * cos(theta) * sin(beta),
+                               -1*(C*sin(theta)- aa),
+                               (-L_Asis - mm) * sin(beta) - C * cos(theta) * cos(beta)])
+        self.R_hip = np.array([(-R_Asis - mm) * cos(beta) + C * cos(theta) * sin(beta),
+                               (C*sin(theta)- aa),
+                               (-R_Asis - mm) * sin(beta) - C * cos(theta) * cos(beta)])
+
+        self.R_kneeDelta = (vsk['RightKneeWidth']/2.0)+mm
+        self.L_kneeDelta = (vsk['LeftKneeWidth']/2.0)+mm
+        self.R_ankleDelta = (vsk['RightAnkleWidth']/2.0)+mm
+        self.L_ankleDelta = (vsk['LeftAnkleWidth']/2.0)+mm
+
+        # rotation of the ankle x and y axes about z by the tibial torsion
+        def torsion(angle):
+            return np.array([[cos(angle),-sin(angle),0],
+                             [sin(angle),cos(angle),0],
+                             [0,0,1]])
+        self.R_torsion = torsion(radians(vsk['RightTibialTorsion']))
+        self.L_torsion = torsion(radians(vsk['LeftTibialTorsion']))
+
+        # rotation about y by the plantar flexion offset, then about x by
+        # the rotation offset. The offsets are rounded in degrees exactly
+        # as in pyCGM.py
+        def foot_offset(alpha, beta):
+            return np.array([[cos(beta),0,sin(beta)],
+                             [sin(alpha)*sin(beta),cos(alpha),-sin(alpha)*cos(beta)],
+                             [-cos(alpha)*sin(beta),sin(alpha),cos(alpha)*cos(beta)]])
+        self.R_footOffset = foot_offset(-radians(np.around(degrees(vsk['RightStaticRotOff']),decimals=5)),
+                                        radians(np.around(degrees(vsk['RightStaticPlantFlex']),decimals=5)))
+        self.L_footOffset = foot_offset(radians(np.around(degrees(vsk['LeftStaticRotOff']),decimals=5)),
+                                        radians(np.around(degrees(vsk['LeftStaticPlantFlex']),decimals=5)))
+
+        # rotation of the head about y by the static head offset
+        head_off = -1*vsk['HeadOffset']
+        self.headOffset = np.array([[cos(head_off),0,sin(head_off)],
+                                    [0,1,0],
+                                    [-sin(head_off),0,cos(head_off)]])
+
+        self.R_shoulderDelta = vsk['RightShoulderOffset'] + mm
+        self.L_shoulderDelta = vsk['LeftShoulderOffset'] + mm
+        self.R_elbowDelta = (vsk['RightElbowWidth']*-1/2.0)-mm
+        self.L_elbowDelta = (vsk['LeftElbowWidth']/2.0)+mm
+        self.R_wristThickness = vsk['RightWristWidth'] / 2 + mm
+        self.L_wristThickness = vsk['LeftWristWidth'] / 2 + mm
+        self.R_handDelta = vsk['RightHandThickness']/2 + mm
+        self.L_handDelta = vsk['LeftHandThickness']/2 + mm
+
+    def __getitem__(self, key):
+        return self.vsk[key]
+
+    def __contains__(self, key):
+        return key in self.vsk
+
+    def keys(self):
+        return self.vsk.keys()
+
+def _subject(vsk):
+    """Returns `vsk` as a SubjectModel, building one only if needed."""
+    if isinstance(vsk, SubjectModel):
+        return vsk
+    return SubjectModel(vsk)
+
+def pelvisJointCenter(frame):
+    """Make the Pelvis Axis for every frame of a trial.
+
+    Markers used: RASI, LASI, RPSI, LPSI
+    Other landmarks used: origin, sacrum
+
+    Parameters
+    ----------
+    frame : dict
+        Dictionary of marker names to (frames, 3) arrays.
+
+    Returns
+    -------
+    origin, axis, sacrum : tuple
+        (frames, 3) pelvis origin, (frames, 3, 3) unit x, y and z axes
+        and (frames, 3) sacrum position.
+
+    See Also
+    --------
+    pyCGM_Single.pyCGM.pelvisJointCenter : single frame version.
+    """
+    RASI = frame['RASI']
+    LASI = frame['LASI']
+    if 'SACR' in frame:
+        sacrum = frame['SACR']
+    else:
+        sacrum = (frame['RPSI']+frame['LPSI'])/2
+
+    origin = (RASI+LASI)/2
+    beta1 = origin-sacrum
+    y_axis = _unit(LASI-RASI)
+    beta3 = beta1-_dot(beta1,y_axis)[:,np.newaxis]*y_axis
+    x_axis = _unit(beta3)
+    z_axis = np.cross(x_axis,y_axis)
+
+    return origin, np.stack([x_axis,y_axis,z_axis],axis=1), sacrum
+
+def hipJointCenter(pel_origin, pel_axis, vsk):
+    """Calculate the right and left hip joint center for every frame.
+
+    Parameters
+    ----------
+    pel_origin : array
+        (frames, 3) pelvis origin.
+    pel_axis : array
+        (frames, 3, 3) pelvis unit axes.
+    vsk : dict or SubjectModel
+        A dictionary containing subject measurements.
+
+    Returns
+    -------
+    L_hipJC, R_hipJC : tuple
+        (frames, 3) left and right hip joint centers.
+
+    See Also
+    --------
+    pyCGM_Single.pyCGM.hipJointCenter : single frame version.
+    """
+    subject = _subject(vsk)
+    L_Xh, L_Yh, L_Zh = subject.L_hip
+    R_Xh, R_Yh, R_Zh = subject.R_hip
+
+    x = pel_axis[:,0]
+    y = pel_axis[:,1]
+    z = pel_axis[:,2]
+    L_hipJC = x*L_Xh + y*L_Yh + z*L_Zh + pel_origin
+    R_hipJC = x*R_Xh + y*R_Yh + z*R_Zh + pel_origin
+
+    return L_hipJC, R_hipJC
+
+def kneeJointCenter(frame, R_hip_JC, L_hip_JC, vsk):
+    """Calculate the knee joint center and axis for every frame.
+
+    Markers used: RTHI, LTHI, RKNE, LKNE
+
+    Parameters
+    ----------
+    frame : dict
+        Dictionary of marker names to (frames, 3) arrays.
+    R_hip_JC, L_hip_JC : array
+        (frames, 3) right and left hip joint centers.
+    vsk : dict or SubjectModel
+        A dictionary containing subject measurements.
+
+    Returns
+    -------
+    R, L, Raxis, Laxis : tuple
+        (frames, 3) right and left knee joint centers followed by their
+        (frames, 3, 3) unit axes.
+
+    See Also
+    --------
+    pyCGM_Single.pyCGM.kneeJointCenter : single frame version.
+    """
+    subject = _subject(vsk)
+    R_delta = subject.R_kneeDelta
+    L_delta = subject.L_kneeDelta
+    RTHI = frame['RTHI']
+    LTHI = frame['LTHI']
+    RKNE = frame['RKNE']
+    LKNE = frame['LKNE']
+
+    R = findJointC(RTHI,R_hip_JC,RKNE,R_delta)
+    L = findJointC(LTHI,L_hip_JC,LKNE,L_delta)
+
+    axis_z = R_hip_JC-R
+    axis_x = np.cross(axis_z,RKNE-R_hip_JC)
+    axis_y = np.cross(axis_z,axis_x)
+    Raxis = np.stack([_unit(axis_x),_unit(axis_y),_unit(axis_z)],axis=1)
+
+    axis_z = L_hip_JC-L
+    axis_x = np.cross(LKNE-L_hip_JC,axis_z)
+    axis_y = np.cross(axis_z,axis_x)
+    Laxis = np.stack([_unit(axis_x),_unit(axis_y),_unit(axis_z)],axis=1)
+
+    return R, L, Raxis, Laxis
+
+def ankleJointCenter(frame, R_knee_JC, L_knee_JC, vsk):
+    """Calculate the ankle joint center and axis for every frame.
+
+    Markers used: RTIB, LTIB, RANK, LANK
+
+    Parameters
+    ----------
+    frame : dict
+        Dictionary of marker names to (frames, 3) arrays.
+    R_knee_JC, L_knee_JC : array
+        (frames, 3) right and left knee joint centers.
+    vsk : dict or SubjectModel
+        A dictionary containing subject measurements.
+
+    Returns
+    -------
+    R, L, Raxis, Laxis : tuple
+        (frames, 3) right and left ankle joint centers followed by their
+        (frames, 3, 3) unit axes, rotated by the tibial torsion.
+
+    See Also
+    --------
+    pyCGM_Single.pyCGM.ankleJointCenter : single frame version.
+    """
+    subject = _subject(vsk)
+    R_delta = subject.R_ankleDelta
+    L_delta = subject.L_ankleDelta
+    tib_R = frame['RTIB']
+    tib_L = frame['LTIB']
+    ank_R = frame['RANK']
+    ank_L = frame['LANK']
+
+    R = findJointC(tib_R, R_knee_JC, ank_R, R_delta)
+    L = findJointC(tib_L, L_knee_JC, ank_L, L_delta)
+
+    axis_z = R_knee_JC-R
+    axis_x = np.cross(axis_z,tib_R-ank_R)
+    axis_y = np.cross(axis_z,axis_x)
+    Rx,Ry,Rz = _unit(axis_x),_unit(axis_y),_unit(axis_z)
+
+    axis_z = L_knee_JC-L
+    axis_x = np.cross(tib_L-ank_L,axis_z)
+    axis_y = np.cross(axis_z,axis_x)
+    Lx,Ly,Lz = _unit(axis_x),_unit(axis_y),_unit(axis_z)
+
+    Raxis = np.matmul(subject.R_torsion,np.stack([Rx,Ry,Rz],axis=1))
+    Laxis = np.matmul(subject.L_torsion,np.stack([Lx,Ly,Lz],axis=1))
+
+    return R, L, Raxis, Laxis
+
+def footJointCenter(frame, vsk, R_ankle_JC, L_ankle_JC, R_ankle_axis, L_ankle_axis):
+    """Calculate the foot joint center and axis for every frame.
+
+    Markers used: RTOE, LTOE
+
+    Parameters
+    ----------
+    frame : dict
+        Dictionary of marker names to (frames, 3) arrays.
+    vsk : dict or SubjectModel
+        A dictionary containing subject measurements.
+    R_ankle_JC, L_ankle_JC : array
+        (frames, 3) right and left ankle joint centers.
+    R_ankle_axis, L_ankle_axis : array
+        (frames, 3, 3) right and left ankle unit axes.
+
+    Returns
+    -------
+    R, L, Raxis, Laxis : tuple
+        (frames, 3) right and left foot origins (the toe markers) followed
+        by their (frames, 3, 3) unit axes, corrected by the static offsets.
+
+    See Also
+    --------
+    pyCGM_Single.pyCGM.footJointCenter : single frame version.
+    """
+    subject = _subject(vsk)
+    TOE_R = frame['RTOE']
+    TOE_L = frame['LTOE']
+
+    def foot_axis(ankle_JC, ankle_axis, toe, offset):
+        axis_z = _unit(ankle_JC-toe)
+        y_flex = _unit(ankle_axis[:,1])
+        axis_x = _unit(np.cross(y_flex,axis_z))
+        axis_y = _unit(np.cross(axis_z,axis_x))
+        # rotate by the static plantar flexion and rotation offsets
+        return np.matmul(offset,np.stack([axis_x,axis_y,axis_z],axis=1))
+
+    Raxis = foot_axis(R_ankle_JC, R_ankle_axis, TOE_R, subject.R_footOffset)
+    Laxis = foot_axis(L_ankle_JC, L_ankle_axis, TOE_L, subject.L_footOffset)
+
+    return TOE_R, TOE_L, Raxis, Laxis
+
+def headJC(frame, vsk):
+    """Calculate the head joint center and axis for every frame.
+
+    Markers used: LFHD, RFHD, LBHD, RBHD
+
+    Parameters
+    ----------
+    frame : dict
+        Dictionary of marker names to (frames, 3) arrays.
+    vsk : dict or SubjectModel
+        A dictionary containing subject measurements.
+
+    Returns
+    -------
+    origin, axis : tuple
+        (frames, 3) head origin and (frames, 3, 3) unit axes, rotated by
+        the static head offset.
+
+    See Also
+    --------
+    pyCGM_Single.pyCGM.headJC : single frame version.
+    """
+    subject = _subject(vsk)
+    LFHD = frame['LFHD']
+    RFHD = frame['RFHD']
+    LBHD = frame['LBHD']
+    RBHD = frame['RBHD']
+
+    front = (LFHD+RFHD)/2.0
+    back = (LBHD+RBHD)/2.0
+    left = (LFHD+LBHD)/2.0
+    right = (RFHD+RBHD)/2.0
+
+    x_vec = _unit(front-back)
+    y_vec = _unit(left-right)
+    z_vec = _unit(np.cross(x_vec,y_vec))
+    y_vec = _unit(np.cross(z_vec,x_vec))
+    x_vec = _unit(np.cross(y_vec,z_vec))
+
+    axis = np.matmul(subject.headOffset,np.stack([x_vec,y_vec,z_vec],axis=1))
+
+    return front, axis
+
+def thoraxJC(frame):
+    """Calculate the thorax joint center and axis for every frame.
+
+    Markers used: CLAV, C7, STRN, T10
+
+    Parameters
+    ----------
+    frame : dict
+        Dictionary of marker names to (frames, 3) arrays.
+
+    Returns
+    -------
+    origin, axis : tuple
+        (frames, 3) thorax origin and (frames, 3, 3) unit axes.
+
+    See Also
+    --------
+    pyCGM_Single.pyCGM.thoraxJC : single frame version.
+    """
+    marker_size = (14.0) /2.0
+    CLAV = frame['CLAV']
+    C7 = frame['C7']
+    STRN = frame['STRN']
+    T10 = frame['T10']
+
+    upper = (CLAV+C7)/2.0
+    lower = (STRN+T10)/2.0
+    front = (CLAV+STRN)/2.0
+    back = (T10+C7)/2.0
+
+    z_vec = _unit(lower-upper)
+    x_vec = _unit(front-back)
+    y_vec = _unit(np.cross(z_vec,x_vec))
+    x_vec = _unit(np.cross(y_vec,z_vec))
+    z_vec = _unit(np.cross(x_vec,y_vec))
+
+    origin = CLAV-x_vec*marker_size
+
+    return origin, np.stack([x_vec,y_vec,z_vec],axis=1)
+
+def findwandmarker(frame, thorax_origin, thorax_axis):
+    """Calculate the right and left wand marker directions for every frame.
+
+    Markers used: RSHO, LSHO
+
+    Parameters
+    ----------
+    frame : dict
+        Dictionary of marker names to (frames, 3) arrays.
+    thorax_origin : array
+        (frames, 3) thorax origin.
+    thorax_axis : array
+        (frames, 3, 3) thorax unit axes.
+
+    Returns
+    -------
+    R_wand, L_wand : tuple
+        (frames, 3) unit vectors from the thorax origin to the right and
+        left virtual wand markers.
+
+    See Also
+    --------
+    pyCGM_Single.pyCGM.findwandmarker : single frame version.
+    """
+    axis_x_vec = _unit(thorax_axis[:,0])
+    RSHO_vec = _unit(frame['RSHO']-thorax_origin)
+    LSHO_vec = _unit(frame['LSHO']-thorax_origin)
+
+    R_wand = _unit(np.cross(RSHO_vec,axis_x_vec))
+    L_wand = _unit(np.cross(axis_x_vec,LSHO_vec))
+
+    return R_wand, L_wand
+
+def findshoulderJC(frame, thorax_origin, R_wand, L_wand, vsk):
+    """Calculate the right and left shoulder joint center for every frame.
+
+    Markers used: RSHO, LSHO
+
+    Parameters
+    ----------
+    frame : dict
+        Dictionary of marker names to (frames, 3) arrays.
+    thorax_origin : array
+        (frames, 3) thorax origin.
+    R_wand, L_wand : array
+        (frames, 3) wand directions from `findwandmarker`.
+    vsk : dict or SubjectModel
+        A dictionary containing subject measurements.
+
+    Returns
+    -------
+    R_Sho_JC, L_Sho_JC : tuple
+        (frames, 3) right and left shoulder joint centers.
+
+    See Also
+    --------
+    pyCGM_Single.pyCGM.findshoulderJC : single frame version.
+    """
+    subject = _subject(vsk)
+    R_delta = subject.R_shoulderDelta
+    L_delta = subject.L_shoulderDelta
+
+    R_Sho_JC = findJointC(thorax_origin+R_wand,thorax_origin,frame['RSHO'],R_delta)
+    L_Sho_JC = findJointC(thorax_origin+L_wand,thorax_origin,frame['LSHO'],L_delta)
+
+    return R_Sho_JC, L_Sho_JC
+
+def shoulderAxisCalc(thorax_origin, R_shoulderJC, L_shoulderJC, R_wand, L_wand):
+    """Calculate the right and left clavicle axis for every frame.
+
+    Parameters
+    ----------
+    thorax_origin : array
+        (frames, 3) thorax origin.
+    R_shoulderJC, L_shoulderJC : array
+        (frames, 3) right and left shoulder joint centers.
+    R_wand, L_wand : array
+        (frames, 3) wand directions from `findwandmarker`.
+
+    Returns
+    -------
+    Raxis, Laxis : tuple
+        (frames, 3, 3) right and left clavicle unit axes. Their origins are
+        the shoulder joint centers.
+
+    See Also
+    --------
+    pyCGM_Single.pyCGM.shoulderAxisCalc : single frame version.
+    """
+    z_direc = _unit(thorax_origin-R_shoulderJC)
+    x_direc = _unit(np.cross(R_wand*-1,z_direc))
+    y_direc = _unit(np.cross(z_direc,x_direc))
+    Raxis = np.stack([x_direc,y_direc,z_direc],axis=1)
+
+    z_direc = _unit(thorax_origin-L_shoulderJC)
+    x_direc = _unit(np.cross(L_wand,z_direc))
+    y_direc = _unit(np.cross(z_direc,x_direc))
+    Laxis = np.stack([x_direc,y_direc,z_direc],axis=1)
+
+    return Raxis, Laxis
+
+def elbowJointCenter(frame, thorax_axis, R_shoulderJC, L_shoulderJC, vsk):
+    """Calculate the elbow joint center, humerus axis and wrist joint center.
+
+    Markers used: RSHO, LSHO, RELB, LELB, RWRA, RWRB, LWRA, LWRB
+
+    Parameters
+    ----------
+    frame : dict
+        Dictionary of marker names to (frames, 3) arrays.
+    thorax_axis : array
+        (frames, 3, 3) thorax unit axes.
+    R_shoulderJC, L_shoulderJC : array
+        (frames, 3) right and left shoulder joint centers.
+    vsk : dict or SubjectModel
+        A dictionary containing subject measurements.
+
+    Returns
+    -------
+    REJC, LEJC, Raxis, Laxis, RWJC, LWJC : tuple
+        (frames, 3) right and left elbow joint centers, their (frames, 3, 3)
+        humerus unit axes and the (frames, 3) right and left wrist joint
+        centers.
+
+    See Also
+    --------
+    pyCGM_Single.pyCGM.elbowJointCenter : single frame version.
+    """
+    RELB = frame['RELB']
+    LELB = frame['LELB']
+    RWRA = frame['RWRA']
+    RWRB = frame['RWRB']
+    LWRA = frame['LWRA']
+    LWRB = frame['LWRB']
+
+    subject = _subject(vsk)
+    R_delta = subject.R_elbowDelta
+    L_delta = subject.L_elbowDelta
+
+    RWRI = (RWRA+RWRB)/2.0
+    LWRI = (LWRA+LWRB)/2.0
+
+    R_cons_vec = _unit(np.cross(_unit(R_shoulderJC-RELB),_unit(RWRI-RELB)))*500+RELB
+    L_cons_vec = _unit(np.cross(_unit(L_shoulderJC-LELB),_unit(LWRI-LELB)))*500+LELB
+
+    REJC = findJointC(R_cons_vec,R_shoulderJC,RELB,R_delta)
+    LEJC = findJointC(L_cons_vec,L_shoulderJC,LELB,L_delta)
+
+    def radius_y(WRA, WRB, WRI, EJC):
+        x_axis = _unit(WRA-WRB)
+        z_axis = _unit(EJC-WRI)
+        return _unit(np.cross(z_axis,x_axis))
+
+    R_wristThickness = subject.R_wristThickness
+    L_wristThickness = subject.L_wristThickness
+    RWJC = RWRI+R_wristThickness*radius_y(RWRA,RWRB,RWRI,REJC)
+    LWJC = LWRI-L_wristThickness*radius_y(LWRA,LWRB,LWRI,LEJC)
+
+    def humerus_axis(SJC, EJC, WJC):
+        z_axis = _unit(SJC-EJC)
+        x_axis = _unit(WJC-EJC)
+        y_axis = _unit(np.cross(x_axis,z_axis))
+        x_axis = _unit(np.cross(y_axis,z_axis))
+        return np.stack([x_axis,y_axis,z_axis],axis=1)
+
+    Raxis = humerus_axis(R_shoulderJC,REJC,RWJC)
+    Laxis = humerus_axis(L_shoulderJC,LEJC,LWJC)
+
+    return REJC, LEJC, Raxis, Laxis, RWJC, LWJC
+
+def wristJointCenter(REJC, LEJC, R_humerus_axis, L_humerus_axis, RWJC, LWJC):
+    """Calculate the right and left radius axis for every frame.
+
+    Parameters
+    ----------
+    REJC, LEJC : array
+        (frames, 3) right and left elbow joint centers.
+    R_humerus_axis, L_humerus_axis : array
+        (frames, 3, 3) right and left humerus unit axes.
+    RWJC, LWJC : array
+        (frames, 3) right and left wrist joint centers.
+
+    Returns
+    -------
+    Raxis, Laxis : tuple
+        (frames, 3, 3) right and left radius unit axes. Their origins are
+        the wrist joint centers.
+
+    See Also
+    --------
+    pyCGM_Single.pyCGM.wristJointCenter : single frame version.
+    """
+    def radius_axis(EJC, humerus_axis, WJC):
+        y_axis = _unit(humerus_axis[:,1])
+        z_axis = _unit(EJC-WJC)
+        x_axis = _unit(np.cross(y_axis,z_axis))
+        z_axis = _unit(np.cross(x_axis,y_axis))
+        return np.stack([x_axis,y_axis,z_axis],axis=1)
+
+    return radius_axis(REJC,R_humerus_axis,RWJC), radius_axis(LEJC,L_humerus_axis,LWJC)
+
+def handJointCenter(frame, RWJC, LWJC, vsk):
+    """Calculate the right and left hand joint center and axis for every frame.
+
+    Markers used: RWRA, RWRB, LWRA, LWRB, RFIN, LFIN
+
+    Parameters
+    ----------
+    frame : dict
+        Dictionary of marker names to (frames, 3) arrays.
+    RWJC, LWJC : array
+        (frames, 3) right and left wrist joint centers.
+    vsk : dict or SubjectModel
+        A dictionary containing subject measurements.
+
+    Returns
+    -------
+    RHND, LHND, Raxis, Laxis : tuple
+        (frames, 3) right and left hand joint centers followed by their
+        (frames, 3, 3) unit axes.
+
+    See Also
+    --------
+    pyCGM_Single.pyCGM.handJointCenter : single frame version.
+    """
+    RWRA = frame['RWRA']
+    RWRB = frame['RWRB']
+    LWRA = frame['LWRA']
+    LWRB = frame['LWRB']
+    RWRI = (RWRA+RWRB)/2.0
+    LWRI = (LWRA+LWRB)/2.0
+
+    subject = _subject(vsk)
+    R_delta = subject.R_handDelta
+    L_delta = subject.L_handDelta
+
+    LHND = findJointC(LWRI,LWJC,frame['LFIN'],L_delta)
+    RHND = findJointC(RWRI,RWJC,frame['RFIN'],R_delta)
+
+    def hand_axis(z_axis, y_axis):
+        z_axis = _unit(z_axis)
+        y_axis = _unit(y_axis)
+        x_axis = _unit(np.cross(y_axis,z_axis))
+        y_axis = _unit(np.cross(z_axis,x_axis))
+        return np.stack([x_axis,y_axis,z_axis],axis=1)
+
+    Raxis = hand_axis(RWJC-RHND, RWRA-RWRI)
+    Laxis = hand_axis(LWJC-LHND, LWRI-LWRA)
+
+    return RHND, LHND, Raxis, Laxis
+
+def validityMask(frame):
+    """Finds the frames in which each segment can be calculated.
+
+    A segment is valid in a frame when none of the markers it reads, or
+    that the segments it is built from read, are nan in that frame. The
+    mask is worked out from the markers alone, before any calculation.
+
+    Parameters
+    ----------
+    frame : dict
+        Dictionary of marker names to (frames, 3) arrays. Markers that are
+        not in `frame` count as missing in every frame.
+
+    Returns
+    -------
+    valid : ndarray
+        Boolean array of shape (frames, 18). Column i is true in the frames
+        in which segment `segmentLabels[i]` is valid.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from .pycgmVectorized import validityMask, segmentLabels
+    >>> markers = ['RASI','LASI','SACR','RTHI','LTHI','RKNE','LKNE']
+    >>> frame = dict((marker, np.ones((3,3))) for marker in markers)
+    >>> frame['RKNE'][1] = np.nan
+    >>> valid = validityMask(frame)
+    >>> segmentLabels[:4]
+    ['PEL', 'HIP', 'R KNE', 'L KNE']
+    >>> valid[:,:4]
+    array([[ True,  True,  True,  True],
+           [ True,  True, False,  True],
+           [ True,  True,  True,  True]])
+    >>> valid[:,4:].any()
+    False
+    """
+    nframes = len(frame['RASI'])
+    present = {}
+    def markerValid(marker):
+        if marker not in present:
+            if marker in frame:
+                present[marker] = ~np.isnan(frame[marker]).any(axis=1)
+            elif marker == 'SACR':
+                present[marker] = markerValid('RPSI') & markerValid('LPSI')
+            else:
+                present[marker] = np.zeros(nframes, dtype=bool)
+        return present[marker]
+
+    valid = np.empty((nframes,len(segmentLabels)), dtype=bool)
+    for i, segment in enumerate(segmentLabels):
+        parent = segmentParents[segment]
+        if parent is None:
+            valid[:,i] = True
+        else:
+            valid[:,i] = valid[:,segmentLabels.index(parent)]
+        for marker in segmentMarkers[segment]:
+            valid[:,i] &= markerValid(marker)
+    return valid
+
+def _storeAxis(r, col, origin, axis):
+    """Writes an origin and its unit axes as global positions into `r`."""
+    r[:,col:col+3] = origin
+    r[:,col+3:col+12] = (axis+origin[:,np.newaxis,:]).reshape(-1,9)
+
+def JointAngleCalc(frame, vsk, out=None, angles=None, axis=None, returnvalid=False):
+    """Joint Angle Calculation function for a whole trial.
+
+    Calculates the same joint angles and axes as pyCGM.JointAngleCalc,
+    but for every frame at once. Each row of the result holds the 273
+    values that pyCGM.JointAngleCalc returns for that frame: 19 joint
+    angles followed by the origin and global x, y and z axis positions of
+    18 segments.
+
+    Parameters
+    ----------
+    frame : dict
+        Dictionary of marker names to (frames, 3) arrays, for example the
+        output of `markerViews`.
+    vsk : dict or SubjectModel
+        A dictionary containing subject measurements.
+    out : ndarray, optional
+        A (frames, 273) float64 array to store the result in. By default
+        a new array is created.
+    angles : list, optional
+        Names of the angles to calculate, from `angleLabels`. All of
+        them by default.
+    axis : list, optional
+        Names of the axis rows to calculate, from `axisLabels`. All of
+        them by default.
+    returnvalid : bool, optional
+        If true, the validity mask of the trial from `validityMask` is
+        returned as well. False by default.
+
+    Returns
+    -------
+    r, jc : tuple
+        Returns a tuple containing a (frames, 273) array with the result
+        of all the joint calculations, followed by a dictionary of joint
+        center names to (frames, 3) arrays. If `out` is given, `r` is `out`.
+        If only some of the angles or axis are asked for, only the segments
+        they need are calculated, and every other value in `r`, along with
+        the joint centers of the segments that were skipped, is nan.
+        With `returnvalid`, the (frames, 18) validity mask follows `jc`.
+
+    Notes
+    -----
+    The validity mask is worked out before anything is calculated. Each
+    segment is calculated only in the frames in which it is valid, and
+    segments that are not valid in any frame of the trial are not
+    calculated at all. Their values are nan.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from .pycgmVectorized import JointAngleCalc, markerViews
+    >>> from .pycgmIO import loadC3D, loadVSK, splitDataDict
+    >>> from .pycgmStatic import getStatic
+    >>> from .pyCGM_Helpers import getfilenames
+    >>> fileNames=getfilenames(2)
+    >>> c3dFile = fileNames[1]
+    >>> vskFile = fileNames[2]
+    >>> data = loadC3D(c3dFile)[0]
+    >>> vskData = loadVSK(vskFile, False)
+    >>> vsk = getStatic(data,vskData,flat_foot=False)
+    >>> values, labels = splitDataDict(data)
+    >>> r, jc = JointAngleCalc(markerViews(np.asarray(values), labels), vsk)
+    >>> r.shape
+    (275, 273)
+    >>> np.around(r[0][:3],8)
+    array([-0.45646046, -5.76277607,  4.80620732])
+    >>> np.around(jc['Pelvis'][0],8)
+    array([ 246.152565  ,  353.26243591, 1031.71362305])
+    >>> np.around(jc['RHand'][0],8)
+    array([ 770.93339376,  591.04557736, 1079.04817118])
+
+    Calculating the knee angles only skips the upper body.
+
+    >>> r, jc = JointAngleCalc(markerViews(np.asarray(values), labels), vsk,
+    ...                        angles=['R Knee', 'L Knee'], axis=[])
+    >>> np.around(r[0][9:12],8)
+    array([  3.74245063,   1.83607381, -21.13452485])
+    >>> np.isnan(r[0][0]), np.isnan(jc['RHand'][0][0])
+    (True, True)
+
+    Frames where the markers drop out are marked in the validity mask.
+
+    >>> values = np.array(values)
+    >>> values[100:200] = np.nan
+    >>> values[10:20,labels.index('RTOE')] = np.nan
+    >>> r, jc, valid = JointAngleCalc(markerViews(values, labels), vsk,
+    ...                               returnvalid=True)
+    >>> valid.shape
+    (275, 18)
+    >>> valid[10,:8]
+    array([ True,  True,  True,  True,  True,  True, False,  True])
+    >>> valid[100:200].any(), np.isnan(r[100:200]).all()
+    (False, True)
+    >>> np.around(r[0][:3],8)
+    array([-0.45646046, -5.76277607,  4.80620732])
+    """
+    with np.errstate(invalid='ignore', divide='ignore'):
+        valid = validityMask(frame)
+        r, jc = _jointAngleCalc(frame, vsk, out, angles, axis, valid)
+    if returnvalid:
+        return r, jc, valid
+    return r, jc
+
+def _expandFrames(values, rows):
+    """Spreads the values of the frames in `rows` back over every frame."""
+    full = np.full((len(rows),)+values.shape[1:], np.nan)
+    full[rows] = values
+    return full
+
+class _FrameRows(object):
+    """The markers of a trial in some of its frames, cut out when read."""
+    def __init__(self, frame, rows):
+        self.frame = frame
+        self.rows = rows
+        self.markers = {}
+
+    def __contains__(self, marker):
+        return marker in self.frame
+
+    def __getitem__(self, marker):
+        if marker not in self.markers:
+            self.markers[marker] = self.frame[marker][self.rows]
+        return self.markers[marker]
+
+def _rowsCalc(rows, frame, kernel, *args):
+    """Calls a segment kernel on the frames in `rows` only.
+
+    The trial `frame` and every (frames, ...) array in `args` are cut down
+    to `rows` and the results are spread back over every frame, nan in the
+    others. With `rows` of None every frame is calculated.
+    """
+    if rows is None:
+        return kernel(*args)
+    view = _FrameRows(frame, rows)
+    args = [view if arg is frame else (arg[rows] if isinstance(arg, np.ndarray) else arg)
+            for arg in args]
+    return tuple(_expandFrames(value, rows) for value in kernel(*args))
+
+def _segmentRows(valid, segments):
+    """Finds the frames each segment calculation is needed in.
+
+    Returns a dictionary of the segments in `segments` that are valid in
+    some frame to a boolean array of those frames, or None if they are
+    valid in every frame.
+    """
+    rows = {}
+    for i, label in enumerate(segmentLabels):
+        segment = axisSegments[label]
+        if segment in segments:
+            rows[segment] = rows[segment] | valid[:,i] if segment in rows else valid[:,i]
+    for segment in list(rows):
+        if rows[segment].all():
+            rows[segment] = None
+        elif not rows[segment].any():
+            del rows[segment]
+    return rows
+
+def requiredSegments(angles, axis):
+    """Finds the segment calculations needed for a set of outputs.
+
+    Parameters
+    ----------
+    angles : list
+        Names of angles, from `angleLabels`.
+    axis : list
+        Names of axis rows, from `axisLabels`.
+
+    Returns
+    -------
+    segments : set
+        Names of the segments that have to be calculated, including the
+        segments they depend on.
+
+    Raises
+    ------
+    Exception
+        If an angle or axis name is unknown.
+
+    Examples
+    --------
+    >>> from .pycgmVectorized import requiredSegments
+    >>> sorted(requiredSegments(['R Knee'], []))
+    ['ankle', 'hip', 'knee', 'pelvis']
+    >>> sorted(requiredSegments([], ['R HANO']))
+    ['elbow', 'hand', 'shoulder', 'thorax']
+    """
+    needed = []
+    for name in angles:
+        if name not in angleSegments:
+            raise Exception("Unknown angle: "+str(name))
+        needed.extend(angleSegments[name])
+    for name in axis:
+        if name[:-1] not in axisSegments or name[-1] not in 'OXYZ':
+            raise Exception("Unknown axis: "+str(name))
+        needed.append(axisSegments[name[:-1]])
+    segments = set()
+    while len(needed) > 0:
+        segment = needed.pop()
+        if segment not in segments:
+            segments.add(segment)
+            needed.extend(segmentDepends[segment])
+    return segments
+
+def outputColumns(angles=None, axis=None):
+    """Finds the columns of the 273 results that hold a set of outputs.
+
+    Each angle fills 3 columns and each axis row fills the 12 columns of
+    its segment, since a segment is always stored as a whole.
+
+    Parameters
+    ----------
+    angles : list, optional
+        Names of angles, from `angleLabels`. All of them by default.
+    axis : list, optional
+        Names of axis rows, from `axisLabels`. All of them by default.
+
+    Returns
+    -------
+    columns : ndarray
+        Boolean array of 273 elements, true for the columns of the outputs.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from .pycgmVectorized import outputColumns
+    >>> np.flatnonzero(outputColumns(['Pelvis'], ['PELO']))
+    array([ 0,  1,  2, 57, 58, 59, 60, 61, 62, 63, 64, 65, 66, 67, 68])
+    """
+    if angles is None:
+        angles = angleLabels
+    if axis is None:
+        axis = axisLabels
+    columns = np.zeros(EA, dtype=bool)
+    for name in angles:
+        i = angleLabels.index(name)
+        columns[SJA+i*3:SJA+i*3+3] = True
+    for name in axis:
+        i = axisLabels.index(name)//4
+        columns[SA+i*12:SA+i*12+12] = True
+    return columns
+
+def _jointAngleCalc(frame, vsk, out=None, angles=None, axis=None, valid=None):
+    nframes = len(frame['RASI'])
+    if out is None:
+        r = np.empty((nframes,EA))
+    else:
+        r = out
+    if angles is None:
+        angles = angleLabels
+    if axis is None:
+        axis = axisLabels
+    segments = requiredSegments(angles, axis)
+    if len(angles) < len(angleLabels) or len(axis) < len(axisLabels):
+        r[:] = np.nan
+    if valid is None:
+        rows = dict((segment, None) for segment in segments)
+    else:
+        #each segment is calculated in the frames it is valid in, and
+        #segments that are not valid in any frame are not calculated
+        rows = _segmentRows(valid, segments)
+        if len(rows) < len(segments):
+            segments = set(rows)
+            r[:] = np.nan
+    angles = set(name for name in angles if set(angleSegments[name]) <= segments)
+    vsk = _subject(vsk)
+    global_Axis = vsk.GCS
+    missing = np.full((nframes,3), np.nan)
+    nan_axis = np.full((nframes,3,3), np.nan)
+
+    pel_origin = sacrum = hip_origin = R_hip_JC = L_hip_JC = missing
+    R_knee_JC = L_knee_JC = R_ankle_JC = L_ankle_JC = R_foot_JC = L_foot_JC = missing
+    head_origin = thorax_origin = R_shoulder_JC = L_shoulder_JC = missing
+    REJC = LEJC = RWJC = LWJC = RHND = LHND = missing
+    pel_axis = R_knee_axis = L_knee_axis = R_ankle_axis = L_ankle_axis = nan_axis
+    R_foot_axis = L_foot_axis = head_axis = thorax_axis = nan_axis
+    R_clavicle_axis = L_clavicle_axis = R_humerus_axis = L_humerus_axis = nan_axis
+    R_radius_axis = L_radius_axis = R_hand_axis = L_hand_axis = nan_axis
+
+    # PELVIS
+    if 'pelvis' in segments:
+        pel_origin, pel_axis, sacrum = _rowsCalc(rows['pelvis'],frame,pelvisJointCenter,frame)
+        #the sacrum is kept in every frame its markers are in
+        if rows['pelvis'] is not None:
+            sacrum = frame['SACR'] if 'SACR' in frame else (frame['RPSI']+frame['LPSI'])/2
+    if 'Pelvis' in angles:
+        angle = getangle(global_Axis,pel_axis)
+        r[:,0:3] = angle
+
+    # HIP joint centers, the hip axis shares the pelvis orientation
+    if 'hip' in segments:
+        L_hip_JC, R_hip_JC = _rowsCalc(rows['hip'],frame,hipJointCenter,pel_origin,pel_axis,vsk)
+        hip_origin = (R_hip_JC+L_hip_JC)/2
+
+    # KNEE, and the HIP angle between the pelvis and the knee
+    if 'knee' in segments:
+        R_knee_JC, L_knee_JC, R_knee_axis, L_knee_axis = _rowsCalc(rows['knee'],frame,kneeJointCenter,frame,R_hip_JC,L_hip_JC,vsk)
+    if 'R Hip' in angles:
+        angle = getangle(pel_axis,R_knee_axis)
+        r[:,3] = angle[:,0]*-1
+        r[:,4] = angle[:,1]
+        r[:,5] = angle[:,2]*-1+90
+    if 'L Hip' in angles:
+        angle = getangle(pel_axis,L_knee_axis)
+        r[:,6] = angle[:,0]*-1
+        r[:,7] = angle[:,1]*-1
+        r[:,8] = angle[:,2]-90
+
+    # ANKLE, and the KNEE angle between the knee and the ankle
+    if 'ankle' in segments:
+        R_ankle_JC, L_ankle_JC, R_ankle_axis, L_ankle_axis = _rowsCalc(rows['ankle'],frame,ankleJointCenter,frame,R_knee_JC,L_knee_JC,vsk)
+    if 'R Knee' in angles:
+        angle = getangle(R_knee_axis,R_ankle_axis)
+        r[:,9] = angle[:,0]
+        r[:,10] = angle[:,1]
+        r[:,11] = angle[:,2]*-1+90
+    if 'L Knee' in angles:
+        angle = getangle(L_knee_axis,L_ankle_axis)
+        r[:,12] = angle[:,0]
+        r[:,13] = angle[:,1]*-1
+        r[:,14] = angle[:,2]-90
+
+    # FOOT, and the ANKLE angle between the ankle and the foot
+    if 'foot' in segments:
+        R_foot_JC, L_foot_JC, R_foot_axis, L_foot_axis = _rowsCalc(rows['foot'],frame,footJointCenter,frame,vsk,R_ankle_JC,L_ankle_JC,R_ankle_axis,L_ankle_axis)
+        #the foot origins are the toe markers, kept in every frame as well
+        R_foot_JC, L_foot_JC = frame['RTOE'], frame['LTOE']
+    if 'R Ankle' in angles:
+        angle = getangle(R_ankle_axis,R_foot_axis)
+        r[:,15] = angle[:,0]*-1-90
+        r[:,16] = angle[:,2]*-1+90
+        r[:,17] = angle[:,1]
+    if 'L Ankle' in angles:
+        angle = getangle(L_ankle_axis,L_foot_axis)
+        r[:,18] = angle[:,0]*-1-90
+        r[:,19] = angle[:,2]-90
+        r[:,20] = angle[:,1]*-1
+
+    # ABSOLUTE FOOT ANGLE
+    if 'R Foot' in angles:
+        angle = getangle(global_Axis,R_foot_axis)
+        r[:,21] = angle[:,0]
+        r[:,22] = angle[:,2]-90
+        r[:,23] = angle[:,1]
+    if 'L Foot' in angles:
+        angle = getangle(global_Axis,L_foot_axis)
+        r[:,24] = angle[:,0]
+        r[:,25] = (angle[:,2]-90)*-1
+        r[:,26] = angle[:,1]*-1
+
+    # HEAD
+    if 'head' in segments:
+        head_origin, head_axis = _rowsCalc(rows['head'],frame,headJC,frame,vsk)
+    if 'Head' in angles:
+        angle = getHeadangle(global_Axis,head_axis)
+        headx = angle[:,0]*-1
+        r[:,27] = np.where(headx<-180, headx+360, headx)
+        r[:,28] = angle[:,1]*-1
+        headz = angle[:,2]
+        r[:,29] = np.where(headz<-180, headz-360, headz)
+
+    # THORAX
+    if 'thorax' in segments:
+        thorax_origin, thorax_axis = _rowsCalc(rows['thorax'],frame,thoraxJC,frame)
+    if 'Thorax' in angles:
+        angle = getangle(vsk.thoraxReference,thorax_axis)
+        thox = angle[:,0]
+        r[:,30] = np.where(thox>0, thox-180, np.where(thox<0, thox+180, thox))
+        r[:,31] = angle[:,1]
+        r[:,32] = angle[:,2]+90
+
+    # NECK
+    if 'Neck' in angles:
+        angle = getHeadangle(head_axis,thorax_axis)
+        r[:,33] = (angle[:,0]-180)*-1
+        r[:,34] = angle[:,1]
+        r[:,35] = angle[:,2]*-1
+
+    # SPINE
+    if 'Spine' in angles:
+        angle = getangle_spi(pel_axis,thorax_axis)
+        r[:,36] = angle[:,0]
+        r[:,37] = angle[:,2]*-1
+        r[:,38] = angle[:,1]
+
+    # SHOULDER
+    if 'shoulder' in segments:
+        R_wand, L_wand = _rowsCalc(rows['shoulder'],frame,findwandmarker,frame,thorax_origin,thorax_axis)
+        R_shoulder_JC, L_shoulder_JC = _rowsCalc(rows['shoulder'],frame,findshoulderJC,frame,thorax_origin,R_wand,L_wand,vsk)
+        R_clavicle_axis, L_clavicle_axis = _rowsCalc(rows['shoulder'],frame,shoulderAxisCalc,thorax_origin,R_shoulder_JC,L_shoulder_JC,R_wand,L_wand)
+    if 'elbow' in segments:
+        REJC, LEJC, R_humerus_axis, L_humerus_axis, RWJC, LWJC = _rowsCalc(rows['elbow'],frame,elbowJointCenter,frame,thorax_axis,R_shoulder_JC,L_shoulder_JC,vsk)
+
+    if 'R Shoulder' in angles:
+        angle = getangle_sho(thorax_axis,R_humerus_axis)
+        shoy = angle[:,1]
+        shoz = angle[:,2]
+        shoz = np.where(shoz<0, shoz+180, np.where(shoz>0, shoz-180, shoz))
+        shoy = np.where(shoy>0, shoy-180, np.where(shoy<0, shoy*-1-180, shoy))
+        r[:,39] = angle[:,0]*-1
+        r[:,40] = shoy*-1
+        r[:,41] = shoz
+    if 'L Shoulder' in angles:
+        angle = getangle_sho(thorax_axis,L_humerus_axis)
+        shoy = angle[:,1]
+        shoy = np.where(shoy<0, shoy+180, np.where(shoy>0, shoy-180, shoy))
+        lshoz = (angle[:,2]-180)*-1
+        r[:,42] = angle[:,0]*-1
+        r[:,43] = shoy
+        r[:,44] = np.where(lshoz>180, lshoz-360, lshoz)
+
+    # ELBOW
+    if 'wrist' in segments:
+        R_radius_axis, L_radius_axis = _rowsCalc(rows['wrist'],frame,wristJointCenter,REJC,LEJC,R_humerus_axis,L_humerus_axis,RWJC,LWJC)
+    if 'R Elbow' in angles:
+        angle = getangle(R_humerus_axis,R_radius_axis)
+        r[:,45] = angle[:,0]
+        r[:,46] = angle[:,1]
+        r[:,47] = angle[:,2]-90.0
+    if 'L Elbow' in angles:
+        angle = getangle(L_humerus_axis,L_radius_axis)
+        r[:,48] = angle[:,0]
+        r[:,49] = angle[:,1]
+        r[:,50] = angle[:,2]-90.0
+
+    # WRIST
+    if 'hand' in segments:
+        RHND, LHND, R_hand_axis, L_hand_axis = _rowsCalc(rows['hand'],frame,handJointCenter,frame,RWJC,LWJC,vsk)
+    if 'R Wrist' in angles:
+        angle = getangle(R_radius_axis,R_hand_axis)
+        r[:,51] = angle[:,0]
+        r[:,52] = angle[:,1]
+        r[:,53] = angle[:,2]*-1+90
+    if 'L Wrist' in angles:
+        angle = getangle(L_radius_axis,L_hand_axis)
+        lwrtz = angle[:,2]-90
+        r[:,54] = angle[:,0]
+        r[:,55] = angle[:,1]*-1
+        r[:,56] = np.where(lwrtz<-180, lwrtz+360, lwrtz)
+
+    # AXIS
+    stored = [(pel_origin,pel_axis),(hip_origin,pel_axis),
+              (R_knee_JC,R_knee_axis),(L_knee_JC,L_knee_axis),
+              (R_ankle_JC,R_ankle_axis),(L_ankle_JC,L_ankle_axis),
+              (R_foot_JC,R_foot_axis),(L_foot_JC,L_foot_axis),
+              (head_origin,head_axis),(thorax_origin,thorax_axis),
+              (R_shoulder_JC,R_clavicle_axis),(L_shoulder_JC,L_clavicle_axis),
+              (REJC,R_humerus_axis),(LEJC,L_humerus_axis),
+              (RWJC,R_radius_axis),(LWJC,L_radius_axis),
+              (RHND,R_hand_axis),(LHND,L_hand_axis)]
+    axis = set(label[:-1] for label in axis)
+    for i,(origin,segment_axis) in enumerate(stored):
+        if segmentLabels[i] in axis and axisSegments[segmentLabels[i]] in segments:
+            _storeAxis(r,SA+i*12,origin,segment_axis)
+
+    jc = {}
+    jc['Pelvis_axis'] = (pel_origin, pel_axis+pel_origin[:,np.newaxis,:], sacrum)
+    jc['Thorax_axis'] = (thorax_axis+thorax_origin[:,np.newaxis,:], thorax_origin)
+
+    jc['Pelvis'] = pel_origin
+    jc['RHip'] = R_hip_JC
+    jc['LHip'] = L_hip_JC
+    jc['RKnee'] = R_knee_JC
+    jc['LKnee'] = L_knee_JC
+    jc['RAnkle'] = R_ankle_JC
+    jc['LAnkle'] = L_ankle_JC
+    jc['RFoot'] = R_foot_JC
+    jc['LFoot'] = L_foot_JC
+
+    for marker in jointMarkers:
+        jc[marker] = frame[marker] if marker in frame else missing
+
+    jc['Front_Head'] = head_origin
+    if 'LBHD' in frame and 'RBHD' in frame:
+        jc['Back_Head'] = (frame['LBHD']+frame['RBHD'])/2
+    else:
+        jc['Back_Head'] = missing
+
+    jc['Head'] = head_origin
+    jc['Thorax'] = thorax_origin
+
+    jc['RShoulder'] = R_shoulder_JC
+    jc['LShoulder'] = L_shoulder_JC
+    jc['RHumerus'] = REJC
+    jc['LHumerus'] = LEJC
+    jc['RRadius'] = RWJC
+    jc['LRadius'] = LWJC
+    jc['RHand'] = RHND
+    jc['LHand'] = LHND
+
+    return r, jc
+
+def splitJointCenters(jc):
+    """Splits the joint centers of a whole trial into one dictionary per frame.
+
+    Parameters
+    ----------
+    jc : dict
+        Joint centers as returned by `JointAngleCalc`.
+
+    Returns
+    -------
+    joints : list
+        List of dictionaries, one per frame, in the same format as the
+        joint centers returned by pyCGM.JointAngleCalc.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from .pycgmVectorized import splitJointCenters
+    >>> jc = {'Pelvis': np.array([[1.,2.,3.],[4.,5.,6.]]),
+    ...       'Thorax_axis': (np.zeros((2,3,3)), np.ones((2,3)))}
+    >>> joints = splitJointCenters(jc)
+    >>> joints[1]['Pelvis']
+    array([4., 5., 6.])
+    >>> joints[1]['Thorax_axis'][1]
+    array([1., 1., 1.])
+    """
+    joints = []
+    nframes = len(jc['Pelvis'])
+    for i in range(nframes):
+        frame = {}
+        for key in jc:
+            if type(jc[key]) == tuple:
+                frame[key] = [value[i] for value in jc[key]]
+            else:
+                frame[key] = jc[key][i]
+        joints.append(frame)
+    return joints
+
+def stackJointCenters(joints):
+    """Stacks a list of per-frame joint centers into whole-trial arrays.
+
+    This is the inverse of `splitJointCenters`.
+
+    Parameters
+    ----------
+    joints : list
+        List of dictionaries, one per frame, in the format of the joint
+        centers returned by pyCGM.JointAngleCalc.
+
+    Returns
+    -------
+    jc : dict
+        Joint centers in the format returned by `JointAngleCalc`.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from .pycgmVectorized import stackJointCenters
+    >>> joints = [{'Pelvis': np.array([1.,2.,3.]), 'Thorax_axis': [np.eye(3), np.zeros(3)]},
+    ...           {'Pelvis': np.array([4.,5.,6.]), 'Thorax_axis': [np.eye(3), np.ones(3)]}]
+    >>> jc = stackJointCenters(joints)
+    >>> jc['Pelvis']
+    array([[1., 2., 3.],
+           [4., 5., 6.]])
+    >>> jc['Thorax_axis'][1]
+    array([[0., 0., 0.],
+           [1., 1., 1.]])
+    """
+    jc = {}
+    for key in joints[0]:
+        if key.endswith('_axis'):
+            jc[key] = tuple(np.array([frame[key][i] for frame in joints],dtype=np.float64)
+                            for i in range(len(joints[0][key])))
+        else:
+            jc[key] = np.array([frame[key] for frame in joints],dtype=np.float64)
+    return jc
+
+def jointCenterArray(jc):
+    """Stores the joint centers of a whole trial in a MarkerArray.
+
+    Each joint center becomes a column of the MarkerArray. The global x, y
+    and z axis positions of the pelvis and thorax are stored as the
+    columns 'Pelvis_axis_x', 'Pelvis_axis_y', 'Pelvis_axis_z',
+    'Thorax_axis_x', 'Thorax_axis_y' and 'Thorax_axis_z'.
+
+    Parameters
+    ----------
+    jc : dict
+        Joint centers as returned by `JointAngleCalc`.
+
+    Returns
+    -------
+    joints : MarkerArray
+        Joint center trajectories.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from .pycgmVectorized import jointCenterArray
+    >>> axis = np.array([np.eye(3), 2*np.eye(3)])
+    >>> jc = {'Pelvis': np.array([[1.,2.,3.],[4.,5.,6.]]),
+    ...       'Pelvis_axis': (np.zeros((2,3)), axis, np.zeros((2,3))),
+    ...       'Thorax_axis': (axis, np.zeros((2,3)))}
+    >>> joints = jointCenterArray(jc)
+    >>> joints.keys() #doctest: +NORMALIZE_WHITESPACE
+    ['Pelvis', 'Pelvis_axis_x', 'Pelvis_axis_y', 'Pelvis_axis_z',
+     'Thorax_axis_x', 'Thorax_axis_y', 'Thorax_axis_z']
+    >>> joints['Pelvis_axis_z']
+    array([[0., 0., 1.],
+           [0., 0., 2.]])
+    """
+    labels = [key for key in jc if type(jc[key]) != tuple]
+    columns = [jc[key] for key in labels]
+    for key, axis in (('Pelvis_axis', jc['Pelvis_axis'][1]),
+                      ('Thorax_axis', jc['Thorax_axis'][0])):
+        for i, name in enumerate('xyz'):
+            labels.append(key+'_'+name)
+            columns.append(axis[:,i])
+    return MarkerArray(labels, np.stack(columns, axis=1))
@@ -70,7 +70,8 @@ def main(argv):
 #TODO -x is not working for input
     
     filename = './'+inputfile
-    motionData  = pycgmIO.loadData(filename) 
+    #Only the frames from start to end are loaded, loadData checks the range
+    motionData  = pycgmIO.loadData(filename,start=start,end=end) 
     if len(motionData) == 0 or motionData == None:
         print("No Data Loaded")
         sys.exit()
@@ -84,7 +85,7 @@ def main(argv):
         staticData = pycgmIO.loadData(staticfile)
         calibratedMeasurements = pycgmStatic.getStatic(staticData,vsk,flat_foot)
 		
-    result=pycgmCalc.calcAngles(motionData,start=start,end=end,vsk=calibratedMeasurements,splitAnglesAxis=False,formatData=False)
+    result=pycgmCalc.calcAngles(motionData,start=None,end=None,vsk=calibratedMeasurements,splitAnglesAxis=False,formatData=False)
 
     pycgmIO.writeResult(result,outputfile)
 
@@ -0,0 +1,100 @@
+import unittest
+import numpy as np
+from pyCGM_Single.pycgmIO import c3d
+from pyCGM_Single.c3darray import decode_residuals
+
+sampleFiles = ['SampleData/ROM/Sample_Static.c3d',
+               'SampleData/Sample_2/RoboStatic.c3d',
+               'SampleData/59993_Frame/59993_Frame_Static.c3d']
+
+class TestArrayReader(unittest.TestCase):
+    """The bulk and memory-mapped reads against read_frames."""
+
+    def readFrames(self, filename, **kargs):
+        with open(filename, 'rb') as handle:
+            reader = c3d.Reader(handle)
+            return [(points, analog) for frame_no, points, analog in reader.read_frames(**kargs)]
+
+    def test_read_points_array(self):
+        for filename in sampleFiles:
+            frames = self.readFrames(filename, onlyXYZ=True)
+            with open(filename, 'rb') as handle:
+                points = c3d.Reader(handle).read_points_array()
+            np.testing.assert_array_equal(points, [p for p, a in frames])
+
+    def test_frame_range(self):
+        filename = sampleFiles[0]
+        frames = self.readFrames(filename, onlyXYZ=True)
+        with open(filename, 'rb') as handle:
+            reader = c3d.Reader(handle)
+            first = reader.first_frame()
+            points = reader.read_points_array(first+10, first+19, points=[3, 0])
+            self.assertRaises(ValueError, reader.read_points_array, first, reader.last_frame()+1)
+        expected = np.array([p for p, a in frames[10:20]])[:, [3, 0]]
+        np.testing.assert_array_equal(points, expected)
+
+    def test_memmap_points(self):
+        for filename in sampleFiles:
+            with open(filename, 'rb') as handle:
+                reader = c3d.Reader(handle)
+                points = reader.read_points_array()
+                mapped = reader.memmap_points()
+                self.assertEqual(mapped.shape, points.shape)
+                np.testing.assert_array_equal(mapped[:], points)
+                np.testing.assert_array_equal(mapped[5:9, [2, 1]], points[5:9, [2, 1]])
+                del mapped
+
+    def test_read_analog_array(self):
+        filename = sampleFiles[0]
+        frames = self.readFrames(filename, analog=True)
+        with open(filename, 'rb') as handle:
+            analog = c3d.Reader(handle).read_analog_array()
+        self.assertTrue(analog.size > 0)
+        np.testing.assert_array_equal(analog, np.concatenate([a for p, a in frames]))
+
+class TestDecodeResiduals(unittest.TestCase):
+    """decode_residuals against decoding the points one by one."""
+
+    def pointCalc(self, raw, scale):
+        # residual and camera count of each point, as read_frames used to
+        residuals = np.empty(raw.shape[:-1])
+        cameras = np.empty(raw.shape[:-1])
+        for index in np.ndindex(*raw.shape[:-1]):
+            word = raw[index][3]
+            if word > -1:
+                c = np.array(word).astype(np.uint16)
+                residuals[index] = (c & 0xff).astype(float) * scale
+                cameras[index] = sum((c & (1 << k)) >> k for k in range(8, 17))
+            else:
+                residuals[index] = cameras[index] = -1
+        return residuals, cameras
+
+    def assertSame(self, raw, scale):
+        residuals, cameras = decode_residuals(raw, scale)
+        expected = self.pointCalc(raw, scale)
+        np.testing.assert_array_equal(residuals, expected[0])
+        np.testing.assert_array_equal(cameras, expected[1])
+
+    def test_int16(self):
+        rng = np.random.RandomState(0)
+        raw = rng.randint(-2**15, 2**15, size=(50, 20, 4)).astype(np.int16)
+        raw[0, :, 3] = [-1, 0, 255, 256, 0x7fff, -2**15] + [0]*14
+        self.assertSame(raw, 0.1)
+
+    def test_float32(self):
+        rng = np.random.RandomState(1)
+        raw = rng.randint(-2, 2**15, size=(50, 20, 4)).astype(np.float32)
+        raw[..., :3] += 0.5
+        self.assertSame(raw, 0.05)
+
+    def test_read_residuals(self):
+        for filename in sampleFiles:
+            with open(filename, 'rb') as handle:
+                reader = c3d.Reader(handle)
+                residuals, cameras = reader.read_residuals()
+                frames = np.array([p for i, p, a in reader.read_frames(analog=False)])
+            np.testing.assert_array_equal(residuals, frames[..., 3])
+            np.testing.assert_array_equal(cameras, frames[..., 4])
+
+if __name__ == '__main__':
+    unittest.main()
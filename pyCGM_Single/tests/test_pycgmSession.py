@@ -0,0 +1,47 @@
+import unittest
+import numpy as np
+from pyCGM_Single.pyCGM import JointAngleCalc
+from pyCGM_Single.pycgmSession import CGMSession, benchmark, LATENCY_TARGET
+from pyCGM_Single.pycgmIO import loadC3D, loadVSK, splitDataDict
+from pyCGM_Single.pycgmStatic import getStatic
+from pyCGM_Single.pyCGM_Helpers import getfilenames
+
+class TestCGMSession(unittest.TestCase):
+    """CGMSession against the frame by frame JointAngleCalc."""
+
+    @classmethod
+    def setUpClass(cls):
+        fileNames = getfilenames(2)
+        cls.data = loadC3D(fileNames[1])[0]
+        cls.vsk = getStatic(cls.data,loadVSK(fileNames[2],False),flat_foot=False)
+        values, cls.labels = splitDataDict(cls.data)
+        cls.values = np.asarray(values)
+
+    def test_process_matches_JointAngleCalc(self):
+        session = CGMSession(self.vsk, self.labels)
+        for i, frame in enumerate(self.data):
+            session.process(self.values[i])
+            np.testing.assert_allclose(session.result, JointAngleCalc(frame,self.vsk)[0],
+                                       rtol=0, atol=1e-8)
+
+    def test_missing_marker(self):
+        # frames without a marker give nan where the frame engine does
+        frame = dict(self.data[0])
+        frame['RTOE'] = np.array([np.nan,np.nan,np.nan])
+        values = self.values[0].copy()
+        values[self.labels.index('RTOE')] = np.nan
+        session = CGMSession(self.vsk, self.labels)
+        session.process(values)
+        expected = JointAngleCalc(frame,self.vsk)[0]
+        np.testing.assert_array_equal(np.isnan(session.result), np.isnan(expected))
+        np.testing.assert_allclose(session.result, expected, rtol=0, atol=1e-8)
+
+    def test_benchmark(self):
+        # timings on shared test machines vary, so the latency is only held
+        # to a generous multiple of the target
+        seconds, onTarget = benchmark(CGMSession(self.vsk, self.labels), self.values, 200)
+        self.assertEqual(onTarget, seconds <= LATENCY_TARGET)
+        self.assertLess(seconds, 20*LATENCY_TARGET)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+import unittest
+import numpy as np
+from pyCGM_Single.pycgmStatic import getStatic
+from pyCGM_Single.pycgmIO import loadC3D, loadVSK
+from pyCGM_Single.pyCGM_Helpers import getfilenames
+
+class TestMedialWidths(unittest.TestCase):
+    """Knee and ankle widths measured from the medial markers."""
+
+    @classmethod
+    def setUpClass(cls):
+        fileNames = getfilenames(2)
+        cls.data = loadC3D(fileNames[1])[0]
+        cls.vsk = loadVSK(fileNames[2],False)
+
+    def withMarkers(self, offsets):
+        # copy of the trial with markers added at an offset from others
+        data = []
+        for frame in self.data:
+            frame = dict(frame)
+            for marker, (source, offset) in offsets.items():
+                frame[marker] = frame[source]+np.array(offset)
+            data.append(frame)
+        return data
+
+    def widthless(self, *keys):
+        vsk = dict(self.vsk)
+        for key in keys:
+            vsk[key] = 0
+        return vsk
+
+    def test_medial_ankle(self):
+        data = self.withMarkers({'RMMA':('RANK',[0,80,0]),'LMMA':('LANK',[0,-75,0])})
+        vsk = self.widthless('RightAnkleWidth','LeftAnkleWidth')
+        result = getStatic(data,vsk,flat_foot=False)
+        self.assertAlmostEqual(result['RightAnkleWidth'],80)
+        self.assertAlmostEqual(result['LeftAnkleWidth'],75)
+
+    def test_medial_knee_without_ankle(self):
+        data = self.withMarkers({'RMKN':('RKNE',[0,100,0]),'LMKN':('LKNE',[0,-90,0])})
+        vsk = self.widthless('RightKneeWidth','LeftKneeWidth','RightAnkleWidth','LeftAnkleWidth')
+        result = getStatic(data,vsk,flat_foot=False)
+        self.assertAlmostEqual(result['RightKneeWidth'],100)
+        self.assertAlmostEqual(result['LeftKneeWidth'],90)
+        self.assertEqual(result['RightAnkleWidth'],0)
+        self.assertEqual(result['LeftAnkleWidth'],0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+import unittest
+import numpy as np
+from pyCGM_Single import pyCGM, pycgmVectorized
+from pyCGM_Single.pycgmIO import loadC3D, loadVSK, splitDataDict
+from pyCGM_Single.pycgmStatic import getStatic
+from pyCGM_Single.pyCGM_Helpers import getfilenames
+
+class TestJointAngleCalc(unittest.TestCase):
+    """The whole trial engine against the frame by frame pyCGM.JointAngleCalc."""
+
+    @classmethod
+    def setUpClass(cls):
+        fileNames = getfilenames(2)
+        data = loadC3D(fileNames[1])[0]
+        cls.vsk = getStatic(data,loadVSK(fileNames[2],False),flat_foot=False)
+        values, cls.labels = splitDataDict(data)
+        cls.values = np.array(values)
+
+    def frameCalc(self, values):
+        r = np.empty((len(values),pycgmVectorized.EA))
+        for i in range(len(values)):
+            pyCGM.JointAngleCalc(dict(zip(self.labels,values[i])),self.vsk,r[i])
+        return r
+
+    def assertSame(self, values, **kargs):
+        expected = self.frameCalc(values)
+        with np.errstate(invalid='ignore'):
+            r, jc = pycgmVectorized.JointAngleCalc(
+                pycgmVectorized.markerViews(values,self.labels),self.vsk,**kargs)
+        np.testing.assert_allclose(r, expected, rtol=0, atol=1e-8)
+        return r
+
+    def test_full_trial(self):
+        self.assertSame(self.values)
+
+    def test_gaps(self):
+        # single markers drop out at random, and every marker for a while
+        values = self.values.copy()
+        rng = np.random.RandomState(0)
+        for marker in ['RASI','RTHI','LKNE','RTOE','LFHD','C7','RSHO','LWRA','RFIN']:
+            rows = rng.choice(len(values),30,replace=False)
+            values[rows,self.labels.index(marker)] = np.nan
+        values[100:120] = np.nan
+        r = self.assertSame(values)
+        self.assertTrue(np.isnan(r[100:120]).all())
+
+    def test_out(self):
+        out = np.empty((len(self.values),pycgmVectorized.EA))
+        values = self.values.copy()
+        values[50:60,self.labels.index('LTIB')] = np.nan
+        r = self.assertSame(values,out=out)
+        self.assertTrue(r is out)
+
+if __name__ == '__main__':
+    unittest.main()